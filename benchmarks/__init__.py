@@ -0,0 +1 @@
+"""Benchmarks for the file browser and file watcher hot paths (see benchmarks/run.py)."""
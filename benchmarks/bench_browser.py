@@ -0,0 +1,192 @@
+"""Offscreen timings of the file browser on a synthetic tree."""
+import os
+import time
+from benchmarks.common import ensure_app, measure, summarize, wait_until
+
+
+# Queries typed into the search box; the first ones match many files
+SEARCH_QUERIES = ('report', 'inv', 'scan_00', 'contrct', 'zzz')
+
+
+def _largest_directory(root_path):
+    """Find the directory holding the most files."""
+    best, best_count = root_path, -1
+    for directory, _, files in os.walk(root_path):
+        if len(files) > best_count:
+            best, best_count = directory, len(files)
+    return best
+
+
+def bench_disk_model(root_path, ignore_matcher, repeat):
+    """
+    Time the browser reading the disk directly (QFileSystemModel, first run).
+    
+    Args:
+        root_path (str): Root of the synthetic tree
+        ignore_matcher (IgnoreMatcher): Ignore rules of the tree
+        repeat (int): Runs per measurement
+    
+    Returns:
+        dict: Timings by operation
+    """
+    from PyQt5.QtWidgets import QFileSystemModel
+    from services.folder_manager import FolderManager
+    from services.tree_walker import count_files
+    from ui.file_browser import FileBrowser
+    
+    results = {}
+    browser = FileBrowser()
+    
+    def root_populated():
+        model = browser.model
+        return model.rowCount(model.index(root_path)) >= len(FolderManager.DEFAULT_FOLDERS)
+    
+    call_samples, populated_samples = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        browser.set_tracked_location(root_path, ignore_matcher)
+        call_samples.append((time.perf_counter() - start) * 1000)
+        waited = wait_until(root_populated)
+        if waited is not None:
+            populated_samples.append((time.perf_counter() - start) * 1000)
+    results['set_tracked_location'] = summarize(call_samples)
+    results['set_tracked_location_until_listed'] = summarize(populated_samples)
+    assert isinstance(browser.model, QFileSystemModel)
+    
+    results['refresh'] = measure(browser.refresh, repeat)
+    
+    # The walk the running file counter does once per location
+    default_folders = FolderManager.get_default_folder_paths(root_path)
+    counted = []
+    results['count_files'] = measure(
+        lambda: counted.append(count_files(default_folders, ignore_matcher)), repeat
+    )
+    results['count_files']['files'] = counted[-1] if counted else None
+    
+    def seed_counter():
+        browser.file_counter.set_folders(default_folders, ignore_matcher)
+        wait_until(lambda: browser.file_counter.is_ready, timeout=600)
+    results['file_counter_seed'] = measure(seed_counter, repeat)
+    
+    # Without a name index the search box filters the model
+    samples = []
+    for query in SEARCH_QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            browser.filter_files(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    browser.filter_files('')
+    results['filter_files'] = summarize(samples)
+    
+    browser.file_counter.stop()
+    browser.directory_lister.shutdown()
+    browser.deleteLater()
+    return results
+
+
+def bench_index_model(root_path, ignore_matcher, db_path, repeat):
+    """
+    Time the browser listing from the metadata index.
+    
+    Args:
+        root_path (str): Root of the synthetic tree
+        ignore_matcher (IgnoreMatcher): Ignore rules of the tree
+        db_path (str): Database file for the benchmark index
+        repeat (int): Runs per measurement
+    
+    Returns:
+        dict: Timings by operation
+    """
+    from services.index import MetadataIndex, TrigramIndex
+    from ui.file_browser import FileBrowser
+    
+    results = {}
+    index = MetadataIndex(root_path, db_path=db_path, ignore_matcher=ignore_matcher)
+    
+    start = time.perf_counter()
+    index.catch_up()
+    results['index_catch_up_cold'] = summarize([(time.perf_counter() - start) * 1000])
+    results['index_catch_up_warm'] = measure(index.catch_up, repeat)
+    
+    browser = FileBrowser()
+    browser.set_metadata_index(index)
+    results['set_tracked_location'] = measure(
+        lambda: browser.set_tracked_location(root_path, ignore_matcher), repeat
+    )
+    results['refresh'] = measure(browser.refresh, repeat)
+    
+    # Opening the fullest directory and loading its first page
+    largest = _largest_directory(root_path)
+    
+    def open_largest():
+        browser._navigate_to_directory(largest)
+        directory_index = browser.model.index(largest)
+        if browser.model.canFetchMore(directory_index):
+            browser.model.fetchMore(directory_index)
+    
+    def start_over():
+        browser.model.reload()
+        browser._navigate_to_directory(root_path)
+    
+    results['navigate_largest_directory'] = measure(open_largest, repeat, setup=start_over)
+    model = browser.model
+    results['navigate_largest_directory']['rows_loaded'] = model.rowCount(model.index(largest))
+    
+    name_index = TrigramIndex()
+    start = time.perf_counter()
+    name_index.rebuild(index.file_paths())
+    results['name_index_rebuild'] = summarize([(time.perf_counter() - start) * 1000])
+    browser.set_name_index(name_index)
+    
+    # The GUI thread only hands the query to the name searcher...
+    samples = []
+    for query in SEARCH_QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            browser.filter_files(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    browser.filter_files('')
+    results['filter_files'] = summarize(samples)
+    
+    # ...which runs the search itself on its worker
+    samples = []
+    for query in SEARCH_QUERIES:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            name_index.search(query, browser.NAME_SEARCH_LIMIT)
+            samples.append((time.perf_counter() - start) * 1000)
+    results['name_search'] = summarize(samples)
+    
+    browser.set_name_index(None)
+    browser.set_metadata_index(None)
+    browser.file_counter.stop()
+    browser.directory_lister.shutdown()
+    browser.name_searcher.shutdown()
+    browser.deleteLater()
+    index.close()
+    return results
+
+
+def run(root_path, db_path, repeat=5):
+    """
+    Run the browser benchmarks.
+    
+    Args:
+        root_path (str): Root of the synthetic tree
+        db_path (str): Database file for the benchmark index (recreated)
+        repeat (int): Runs per measurement
+    
+    Returns:
+        dict: 'disk_model' and 'index_model' timings
+    """
+    from services.ignore_rules import IgnoreMatcher
+    
+    ensure_app()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    ignore_matcher = IgnoreMatcher(root_path)
+    return {
+        'disk_model': bench_disk_model(root_path, ignore_matcher, repeat),
+        'index_model': bench_index_model(root_path, ignore_matcher, db_path, repeat),
+    }
@@ -0,0 +1,121 @@
+"""Event-to-UI latency of the file watcher under storms of file events."""
+import os
+import shutil
+import threading
+import time
+from benchmarks.common import ensure_app, summarize, wait_until
+
+
+def _storm(paths, action, written):
+    """Create or delete files as fast as possible (runs on a thread)."""
+    for path in paths:
+        if action == 'create':
+            with open(path, 'wb'):
+                pass
+        else:
+            os.remove(path)
+        written[path] = time.perf_counter()
+
+
+def _run_storm(watcher, browser, paths, action, timeout):
+    """
+    Run one storm and collect when each event reached the browser.
+    
+    Returns:
+        dict: Latency summary and batch statistics
+    """
+    written = {}
+    delivered = {}
+    batches = []
+    ui_samples = []
+    
+    def on_batch(location, changes):
+        received = time.perf_counter()
+        browser.apply_changes(changes)
+        ui_samples.append((time.perf_counter() - received) * 1000)
+        batches.append(len(changes))
+        for _, src_path, dest_path in changes:
+            for path in (src_path, dest_path):
+                if path and path not in delivered:
+                    delivered[path] = received
+    
+    watcher.changes_batched.connect(on_batch)
+    start = time.perf_counter()
+    thread = threading.Thread(target=_storm, args=(paths, action, written))
+    thread.start()
+    wait_until(lambda: not thread.is_alive() and all(p in delivered for p in paths), timeout)
+    thread.join()
+    # Let a trailing batch arrive before disconnecting
+    wait_until(lambda: False, 0.1)
+    watcher.changes_batched.disconnect(on_batch)
+    
+    latencies = [
+        (delivered[path] - written[path]) * 1000 for path in paths
+        if path in delivered and path in written
+    ]
+    summary = summarize(latencies)
+    summary.update({
+        'events': len(paths),
+        'delivered': len(latencies),
+        'batches': len(batches),
+        'largest_batch': max(batches) if batches else 0,
+        'write_duration_ms': round((max(written.values()) - start) * 1000, 3) if written else None,
+        'total_duration_ms': round((max(delivered.values()) - start) * 1000, 3) if delivered else None,
+        'ui_handler': summarize(ui_samples),
+    })
+    return summary
+
+
+def run(root_path, events=10000, backend='native', timeout=120.0):
+    """
+    Measure how long file events take to reach the browser.
+    
+    A storm of file creations, and then of deletions, is written into a
+    scratch folder of the tree while a batching FileWatcher watches it.
+    Latency is measured per file, from the write to the moment its batch
+    is handed to FileBrowser.apply_changes().
+    
+    Args:
+        root_path (str): Root of the synthetic tree
+        events (int): Files per storm
+        backend (str): FileWatcher backend constant
+        timeout (float): Seconds to wait for a storm to be delivered
+    
+    Returns:
+        dict: 'create' and 'delete' storm results
+    """
+    from services.folder_manager import FolderManager
+    from services.file_watcher import FileWatcher
+    from services.ignore_rules import IgnoreMatcher
+    from ui.file_browser import FileBrowser
+    
+    ensure_app()
+    storm_dir = os.path.join(root_path, FolderManager.DEFAULT_FOLDERS[0], "benchmark_storm")
+    shutil.rmtree(storm_dir, ignore_errors=True)
+    os.makedirs(storm_dir)
+    paths = [os.path.join(storm_dir, f"storm_{index:06d}.txt") for index in range(events)]
+    
+    ignore_matcher = IgnoreMatcher(root_path)
+    browser = FileBrowser()
+    browser.set_tracked_location(root_path, ignore_matcher)
+    browser._navigate_to_directory(storm_dir)
+    
+    watcher = FileWatcher()
+    watcher.set_backend(backend)
+    watcher.set_batching(True)
+    results = {'backend': backend}
+    try:
+        if not watcher.watch_location(root_path, ignore_matcher):
+            raise RuntimeError(f"Could not watch {root_path}")
+        if backend != FileWatcher.BACKEND_NATIVE:
+            # The polling observer snapshots the tree first
+            wait_until(lambda: False, 2.0)
+        results['create'] = _run_storm(watcher, browser, paths, 'create', timeout)
+        results['delete'] = _run_storm(watcher, browser, paths, 'delete', timeout)
+    finally:
+        watcher.stop_watching()
+        browser.file_counter.stop()
+        browser.directory_lister.shutdown()
+        browser.deleteLater()
+        shutil.rmtree(storm_dir, ignore_errors=True)
+    return results
@@ -0,0 +1,92 @@
+"""Timing helpers shared by the benchmarks."""
+import os
+import statistics
+import time
+
+
+_app = None  # Kept alive for the whole run
+
+
+def ensure_app():
+    """
+    Get the QApplication, creating an offscreen one if needed.
+    
+    Returns:
+        QApplication: Application instance
+    """
+    global _app
+    # Must be set before Qt loads its platform plugin
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    if QApplication.instance() is None:
+        _app = QApplication(['dms-benchmarks'])
+    return QApplication.instance()
+
+
+def summarize(samples_ms):
+    """
+    Summarize timings.
+    
+    Args:
+        samples_ms (list): Durations in milliseconds
+    
+    Returns:
+        dict: 'runs', 'min_ms', 'median_ms', 'max_ms' (and 'p95_ms' for
+              10 or more samples)
+    """
+    if not samples_ms:
+        return {'runs': 0}
+    ordered = sorted(samples_ms)
+    summary = {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 3),
+        'median_ms': round(statistics.median(ordered), 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+    if len(ordered) >= 10:
+        summary['p95_ms'] = round(ordered[int(len(ordered) * 0.95) - 1], 3)
+    return summary
+
+
+def measure(function, repeat=5, setup=None):
+    """
+    Time a function several times.
+    
+    Args:
+        function (callable): Code to time
+        repeat (int): Number of runs
+        setup (callable): Called before every run, not timed
+    
+    Returns:
+        dict: Summary of the runs (see summarize())
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def wait_until(predicate, timeout=60.0):
+    """
+    Run the Qt event loop until a condition holds.
+    
+    Args:
+        predicate (callable): Returns True once the wait is over
+        timeout (float): Seconds to wait at most
+    
+    Returns:
+        float: Milliseconds waited, or None on timeout
+    """
+    app = ensure_app()
+    start = time.perf_counter()
+    deadline = start + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return None
+        app.processEvents()
+        time.sleep(0.001)
+    return (time.perf_counter() - start) * 1000
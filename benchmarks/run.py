@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Run the benchmarks and write the results as JSON.
+
+Example:
+    python -m benchmarks.run --files 100000 --output results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+# Run from the project root as `python -m benchmarks.run` or `python benchmarks/run.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tree_generator import generate_tree  # noqa: E402
+
+
+SUITES = ('browser', 'watcher')
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the file browser and watcher.")
+    parser.add_argument('--files', type=int, default=10000,
+                        help="files in the synthetic tree (1000 to 1000000, default 10000)")
+    parser.add_argument('--depth', type=int, default=2,
+                        help="levels of subfolders below each default folder (default 2)")
+    parser.add_argument('--fanout', type=int, default=8,
+                        help="subfolders per folder (default 8)")
+    parser.add_argument('--file-size', type=int, default=0,
+                        help="bytes per generated file (default 0)")
+    parser.add_argument('--tree', default=None,
+                        help="directory for the tree; reused if it has the same shape "
+                             "(default: a new temporary directory)")
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help="suite to run (repeatable; default: all)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="runs per browser measurement (default 5)")
+    parser.add_argument('--events', type=int, default=10000,
+                        help="file events per watcher storm (default 10000)")
+    parser.add_argument('--backend', default='native', choices=('native', 'polling'),
+                        help="file watcher backend for the storms (default native)")
+    parser.add_argument('--output', default=None,
+                        help="JSON file to write (default: benchmarks/results/<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+def environment():
+    """Describe the machine and library versions the results were taken on."""
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    import watchdog.version
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'watchdog': watchdog.version.VERSION_STRING,
+    }
+
+
+def main(argv=None):
+    """Generate the tree, run the suites and write the results."""
+    args = parse_args(argv)
+    suites = args.suite or list(SUITES)
+    work_dir = tempfile.mkdtemp(prefix="dms-benchmark-")
+    tree = args.tree or os.path.join(work_dir, "tree")
+    
+    print(f"Preparing tree with {args.files} files in {tree}...")
+    start = time.perf_counter()
+    shape = generate_tree(tree, args.files, args.depth, args.fanout, args.file_size)
+    shape['generate_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    
+    results = {
+        'started': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'tree': shape,
+        'suites': {},
+    }
+    if 'browser' in suites:
+        from benchmarks import bench_browser
+        print("Running browser benchmarks...")
+        results['suites']['browser'] = bench_browser.run(
+            tree, os.path.join(work_dir, "index.db"), args.repeat
+        )
+    if 'watcher' in suites:
+        from benchmarks import bench_watcher
+        print(f"Running watcher storms of {args.events} events...")
+        results['suites']['watcher'] = bench_watcher.run(tree, args.events, args.backend)
+    
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}.json")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
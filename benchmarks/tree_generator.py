@@ -0,0 +1,98 @@
+"""Synthetic document trees for the benchmarks."""
+import json
+import os
+import random
+from services.folder_manager import FolderManager
+
+
+MANIFEST_NAME = ".dms_benchmark.json"
+
+# Mix of names the browser, the thumbnailer and the content index care about
+EXTENSIONS = ('.pdf', '.docx', '.txt', '.jpg', '.png', '.xlsx', '.odt', '.md')
+NAME_STEMS = ('invoice', 'report', 'scan', 'contract', 'letter', 'photo', 'notes', 'receipt')
+
+
+def directory_layout(root_path, depth, fanout):
+    """
+    List the directories of a synthetic tree.
+    
+    Every default folder gets a tree of `fanout` subfolders per level,
+    `depth` levels deep.
+    
+    Args:
+        root_path (str): Root of the tree
+        depth (int): Levels of subfolders below each default folder
+        fanout (int): Subfolders per folder
+    
+    Returns:
+        list: Directory paths, parents before children
+    """
+    directories = []
+    for folder_name in FolderManager.DEFAULT_FOLDERS:
+        level = [os.path.join(root_path, folder_name)]
+        directories.extend(level)
+        for level_number in range(depth):
+            level = [
+                os.path.join(parent, f"folder_{level_number}_{index:03d}")
+                for parent in level for index in range(fanout)
+            ]
+            directories.extend(level)
+    return directories
+
+
+def generate_tree(root_path, file_count, depth=2, fanout=8, file_size=0, seed=0):
+    """
+    Create a synthetic tree spread across the three default folders.
+    
+    Files are dealt out round-robin over all directories, so every folder
+    holds about the same number. A manifest in the root records the shape;
+    a tree of the same shape is reused instead of being written again.
+    
+    Args:
+        root_path (str): Directory to create the tree in
+        file_count (int): Number of files, e.g. 1000 to 1000000
+        depth (int): Levels of subfolders below each default folder
+        fanout (int): Subfolders per folder
+        file_size (int): Bytes written to each file
+        seed (int): Seed for the file names and extensions
+    
+    Returns:
+        dict: Shape of the tree ('files', 'directories', 'depth', 'fanout',
+              'file_size', 'seed') and 'reused'
+    """
+    shape = {
+        'files': file_count,
+        'depth': depth,
+        'fanout': fanout,
+        'file_size': file_size,
+        'seed': seed,
+    }
+    manifest_path = os.path.join(root_path, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if {key: manifest.get(key) for key in shape} == shape:
+            return dict(manifest, reused=True)
+    except (OSError, json.JSONDecodeError):
+        pass
+    
+    if os.path.exists(root_path) and os.listdir(root_path):
+        raise ValueError(f"Refusing to generate a tree in non-empty directory: {root_path}")
+    
+    directories = directory_layout(root_path, depth, fanout)
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+    
+    rng = random.Random(seed)
+    content = b"x" * file_size
+    for index in range(file_count):
+        directory = directories[index % len(directories)]
+        name = f"{rng.choice(NAME_STEMS)}_{index:07d}{rng.choice(EXTENSIONS)}"
+        with open(os.path.join(directory, name), 'wb') as f:
+            if content:
+                f.write(content)
+    
+    manifest = dict(shape, directories=len(directories))
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return dict(manifest, reused=False)
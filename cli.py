@@ -0,0 +1,495 @@
+#!/usr/bin/env python3
+"""
+Command line interface for scripts and scheduled jobs (no display needed).
+
+Every command writes one JSON object per line to stdout, each with a
+'type' field; errors are written the same way to stderr and make the exit
+status non-zero. Log messages of the services go to stderr as well.
+
+Examples:
+    dms-client index ~/Documents --content
+    dms-client count ~/Documents
+    dms-client search ~/Documents invoice --limit 20
+    dms-client dedupe ~/Documents --min-size 1024
+    dms-client scan ~/Documents --format PDF
+    dms-client scan ~/Documents --batch
+
+Only the modules a command needs are imported, and none of them load Qt
+widgets; `scan` is the only command that loads Qt (QtCore) at all.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Ensure the parent directory is in the path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+class CommandError(Exception):
+    """A command could not be carried out; reported as an error record."""
+
+
+class Output:
+    """Writes JSON lines to the real stdout while service logs go to stderr."""
+    
+    def __init__(self, stream):
+        """
+        Initialize output.
+        
+        Args:
+            stream: Text stream the records are written to
+        """
+        self.stream = stream
+    
+    def emit(self, record_type, **fields):
+        """
+        Write one record.
+        
+        Args:
+            record_type (str): Value of the record's 'type' field
+            **fields: Other fields of the record
+        """
+        fields = dict(type=record_type, **fields)
+        self.stream.write(json.dumps(fields, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def _elapsed_ms(start):
+    """Milliseconds since a time.perf_counter() value."""
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _location(path):
+    """
+    Check a location argument.
+    
+    Args:
+        path (str): Location given on the command line
+    
+    Returns:
+        str: Normalized absolute path
+    """
+    location = os.path.normpath(os.path.abspath(os.path.expanduser(path)))
+    if not os.path.isdir(location):
+        raise CommandError(f"Location is not a directory: {path}")
+    return location
+
+
+def _is_same_or_inside(path, other):
+    """Check whether path is other or a folder inside it."""
+    return path == other or path.startswith(other.rstrip(os.sep) + os.sep)
+
+
+def _index_root(location):
+    """
+    Find the location whose indexes cover a folder.
+    
+    A folder inside a tracked or already indexed location is served from
+    that location's indexes; indexing it on its own would add a second
+    root that nothing keeps up to date. As in the application, a folder
+    containing a tracked location is refused. Untracked locations inside
+    the folder were only indexed by earlier commands; they are dropped so
+    the folder's index replaces them.
+    
+    Args:
+        location (str): Normalized folder path
+    
+    Returns:
+        str: The location itself, or the location it lies in
+    """
+    from services.index.metadata_index import MetadataIndex
+    from utils.config import Config
+    
+    tracked = [os.path.normpath(path) for path in Config().get_tracked_locations()]
+    indexed = [root for root in MetadataIndex.indexed_roots() if root not in tracked]
+    for root in tracked + indexed:
+        if _is_same_or_inside(location, root) and os.path.isdir(root):
+            return root
+    for root in tracked:
+        if _is_same_or_inside(root, location):
+            raise CommandError(
+                f"Location contains the tracked location {root}; "
+                "use that location or a folder inside it"
+            )
+    for root in indexed:
+        if _is_same_or_inside(root, location):
+            metadata_index = MetadataIndex(root)
+            try:
+                metadata_index.forget()
+            finally:
+                metadata_index.close()
+    return location
+
+
+def _catch_up(metadata_index, journal=None):
+    """
+    Bring the metadata index up to date, the way the index worker does.
+    
+    Changes journaled by the application but not applied yet are replayed,
+    the disk is compared with the index, and what was found is journaled
+    so the application's other indexes pick it up too.
+    
+    Args:
+        metadata_index (MetadataIndex): Index to update
+        journal (ChangeJournal): Journal of the location, or None
+    
+    Returns:
+        dict: Result of MetadataIndex.catch_up()
+    """
+    from services.events import coalesce
+    
+    if journal is not None:
+        replay = journal.read_since(metadata_index.journal_position)
+        if replay:
+            metadata_index.apply_changes(coalesce(replay))
+    result = metadata_index.catch_up()
+    if journal is not None:
+        metadata_index.journal_position = journal.record_catch_up(result['changes'])
+    return result
+
+
+def _open_journal(location):
+    """
+    Open the change journal of a location, unless the application has it open.
+    
+    Only one process may write a journal. While the application runs it
+    journals what it sees itself, so the command line then updates the
+    indexes without journaling.
+    
+    Args:
+        location (str): Location path
+    
+    Returns:
+        ChangeJournal: Open journal, or None if it is in use
+    """
+    from services.change_journal import ChangeJournal, JournalInUseError
+    
+    try:
+        return ChangeJournal(location)
+    except JournalInUseError:
+        print(f"Change journal of {location} is in use; not journaling changes")
+        return None
+
+
+def _close_journal(journal):
+    """
+    Close a journal opened by _open_journal().
+    
+    A checkpoint is only written if the application shut down cleanly;
+    otherwise its next start must still see that it did not.
+    """
+    if journal is not None:
+        journal.close(checkpoint=journal.clean_shutdown)
+
+
+@contextlib.contextmanager
+def _open_metadata_index(location, refresh=False):
+    """
+    Open the metadata index of a location, catching it up when needed.
+    
+    The index is caught up when asked to, or when the location has never
+    been indexed; otherwise it is used as the application left it.
+    
+    Args:
+        location (str): Location path, as returned by _index_root()
+        refresh (bool): Compare the index with the disk first
+    
+    Yields:
+        MetadataIndex: Open index
+    """
+    from services.ignore_rules import IgnoreMatcher
+    from services.index.metadata_index import MetadataIndex
+    
+    ignore_matcher = IgnoreMatcher(location)
+    metadata_index = MetadataIndex(location, ignore_matcher=ignore_matcher)
+    try:
+        if refresh or not metadata_index.is_listed(location):
+            journal = _open_journal(location)
+            try:
+                _catch_up(metadata_index, journal)
+            finally:
+                _close_journal(journal)
+        yield metadata_index
+    finally:
+        metadata_index.close()
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def command_index(args, output):
+    """Bring the indexes of a location up to date."""
+    from services.ignore_rules import IgnoreMatcher
+    from services.index.metadata_index import MetadataIndex
+    
+    # A folder inside an indexed location brings that whole location up to date
+    location = _index_root(_location(args.location))
+    start = time.perf_counter()
+    ignore_matcher = IgnoreMatcher(location)
+    journal = _open_journal(location)
+    metadata_index = MetadataIndex(location, ignore_matcher=ignore_matcher)
+    try:
+        result = _catch_up(metadata_index, journal)
+        if args.changes:
+            for event_type, src_path, dest_path in result['changes']:
+                output.emit('change', event=event_type, path=src_path, dest_path=dest_path)
+        summary = {
+            'location': location,
+            'files': metadata_index.count_files(),
+            'dirs_checked': result['dirs_checked'],
+            'dirs_scanned': result['dirs_scanned'],
+            'changes': len(result['changes']),
+        }
+        
+        if args.content:
+            from services.index.content_index import ContentIndex
+            content_index = ContentIndex(location, ignore_matcher=ignore_matcher)
+            try:
+                position = journal.position if journal is not None else None
+                to_index, removed = content_index.stale_paths()
+                if removed:
+                    content_index.update_documents(removed=removed)
+                for batch_start in range(0, len(to_index), args.batch_size):
+                    content_index.update_documents(
+                        to_index[batch_start:batch_start + args.batch_size]
+                    )
+                if position is not None:
+                    content_index.journal_position = position
+                summary['documents_indexed'] = len(to_index)
+                summary['documents_removed'] = len(removed)
+            finally:
+                content_index.close()
+    finally:
+        metadata_index.close()
+        _close_journal(journal)
+    
+    output.emit('index', elapsed_ms=_elapsed_ms(start), **summary)
+
+
+def command_count(args, output):
+    """Count the files of a location, in total and per default folder."""
+    from services.folder_manager import FolderManager
+    
+    location = _location(args.location)
+    start = time.perf_counter()
+    folders = {
+        name: os.path.join(location, name) for name in FolderManager.DEFAULT_FOLDERS
+    }
+    if args.disk:
+        from services.ignore_rules import IgnoreMatcher
+        from services.tree_walker import count_files
+        ignore_matcher = IgnoreMatcher(location)
+        counts = {name: count_files([path], ignore_matcher) for name, path in folders.items()}
+        total = count_files([location], ignore_matcher)
+    else:
+        root = _index_root(location)
+        with _open_metadata_index(root, args.refresh) as metadata_index:
+            counts = {name: metadata_index.count_files([path]) for name, path in folders.items()}
+            total = metadata_index.count_files(None if location == root else [location])
+    output.emit('count', location=location, files=total, folders=counts,
+                source='disk' if args.disk else 'index', elapsed_ms=_elapsed_ms(start))
+
+
+def command_search(args, output):
+    """Find files by name, or documents by content."""
+    location = _location(args.location)
+    if args.content:
+        from services.index.content_index import ContentIndex
+        content_index = ContentIndex(location)
+        try:
+            for path, score in content_index.search(args.query, args.limit):
+                output.emit('document', path=path, score=round(score, 4))
+        finally:
+            content_index.close()
+        return
+    
+    root = _index_root(location)
+    with _open_metadata_index(root, args.refresh) as metadata_index:
+        folder = None if location == root else location
+        for entry in metadata_index.search_names(args.query, args.limit, folder):
+            if entry['is_dir'] and not args.folders:
+                continue
+            output.emit('folder' if entry['is_dir'] else 'file', path=entry['path'],
+                        size=entry['size'], mtime=entry['mtime'])
+
+
+def command_dedupe(args, output):
+    """Hash files of equal size and list groups of identical files."""
+    from concurrent.futures import ThreadPoolExecutor
+    from services.index.hash_index import HashIndex
+    
+    location = _location(args.location)
+    start = time.perf_counter()
+    root = _index_root(location)
+    with _open_metadata_index(root, args.refresh) as metadata_index:
+        # Digests are stored by path, so a folder inside a location gets its own
+        hash_index = HashIndex(location)
+        try:
+            # Same staged hashing as the application's hash worker
+            candidates = metadata_index.files_sharing_size(args.min_size)
+            if location != root:
+                candidates = [c for c in candidates if _is_same_or_inside(c[0], location)]
+            hash_index.retain(path for path, _, _, _ in candidates)
+            workers = min(4, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hash') as pool:
+                files_read = hash_index.hash_candidates(candidates, pool.map)
+            groups = hash_index.duplicates(args.min_size)
+        finally:
+            hash_index.close()
+    
+    for group in groups:
+        output.emit('duplicates', size=group['size'], wasted_bytes=group['wasted_bytes'],
+                    paths=group['paths'])
+    output.emit('dedupe', location=location, groups=len(groups),
+                wasted_bytes=sum(group['wasted_bytes'] for group in groups),
+                candidates=len(candidates), files_read=files_read,
+                elapsed_ms=_elapsed_ms(start))
+
+
+def command_scan(args, output):
+    """List scanners, or scan a document into a location."""
+    from services.scanner_service import ScannerService
+    
+    service = ScannerService()
+    if args.list:
+        for index, scanner in enumerate(service.detect_scanners()):
+            output.emit('scanner', index=index, name=scanner.get('name'),
+                        vendor=scanner.get('vendor'), model=scanner.get('model'))
+        return
+    
+    if args.output:
+        save_path = os.path.abspath(os.path.expanduser(args.output))
+    else:
+        if not args.location:
+            raise CommandError("Give a location or --output to scan to")
+        from datetime import datetime
+        from services.folder_manager import FolderManager
+        location = _location(args.location)
+        extension = 'pdf' if args.batch else 'jpg' if args.format == 'JPEG' else args.format.lower()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        save_path = os.path.join(location, FolderManager.DEFAULT_FOLDERS[0],
+                                 f"scan_{timestamp}.{extension}")
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    
+    scanner_index = args.scanner
+    if args.device:
+        # Skip detection; scan_document uses the known device name
+        service.available_scanners = [{'name': args.device}]
+        scanner_index = 0
+    elif not service.cached_scanners():
+        # Indexes are those of the last --list or scanner dialog, if recent
+        service.detect_scanners()
+    
+    errors = []
+    service.scan_progress.connect(lambda message: output.emit('progress', message=message))
+    service.scan_bytes.connect(
+        lambda received, total: output.emit('progress', bytes=received, total_bytes=total)
+    )
+    service.scan_error.connect(errors.append)
+    start = time.perf_counter()
+    if args.batch:
+        service.page_saved.connect(
+            lambda pages, rate: output.emit('page', number=pages, pages_per_minute=round(rate, 1))
+        )
+        pages = service.scan_batch(scanner_index, args.resolution, args.mode, save_path)
+        if errors:
+            raise CommandError(errors[0])
+        output.emit('scan', path=save_path, pages=pages, elapsed_ms=_elapsed_ms(start))
+        return
+    image = service.scan_document(scanner_index, args.resolution, args.mode, args.format, save_path)
+    if image is None or errors:
+        raise CommandError(errors[0] if errors else "Scan failed")
+    output.emit('scan', path=save_path, width=image.size[0], height=image.size[1],
+                elapsed_ms=_elapsed_ms(start))
+
+
+def parse_args(argv=None):
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog='dms-client',
+        description="Document Management Client for scripts. Output is one JSON object per line."
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    index_parser = commands.add_parser('index', help="bring the indexes of a location up to date")
+    index_parser.add_argument('location')
+    index_parser.add_argument('--content', action='store_true',
+                              help="also index document contents for search --content")
+    index_parser.add_argument('--changes', action='store_true',
+                              help="write a record for every file change found")
+    index_parser.add_argument('--batch-size', type=int, default=200, help=argparse.SUPPRESS)
+    index_parser.set_defaults(handler=command_index)
+    
+    count_parser = commands.add_parser('count', help="count files in a location")
+    count_parser.add_argument('location')
+    count_parser.add_argument('--disk', action='store_true',
+                              help="walk the disk instead of reading the index")
+    count_parser.add_argument('--refresh', action='store_true',
+                              help="update the index from the disk first")
+    count_parser.set_defaults(handler=command_count)
+    
+    search_parser = commands.add_parser('search', help="find files by name or contents")
+    search_parser.add_argument('location')
+    search_parser.add_argument('query')
+    search_parser.add_argument('--limit', type=int, default=200)
+    search_parser.add_argument('--content', action='store_true',
+                               help="search document contents (needs index --content)")
+    search_parser.add_argument('--folders', action='store_true',
+                               help="include matching folders")
+    search_parser.add_argument('--refresh', action='store_true',
+                               help="update the index from the disk first")
+    search_parser.set_defaults(handler=command_search)
+    
+    dedupe_parser = commands.add_parser('dedupe', help="list groups of identical files")
+    dedupe_parser.add_argument('location')
+    dedupe_parser.add_argument('--min-size', type=int, default=1,
+                               help="ignore files smaller than this many bytes")
+    dedupe_parser.add_argument('--refresh', action='store_true',
+                               help="update the index from the disk first")
+    dedupe_parser.set_defaults(handler=command_dedupe)
+    
+    scan_parser = commands.add_parser('scan', help="scan a document")
+    scan_parser.add_argument('location', nargs='?',
+                             help="save into the location's General folder")
+    scan_parser.add_argument('--list', action='store_true', help="detect and list scanners, then exit")
+    scan_parser.add_argument('--scanner', type=int, default=0, help="scanner index (see --list)")
+    scan_parser.add_argument('--device', help="SANE device name; skips scanner detection")
+    scan_parser.add_argument('--resolution', type=int, default=300)
+    scan_parser.add_argument('--mode', default='Color', choices=('Color', 'Gray', 'Lineart'))
+    scan_parser.add_argument('--format', default='PNG', choices=('PNG', 'JPEG', 'PDF'))
+    scan_parser.add_argument('--output', help="file to save the scan to")
+    scan_parser.add_argument('--batch', action='store_true',
+                             help="scan every page in the document feeder into one PDF")
+    scan_parser.set_defaults(handler=command_scan)
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run one command and return the exit status."""
+    args = parse_args(argv)
+    output = Output(sys.stdout)
+    errors = Output(sys.stderr)
+    try:
+        # Services log with print(); keep stdout for records only
+        with contextlib.redirect_stdout(sys.stderr):
+            args.handler(args, output)
+    except CommandError as e:
+        errors.emit('error', command=args.command, message=str(e))
+        return 1
+    except KeyboardInterrupt:
+        errors.emit('error', command=args.command, message="Interrupted")
+        return 130
+    except Exception as e:
+        errors.emit('error', command=args.command, message=f"{type(e).__name__}: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
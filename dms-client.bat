@@ -0,0 +1,10 @@
+@echo off
+REM Command line interface of Document Management Client (see cli.py)
+REM Runs in the current directory so relative location paths work
+
+if exist "%~dp0venv\Scripts\python.exe" (
+    "%~dp0venv\Scripts\python.exe" "%~dp0cli.py" %*
+) else (
+    python "%~dp0cli.py" %*
+)
+exit /b %errorlevel%
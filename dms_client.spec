@@ -37,12 +37,45 @@ hiddenimports = [
     'ui.main_window',
     'ui.file_browser',
     'ui.location_dialog',
+    'ui.location_session',
     'ui.scanner_dialog',
+    'ui.scan_preview',
     'ui.styles',
+    'ui.search_results',
+    'ui.index_model',
+    'ui.duplicates_dialog',
+    'ui.diagnostics_dialog',
+    'ui.thumbnail_provider',
     'services.file_watcher',
     'services.folder_manager',
     'services.scanner_service',
+    'services.scanner_cache',
+    'services.pnm_stream',
+    'services.pdf_stream',
+    'services.scan_pipeline',
+    'services.document_writer',
+    'services.events',
+    'services.tree_walker',
+    'services.file_counter',
+    'services.snapshot_observer',
+    'services.ignore_rules',
+    'services.change_journal',
+    'services.thumbnail_cache',
+    'services.directory_lister',
+    'services.metrics',
+    'services.index',
+    'services.index.metadata_index',
+    'services.index.index_worker',
+    'services.index.sqlite_store',
+    'services.index.content_index',
+    'services.index.content_worker',
+    'services.index.content_search',
+    'services.index.name_search',
+    'services.index.trigram_index',
+    'services.index.hash_index',
+    'services.index.hash_worker',
     'utils.config',
+    'utils.startup_profile',
     # Watchdog
     'watchdog',
     'watchdog.observers',
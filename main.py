@@ -1,4 +1,5 @@
 """Main application entry point for DMS Client."""
+import multiprocessing
 import sys
 import traceback
 from pathlib import Path
@@ -6,9 +7,10 @@ from pathlib import Path
 # Ensure the parent directory is in the path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt
-from ui.main_window import MainWindow
+# Imported first so the start-up clock starts before Qt is loaded
+from utils import startup_profile
+
+PROFILE_STARTUP_FLAG = '--profile-startup'
 
 
 def excepthook(exc_type, exc_value, exc_traceback):
@@ -21,6 +23,7 @@ def excepthook(exc_type, exc_value, exc_traceback):
     print(f"Unhandled exception: {error_msg}", file=sys.stderr)
     
     # Show error dialog if QApplication exists
+    from PyQt5.QtWidgets import QApplication, QMessageBox
     app = QApplication.instance()
     if app is not None:
         QMessageBox.critical(
@@ -36,14 +39,28 @@ def main():
     # Install exception hook to catch unhandled exceptions
     sys.excepthook = excepthook
     
+    # Report how long each start-up step takes (printed to stderr)
+    if PROFILE_STARTUP_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_STARTUP_FLAG)
+        startup_profile.enable()
+    
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    startup_profile.mark("import PyQt5")
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Document Management Client")
     app.setOrganizationName("DMS Client")
+    startup_profile.mark("create QApplication")
     
     try:
-        # Create and show main window
+        from ui.main_window import MainWindow
+        startup_profile.mark("import ui.main_window")
+        
+        # Create and show main window; tracked locations are opened once it has painted
         window = MainWindow()
+        startup_profile.mark("create main window")
         window.show()
+        startup_profile.mark("show main window")
         
         # Run application
         sys.exit(app.exec_())
@@ -59,5 +76,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Thumbnail workers are separate processes; needed for frozen builds
+    multiprocessing.freeze_support()
     main()
 
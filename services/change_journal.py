@@ -0,0 +1,500 @@
+"""Append-only journal of file changes under ~/.dms_client."""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from services import events
+from utils.config import Config
+
+
+# One-letter codes keep records short
+_TYPE_CODES = {
+    events.CREATED: 'c',
+    events.DELETED: 'd',
+    events.MODIFIED: 'm',
+    events.MOVED: 'r',
+    events.DIR_CREATED: 'C',
+    events.DIR_DELETED: 'D',
+    events.DIR_MOVED: 'R',
+}
+_CODE_TYPES = {code: event_type for event_type, code in _TYPE_CODES.items()}
+
+# Marks a point that consumers cannot replay past; they must rescan instead
+_RESCAN_CODE = 'x'
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+
+class JournalInUseError(OSError):
+    """Another ChangeJournal (usually another process) has the journal open."""
+
+
+def _try_lock(lock_file):
+    """
+    Take an exclusive lock on an open file without waiting.
+    
+    Returns:
+        bool: False if someone else holds the lock
+    """
+    try:
+        if sys.platform == 'win32':
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(lock_file):
+    """Release a lock taken with _try_lock()."""
+    try:
+        if sys.platform == 'win32':
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+def _escape(text):
+    """Escape a path so it fits on one tab-separated line."""
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def _unescape(text):
+    """Reverse _escape()."""
+    if '\\' not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == '\\' and i + 1 < len(text):
+            i += 1
+            c = {'t': '\t', 'n': '\n'}.get(text[i], text[i])
+        out.append(c)
+        i += 1
+    return ''.join(out)
+
+
+class ChangeJournal:
+    """
+    Append-only log of the normalized changes seen under one location.
+    
+    Every change gets a sequence number. Consumers remember the position
+    (journal id and sequence number) of the last change they applied and,
+    after a restart, ask for everything since then instead of walking the
+    tree again. The id changes whenever the journal has to be discarded,
+    so stale positions are never mistaken for valid ones. Records are one line
+    each (sequence, type code, paths relative to the location) in
+    segment files that rotate at a size limit; only the newest segments
+    are kept, so a consumer that fell too far behind gets None from
+    read_since() and must rescan.
+    
+    A checkpoint written on clean shutdown records the last sequence
+    number and time, so the next start can tell whether the previous
+    session ended cleanly. The journal is safe to share between threads,
+    but only one ChangeJournal may have it open at a time: sequence numbers
+    are kept in memory, so a second writer would hand out the same ones.
+    A lock file enforces this across processes (e.g. the application and
+    the command line).
+    
+    Changes too many to be worth replaying, such as every file found by
+    the first catch-up of a location, are journaled as a single rescan
+    marker instead; read_since() returns None for positions before it.
+    """
+    
+    DIR_NAME = "journal"
+    SEGMENT_PREFIX = "changes-"
+    SEGMENT_SUFFIX = ".log"
+    CHECKPOINT_FILE_NAME = "checkpoint.json"
+    ID_FILE_NAME = "journal.id"
+    LOCK_FILE_NAME = "journal.lock"
+    
+    DEFAULT_SEGMENT_BYTES = 4 * 1024 * 1024
+    DEFAULT_MAX_SEGMENTS = 8
+    
+    # Catch-up results with more changes are journaled as a rescan marker;
+    # replaying them would cost about as much as a rescan anyway
+    MAX_CATCH_UP_RECORDS = 10000
+    
+    def __init__(self, root_path, journal_dir=None,
+                 segment_bytes=DEFAULT_SEGMENT_BYTES, max_segments=DEFAULT_MAX_SEGMENTS):
+        """
+        Open (and create if needed) the journal of a location.
+        
+        Args:
+            root_path (str): Tracked location the changes belong to
+            journal_dir (str): Directory for this journal
+                (defaults to ~/.dms_client/journal/<hash of root_path>)
+            segment_bytes (int): Size at which a new segment is started
+            max_segments (int): Number of segments kept
+        
+        Raises:
+            JournalInUseError: The journal is open elsewhere
+        """
+        self.root_path = os.path.normpath(str(root_path))
+        self._root_prefix = self.root_path.rstrip(os.sep) + os.sep
+        if journal_dir is None:
+            digest = hashlib.sha1(self.root_path.encode('utf-8', 'surrogateescape')).hexdigest()
+            journal_dir = Path.home() / Config.CONFIG_DIR_NAME / self.DIR_NAME / digest[:16]
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        # Taken before anything is read, since opening may reset the journal
+        self._lock_file = open(self.journal_dir / self.LOCK_FILE_NAME, 'a+')
+        if not _try_lock(self._lock_file):
+            self._lock_file.close()
+            raise JournalInUseError(f"Change journal of {self.root_path} is in use")
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(1, max_segments)
+        
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_size = 0
+        self._segments = self._list_segments()  # First sequence numbers, oldest first
+        self.journal_id = self._load_id()
+        self._last_seq = self._recover_last_seq()
+        
+        # Checkpoint of the previous session; it ended cleanly if nothing was
+        # written after it
+        self.previous_checkpoint = self._load_checkpoint()
+        self.clean_shutdown = (
+            self.previous_checkpoint is not None
+            and self.previous_checkpoint.get('position') == self.position
+        )
+    
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+    
+    def _segment_path(self, first_seq):
+        """Path of the segment whose first record has the given sequence number."""
+        return self.journal_dir / f"{self.SEGMENT_PREFIX}{first_seq:012d}{self.SEGMENT_SUFFIX}"
+    
+    def _list_segments(self):
+        """Find existing segments, oldest first."""
+        segments = []
+        for path in self.journal_dir.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"):
+            number = path.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+            if number.isdigit():
+                segments.append(int(number))
+        return sorted(segments)
+    
+    def _load_id(self):
+        """Read the journal id, starting a fresh journal if there is none."""
+        try:
+            journal_id = (self.journal_dir / self.ID_FILE_NAME).read_text().strip()
+        except OSError:
+            journal_id = ''
+        if not journal_id:
+            self._reset()
+            journal_id = self._new_id()
+        return journal_id
+    
+    def _new_id(self):
+        """Generate and store a new journal id."""
+        journal_id = uuid.uuid4().hex
+        try:
+            (self.journal_dir / self.ID_FILE_NAME).write_text(journal_id)
+        except OSError as e:
+            print(f"Error writing change journal id: {e}")
+        return journal_id
+    
+    def _recover_last_seq(self):
+        """
+        Find the last complete record, dropping a partial one left by a crash.
+        
+        Returns:
+            int: Last sequence number (0 for an empty journal)
+        """
+        while self._segments:
+            path = self._segment_path(self._segments[-1])
+            try:
+                with open(path, 'rb+') as f:
+                    data = f.read()
+                    end = data.rfind(b'\n') + 1
+                    if end < len(data):
+                        f.truncate(end)
+            except OSError as e:
+                print(f"Error reading change journal {path}: {e}")
+                break
+            if not end:
+                # Empty segment - the previous record is the last one
+                path.unlink()
+                return self._segments.pop() - 1
+            last_line = data[data.rfind(b'\n', 0, end - 1) + 1:end]
+            try:
+                return int(last_line.split(b'\t', 1)[0])
+            except ValueError:
+                print(f"Change journal {path} is corrupt")
+                break
+        else:
+            return 0
+        
+        # Unreadable - start over under a new id
+        self._reset()
+        self.journal_id = self._new_id()
+        return 0
+    
+    def _reset(self):
+        """Delete all segments; consumers will find their offsets invalid."""
+        for first in self._segments:
+            try:
+                self._segment_path(first).unlink()
+            except OSError:
+                pass
+        self._segments = []
+    
+    def _open_segment(self):
+        """Open the newest segment for appending (caller holds the lock)."""
+        if not self._segments:
+            self._segments.append(self._last_seq + 1)
+        path = self._segment_path(self._segments[-1])
+        self._file = open(path, 'a', encoding='utf-8', errors='surrogateescape', newline='\n')
+        self._file_size = self._file.tell()
+    
+    def _rotate(self):
+        """Start a new segment and drop the oldest ones (caller holds the lock)."""
+        self._file.close()
+        self._file = None
+        self._segments.append(self._last_seq + 1)
+        while len(self._segments) > self.max_segments:
+            oldest = self._segments.pop(0)
+            try:
+                self._segment_path(oldest).unlink()
+            except OSError:
+                pass
+        self._open_segment()
+    
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    
+    @property
+    def last_seq(self):
+        """int: Sequence number of the newest record (0 if empty)."""
+        return self._last_seq
+    
+    @property
+    def position(self):
+        """str: Position after the newest record, for consumers to store."""
+        return f"{self.journal_id}:{self._last_seq}"
+    
+    @property
+    def first_seq(self):
+        """int: Sequence number of the oldest record still kept."""
+        return self._segments[0] if self._segments else self._last_seq + 1
+    
+    def _relative(self, path):
+        """Store paths inside the location relative to it."""
+        path = os.path.normpath(path)
+        if path.startswith(self._root_prefix):
+            return path[len(self._root_prefix):]
+        return path
+    
+    def _absolute(self, path):
+        """Reverse _relative()."""
+        return path if os.path.isabs(path) else os.path.join(self.root_path, path)
+    
+    def append(self, changes):
+        """
+        Append a batch of changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        
+        Returns:
+            str: Position after the last record written
+        """
+        with self._lock:
+            if not changes:
+                return self.position
+            if self._file is None:
+                self._open_segment()
+            
+            lines = []
+            seq = self._last_seq
+            for event_type, src_path, dest_path in changes:
+                seq += 1
+                record = f"{seq}\t{_TYPE_CODES[event_type]}\t{_escape(self._relative(src_path))}"
+                if dest_path:
+                    record += f"\t{_escape(self._relative(dest_path))}"
+                lines.append(record + '\n')
+            return self._write(''.join(lines), seq)
+    
+    def append_rescan(self):
+        """
+        Append a rescan marker: consumers behind it must rescan.
+        
+        Returns:
+            str: Position after the marker
+        """
+        with self._lock:
+            if self._file is None:
+                self._open_segment()
+            seq = self._last_seq + 1
+            return self._write(f"{seq}\t{_RESCAN_CODE}\t.\n", seq)
+    
+    def record_catch_up(self, changes):
+        """
+        Journal the changes a catch-up found on disk.
+        
+        Up to MAX_CATCH_UP_RECORDS changes are appended; more (a cold
+        start finds every file) are journaled as one rescan marker, so a
+        large tree does not write megabytes of records that rotation
+        mostly throws away.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        
+        Returns:
+            str: Position after the last record written
+        """
+        if len(changes) > self.MAX_CATCH_UP_RECORDS:
+            return self.append_rescan()
+        return self.append(changes)
+    
+    def _write(self, data, seq):
+        """
+        Write records ending with sequence number seq (caller holds the lock).
+        
+        Returns:
+            str: Position after the last record written
+        """
+        try:
+            self._file.write(data)
+            self._file.flush()
+        except OSError as e:
+            print(f"Error writing change journal: {e}")
+            return self.position
+        self._last_seq = seq
+        # The segment limit is in bytes; non-ASCII paths take more than one
+        self._file_size += len(data.encode('utf-8', 'surrogateescape'))
+        if self._file_size >= self.segment_bytes:
+            self._rotate()
+        return self.position
+    
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    
+    def read_since(self, position):
+        """
+        Get the changes recorded after a position.
+        
+        Args:
+            position (str): Position the caller has applied changes up to
+        
+        Returns:
+            list: (event_type, src_path, dest_path) tuples, oldest first, or
+                  None if the journal no longer covers that point (records
+                  rotated away, the journal was reset, or a rescan marker
+                  follows it) and the caller must rescan instead
+        """
+        journal_id, _, seq = (position or '').partition(':')
+        if journal_id != self.journal_id or not seq.isdigit():
+            return None
+        seq = int(seq)
+        
+        with self._lock:
+            if seq > self._last_seq or seq < self.first_seq - 1:
+                return None
+            if self._file is not None:
+                self._file.flush()
+            segments = list(self._segments)
+        
+        changes = []
+        for index, first in enumerate(segments):
+            next_first = segments[index + 1] if index + 1 < len(segments) else None
+            if next_first is not None and next_first <= seq + 1:
+                continue
+            try:
+                with open(self._segment_path(first), 'r', encoding='utf-8',
+                          errors='surrogateescape', newline='\n') as f:
+                    for line in f:
+                        if not line.endswith('\n'):
+                            break
+                        fields = line[:-1].split('\t')
+                        if int(fields[0]) <= seq:
+                            continue
+                        if fields[1] == _RESCAN_CODE:
+                            return None
+                        src_path = self._absolute(_unescape(fields[2]))
+                        dest_path = self._absolute(_unescape(fields[3])) if len(fields) > 3 else None
+                        changes.append((_CODE_TYPES[fields[1]], src_path, dest_path))
+            except (OSError, ValueError, IndexError, KeyError) as e:
+                print(f"Error reading change journal: {e}")
+                return None
+        return changes
+    
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+    
+    @property
+    def checkpoint_path(self):
+        """Path: File holding the last checkpoint."""
+        return self.journal_dir / self.CHECKPOINT_FILE_NAME
+    
+    def _load_checkpoint(self):
+        """Read the checkpoint left by the previous session, if any."""
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('root') != self.root_path:
+            return None
+        return checkpoint
+    
+    def checkpoint(self):
+        """
+        Make all records durable and record the current position.
+        
+        The checkpoint is written to a temporary file and renamed into
+        place, so a crash never leaves a half-written one.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            checkpoint = {'root': self.root_path, 'position': self.position, 'time': time.time()}
+        
+        temp_path = self.checkpoint_path.with_suffix('.tmp')
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.checkpoint_path)
+        except OSError as e:
+            print(f"Error writing change journal checkpoint: {e}")
+    
+    def close(self, checkpoint=True):
+        """
+        Close the journal.
+        
+        Args:
+            checkpoint (bool): Write a checkpoint first
+        """
+        if self._lock_file is None:
+            return
+        if checkpoint:
+            self.checkpoint()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            _unlock(self._lock_file)
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,248 @@
+"""Directory listings read with os.scandir on a thread pool."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from services import metrics
+
+
+class StatCache:
+    """
+    Recently seen directory entries and listings, shared between threads.
+    
+    Entries are (is_dir, size, mtime, inode) tuples keyed by path. Whole
+    listings are remembered together with the directory's mtime, so a
+    directory that did not change can be shown again without listing it.
+    """
+    
+    MAX_ENTRIES = 100000
+    MAX_LISTINGS = 64
+    
+    def __init__(self, max_entries=MAX_ENTRIES, max_listings=MAX_LISTINGS):
+        """
+        Initialize stat cache.
+        
+        Args:
+            max_entries (int): Entries kept before the oldest are dropped
+            max_listings (int): Directory listings kept
+        """
+        self.max_entries = max_entries
+        self.max_listings = max_listings
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._listings = OrderedDict()  # Directory -> (mtime, entries)
+    
+    def get(self, path):
+        """
+        Get the cached stat of a path.
+        
+        Args:
+            path (str): Path to look up
+        
+        Returns:
+            tuple: (is_dir, size, mtime, inode), or None if not cached
+        """
+        with self._lock:
+            return self._entries.get(os.path.normpath(path))
+    
+    def listing(self, directory, mtime):
+        """
+        Get a cached listing if the directory has not changed since.
+        
+        Args:
+            directory (str): Directory path
+            mtime (float): Current mtime of the directory
+        
+        Returns:
+            list: Entry dicts, or None
+        """
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is None or cached[0] != mtime:
+                return None
+            self._listings.move_to_end(directory)
+            return cached[1]
+    
+    def store(self, directory, mtime, entries, complete):
+        """
+        Remember entries of a directory.
+        
+        Args:
+            directory (str): Directory path
+            mtime (float): mtime of the directory when it was listed
+            entries (list): Entry dicts
+            complete (bool): Whether entries is the whole listing
+        """
+        with self._lock:
+            for entry in entries:
+                self._entries[entry['path']] = (
+                    entry['is_dir'], entry['size'], entry['mtime'], entry['inode']
+                )
+                self._entries.move_to_end(entry['path'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if complete:
+                self._listings[directory] = (mtime, entries)
+                self._listings.move_to_end(directory)
+                while len(self._listings) > self.max_listings:
+                    self._listings.popitem(last=False)
+    
+    def invalidate(self, paths):
+        """
+        Forget entries that changed and the listings of their directories.
+        
+        Args:
+            paths (iterable): Changed paths
+        """
+        with self._lock:
+            for path in paths:
+                path = os.path.normpath(path)
+                self._entries.pop(path, None)
+                self._listings.pop(os.path.dirname(path), None)
+
+
+class DirectoryLister(QObject):
+    """
+    Lists directories on a small thread pool without blocking the GUI.
+    
+    Entries are reported in chunks while the listing runs, so a slow
+    network share shows its first entries right away. Every listing has a
+    request id; cancel() stops it between entries, e.g. when the user
+    navigates elsewhere. Results are kept in a StatCache.
+    """
+    
+    entries_listed = pyqtSignal(int, str, list)  # Request id, directory, entry dicts
+    listing_finished = pyqtSignal(int, str, str)  # Request id, directory, error ('' if none)
+    
+    MAX_WORKERS = 4
+    
+    # Report entries at least this often, and whenever a chunk is full
+    CHUNK_SIZE = 256
+    CHUNK_INTERVAL = 0.1
+    
+    def __init__(self, stat_cache=None, parent=None):
+        """
+        Initialize directory lister.
+        
+        Args:
+            stat_cache (StatCache): Cache to fill (a new one if omitted)
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.stat_cache = stat_cache or StatCache()
+        self.ignore_matcher = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._cancelled = {}  # Request id -> threading.Event
+    
+    def set_ignore_matcher(self, ignore_matcher):
+        """
+        Set the ignore rules applied to listings.
+        
+        Args:
+            ignore_matcher (IgnoreMatcher): Ignore rules, or None
+        """
+        self.ignore_matcher = ignore_matcher
+    
+    def list_directory(self, directory):
+        """
+        Start listing a directory.
+        
+        Args:
+            directory (str): Directory path
+        
+        Returns:
+            int: Request id used in the signals and for cancel()
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS,
+                                            thread_name_prefix='lister')
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+            cancelled = threading.Event()
+            self._cancelled[request_id] = cancelled
+        self._pool.submit(self._list, request_id, os.path.normpath(directory), cancelled)
+        return request_id
+    
+    def cancel(self, request_id):
+        """
+        Stop a listing; no further signals are emitted for it.
+        
+        Args:
+            request_id (int): Id returned by list_directory()
+        """
+        with self._lock:
+            cancelled = self._cancelled.pop(request_id, None)
+        if cancelled is not None:
+            cancelled.set()
+    
+    def shutdown(self):
+        """Cancel all listings and stop the worker threads."""
+        with self._lock:
+            for cancelled in self._cancelled.values():
+                cancelled.set()
+            self._cancelled.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    @metrics.timed('lister.list_directory')
+    def _list(self, request_id, directory, cancelled):
+        """List one directory, reporting entries in chunks (runs on the pool)."""
+        error = ''
+        try:
+            if cancelled.is_set():
+                return
+            dir_mtime = os.stat(directory).st_mtime
+            cached = self.stat_cache.listing(directory, dir_mtime)
+            if cached is not None:
+                metrics.increment('lister.cache_hits')
+                self.entries_listed.emit(request_id, directory, cached)
+                return
+            
+            listing = []
+            chunk = []
+            last_report = time.monotonic()
+            matcher = self.ignore_matcher
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if cancelled.is_set():
+                        return
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if matcher and matcher.is_ignored_entry(directory, entry.name, is_dir):
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    chunk.append({
+                        'path': entry.path,
+                        'name': entry.name,
+                        'is_dir': is_dir,
+                        'size': 0 if is_dir else st.st_size,
+                        'mtime': st.st_mtime,
+                        'inode': st.st_ino,
+                    })
+                    now = time.monotonic()
+                    if len(chunk) >= self.CHUNK_SIZE or now - last_report >= self.CHUNK_INTERVAL:
+                        self.stat_cache.store(directory, dir_mtime, chunk, False)
+                        self.entries_listed.emit(request_id, directory, chunk)
+                        listing.extend(chunk)
+                        chunk = []
+                        last_report = now
+            if chunk and not cancelled.is_set():
+                self.entries_listed.emit(request_id, directory, chunk)
+            listing.extend(chunk)
+            self.stat_cache.store(directory, dir_mtime, listing, True)
+        except OSError as e:
+            print(f"Error listing {directory}: {e}")
+            error = str(e)
+        finally:
+            with self._lock:
+                still_wanted = self._cancelled.pop(request_id, None) is not None
+            if still_wanted:
+                self.listing_finished.emit(request_id, directory, error)
@@ -0,0 +1,240 @@
+"""Writing scanned documents: format conversion, encoding and atomic saves.
+
+Every scanned page is written through this module, once: the image is
+converted for its format, encoded straight into a temporary file next to
+the destination and renamed into place, so a document is either complete
+or not there at all. DocumentWriter does the same on a background thread.
+"""
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from PyQt5.QtCore import QObject, pyqtSignal
+from services import metrics, pdf_stream
+
+# Save format -> file extension
+FORMAT_EXTENSIONS = {
+    'PNG': 'png',
+    'JPEG': 'jpg',
+    'PDF': 'pdf',
+}
+
+JPEG_QUALITY = 95
+
+
+def document_extension(format_type):
+    """
+    Get the file extension of a save format.
+    
+    Args:
+        format_type (str): 'PNG', 'JPEG' or 'PDF'
+    
+    Returns:
+        str: Extension without the dot
+    """
+    return FORMAT_EXTENSIONS.get(format_type.upper(), format_type.lower())
+
+
+def new_document_path(directory, format_type, prefix="scan"):
+    """
+    Get a path for a new document that does not exist yet.
+    
+    Args:
+        directory (str): Directory to save in
+        format_type (str): Save format, for the extension
+        prefix (str): Start of the file name
+    
+    Returns:
+        str: e.g. directory/scan_20240101_120000.pdf, with a number added
+             if a document was already saved in the same second
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = document_extension(format_type)
+    path = os.path.join(directory, f"{prefix}_{timestamp}.{extension}")
+    counter = 2
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{prefix}_{timestamp}_{counter}.{extension}")
+        counter += 1
+    return path
+
+
+class AtomicFile:
+    """
+    A file written under a temporary name and renamed into place.
+    
+    Readers (and the file browser) never see a half-written document;
+    if writing fails the temporary file is removed and an existing file
+    at the destination is left as it was. The file gets the permissions
+    of a file created with open() (0666 less the umask), so documents in
+    shared folders stay readable by other users.
+    """
+    
+    # Open flags of the temporary file; O_EXCL so it is never someone else's
+    OPEN_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+    
+    
+    def __init__(self, path):
+        """
+        Create the temporary file next to the destination.
+        
+        Args:
+            path (str): Destination path
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = f".{os.path.basename(path)}."
+        for _ in range(100):
+            self.temp_path = os.path.join(directory, f"{prefix}{secrets.token_hex(4)}.tmp")
+            try:
+                # Unlike mkstemp() (0600), let the umask decide
+                fd = os.open(self.temp_path, self.OPEN_FLAGS, 0o666)
+            except FileExistsError:
+                continue
+            break
+        else:
+            raise FileExistsError(f"No unused temporary file name in {directory}")
+        self.file = os.fdopen(fd, 'wb')
+    
+    def commit(self):
+        """Flush the file to disk and move it to the destination."""
+        try:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            self.discard()
+            raise
+    
+    def discard(self):
+        """Close and remove the temporary file."""
+        self.file.close()
+        try:
+            os.unlink(self.temp_path)
+        except OSError:
+            pass
+    
+    def __enter__(self):
+        """Return the file to write to."""
+        return self.file
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit when the block succeeded, discard otherwise."""
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def convert_for_format(image, format_type):
+    """
+    Convert an image to a mode its save format can store.
+    
+    Args:
+        image (PIL.Image): Scanned image
+        format_type (str): 'PNG', 'JPEG' or 'PDF'
+    
+    Returns:
+        PIL.Image: The image itself, or a converted copy
+    """
+    format_type = format_type.upper()
+    if format_type == 'JPEG' and image.mode not in ('L', 'RGB'):
+        return image.convert('RGB')
+    if format_type == 'PNG' and image.mode not in ('1', 'L', 'LA', 'I', 'I;16', 'P', 'RGB', 'RGBA'):
+        return image.convert('RGB')
+    return image
+
+
+@metrics.timed('scanner.save')
+def write_document(image, path, format_type, dpi=None):
+    """
+    Convert, encode and atomically save a scanned page.
+    
+    Args:
+        image (PIL.Image): Scanned image
+        path (str): File to write
+        format_type (str): 'PNG', 'JPEG' or 'PDF'
+        dpi (int): Scan resolution, stored in the file (and used for the
+            PDF page size)
+    """
+    format_type = format_type.upper()
+    image = convert_for_format(image, format_type)
+    with AtomicFile(path) as output:
+        if format_type == 'PDF':
+            # Same encoding as pages of feeder scans
+            writer = pdf_stream.PdfStreamWriter(output)
+            writer.add_page(pdf_stream.encode_page(image, dpi or 72))
+            writer.finish()
+        elif format_type == 'JPEG':
+            options = {'dpi': (dpi, dpi)} if dpi else {}
+            image.save(output, 'JPEG', quality=JPEG_QUALITY, **options)
+        else:
+            options = {'dpi': (dpi, dpi)} if dpi else {}
+            image.save(output, format_type, **options)
+
+
+class DocumentWriter(QObject):
+    """
+    Saves scanned documents on a background thread.
+    
+    Documents are written one at a time in the order they were handed
+    over, so the GUI never waits for encoding or the disk.
+    """
+    
+    document_saved = pyqtSignal(int, str, str)  # Request id, path, error ('' if none)
+    
+    def __init__(self, parent=None):
+        """
+        Initialize document writer.
+        
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._next_id = 1
+    
+    def save(self, image, path, format_type, dpi=None):
+        """
+        Start saving a document.
+        
+        Args:
+            image (PIL.Image): Scanned image; it must not be changed meanwhile
+            path (str): File to write
+            format_type (str): 'PNG', 'JPEG' or 'PDF'
+            dpi (int): Scan resolution
+        
+        Returns:
+            int: Request id used in document_saved
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='writer')
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+        self._pool.submit(self._write, request_id, image, path, format_type, dpi)
+        return request_id
+    
+    def _write(self, request_id, image, path, format_type, dpi):
+        """Write one document (runs on the writer thread)."""
+        error = ''
+        try:
+            write_document(image, path, format_type, dpi)
+        except Exception as e:
+            print(f"Error saving {path}: {e}")
+            error = str(e)
+        self.document_saved.emit(request_id, path, error)
+    
+    def shutdown(self, wait=True):
+        """
+        Stop the writer thread.
+        
+        Args:
+            wait (bool): Finish documents handed over so far first
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=not wait)
+            self._pool = None
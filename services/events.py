@@ -0,0 +1,101 @@
+"""File change event types shared by the watcher and its consumers.
+
+Changes are passed around as (event_type, src_path, dest_path) tuples,
+where dest_path is None unless event_type is MOVED or DIR_MOVED. This
+module has no Qt dependency so non-GUI services can use it.
+"""
+
+CREATED = 'created'
+DELETED = 'deleted'
+MODIFIED = 'modified'
+MOVED = 'moved'
+
+# Directory events. The files inside a directory get their own events too
+# (watchdog reports them), except when a directory is moved out of the
+# watched tree: then DIR_DELETED is all there is.
+DIR_CREATED = 'dir_created'
+DIR_DELETED = 'dir_deleted'
+DIR_MOVED = 'dir_moved'
+DIR_EVENTS = frozenset((DIR_CREATED, DIR_DELETED, DIR_MOVED))
+
+
+def merge_change(pending, event_type, src_path, dest_path=None):
+    """
+    Merge one change into a dict of pending changes keyed by path.
+    
+    Repeated events for a path collapse into the single change that has
+    the same net effect, e.g. created-then-modified is a creation and
+    created-then-deleted cancels out. Moves are keyed by destination.
+    
+    Directory events are not collapsed, since each one stands for its whole
+    subtree; a repeated one moves to the end so the order stays right.
+    
+    Args:
+        pending (dict): Path -> (event_type, src_path, dest_path), updated in place
+        event_type (str): Event type
+        src_path (str): Source path
+        dest_path (str): Destination path for MOVED and DIR_MOVED events
+    """
+    if event_type in DIR_EVENTS:
+        key = (event_type, src_path, dest_path)
+        pending.pop(key, None)
+        pending[key] = key
+        return
+    
+    if event_type == MOVED:
+        previous = pending.pop(src_path, None)
+        if previous and previous[0] == CREATED:
+            # File appeared and moved within the batch - it is simply new
+            merge_change(pending, CREATED, dest_path, None)
+            return
+        origin = src_path
+        if previous and previous[0] == MOVED:
+            origin = previous[1]
+        if origin == dest_path:
+            # Moved back to where it started
+            pending[dest_path] = (MODIFIED, dest_path, None)
+        else:
+            pending[dest_path] = (MOVED, origin, dest_path)
+        return
+    
+    previous = pending.get(src_path)
+    
+    if event_type == CREATED:
+        if previous is None:
+            pending[src_path] = (CREATED, src_path, None)
+        elif previous[0] == DELETED:
+            pending[src_path] = (MODIFIED, src_path, None)
+    elif event_type == MODIFIED:
+        if previous is None or previous[0] == DELETED:
+            pending[src_path] = (MODIFIED, src_path, None)
+    elif event_type == DELETED:
+        if previous is None or previous[0] == MODIFIED:
+            pending[src_path] = (DELETED, src_path, None)
+        elif previous[0] == CREATED:
+            # Created and deleted within the batch - nothing happened
+            del pending[src_path]
+        elif previous[0] == MOVED:
+            # The moved file is gone, so only its original path changed
+            del pending[src_path]
+            origin = previous[1]
+            origin_previous = pending.get(origin)
+            if origin_previous is None:
+                pending[origin] = (DELETED, origin, None)
+            elif origin_previous[0] == CREATED:
+                pending[origin] = (MODIFIED, origin, None)
+
+
+def coalesce(changes):
+    """
+    Collapse a sequence of changes into their net effect.
+    
+    Args:
+        changes (iterable): (event_type, src_path, dest_path) tuples, oldest first
+    
+    Returns:
+        list: At most one change per path
+    """
+    pending = {}
+    for event_type, src_path, dest_path in changes:
+        merge_change(pending, event_type, src_path, dest_path)
+    return list(pending.values())
@@ -0,0 +1,210 @@
+"""Running file counter kept current from file watcher events."""
+import os
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from services.file_watcher import FileWatcher
+from services.ignore_rules import touches_ignore_file
+from services import metrics
+from services.tree_walker import count_files
+
+
+class FileCountThread(QThread):
+    """Thread that counts files under a set of folders without blocking UI."""
+    
+    count_ready = pyqtSignal(int, int)  # Generation, file count
+    
+    def __init__(self, folder_paths, generation, ignore_matcher=None, parent=None):
+        """
+        Initialize file count thread.
+        
+        Args:
+            folder_paths (list): Folder paths to count
+            generation (int): Counter generation the result belongs to
+            ignore_matcher (IgnoreMatcher): Ignore rules applied to the walk
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.folder_paths = list(folder_paths)
+        self.generation = generation
+        self.ignore_matcher = ignore_matcher
+    
+    def run(self):
+        """Walk the folders once and report the total."""
+        try:
+            with metrics.timer('file_counter.walk'):
+                count = count_files(self.folder_paths, self.ignore_matcher)
+        except Exception as e:
+            print(f"Error counting files: {e}")
+            return
+        if not self.isInterruptionRequested():
+            self.count_ready.emit(self.generation, count)
+
+
+class FileCounter(QObject):
+    """
+    Keeps a running count of the files under the tracked folders.
+    
+    The count is seeded by a single background walk and then adjusted from
+    created, deleted and moved events, so reading it is O(1). A periodic
+    background re-check corrects any drift (e.g. overwrites reported as
+    creations, or events lost while a walk was in progress).
+    """
+    
+    # Emitted whenever the count changes
+    count_changed = pyqtSignal(int)
+    
+    RECHECK_INTERVAL_MS = 5 * 60 * 1000
+    
+    def __init__(self, parent=None):
+        """
+        Initialize file counter.
+        
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.folder_paths = []
+        self.ignore_matcher = None
+        self._folder_prefixes = ()
+        self._count = 0
+        self._ready = False
+        self._generation = 0
+        self._walk_delta = 0  # Changes applied while a walk is running
+        self._count_thread = None
+        self._recheck_timer = QTimer(self)
+        self._recheck_timer.timeout.connect(self.recheck)
+    
+    @property
+    def count(self):
+        """int: Current file count (0 until the first walk completes)."""
+        return self._count
+    
+    @property
+    def is_ready(self):
+        """bool: True once the count has been seeded."""
+        return self._ready
+    
+    def set_folders(self, folder_paths, ignore_matcher=None):
+        """
+        Set the folders to count and start seeding the count.
+        
+        Args:
+            folder_paths (list): Folder paths to count
+            ignore_matcher (IgnoreMatcher): Ignore rules; ignored files are not counted
+        """
+        self.folder_paths = [os.path.normpath(str(p)) for p in folder_paths]
+        self.ignore_matcher = ignore_matcher
+        self._folder_prefixes = tuple(p + os.sep for p in self.folder_paths)
+        self._count = 0
+        self._ready = False
+        self._generation += 1
+        self._abandon_count_thread()
+        self.count_changed.emit(self._count)
+        
+        if self.folder_paths:
+            self.recheck()
+            self._recheck_timer.start(self.RECHECK_INTERVAL_MS)
+        else:
+            self._recheck_timer.stop()
+    
+    def recheck(self):
+        """Recount the folders in the background to correct drift."""
+        if not self.folder_paths:
+            return
+        if self._count_thread and self._count_thread.isRunning():
+            return
+        
+        self._walk_delta = 0
+        thread = FileCountThread(self.folder_paths, self._generation, self.ignore_matcher, self)
+        thread.count_ready.connect(self._on_count_ready)
+        thread.finished.connect(lambda: self._on_count_thread_finished(thread))
+        self._count_thread = thread
+        thread.start()
+    
+    def _on_count_thread_finished(self, thread):
+        """Release a finished count thread."""
+        if self._count_thread is thread:
+            self._count_thread = None
+        thread.deleteLater()
+    
+    def _abandon_count_thread(self):
+        """Let a running walk finish on its own; its result will be ignored."""
+        if self._count_thread and self._count_thread.isRunning():
+            self._count_thread.requestInterruption()
+        self._count_thread = None
+    
+    def _on_count_ready(self, generation, count):
+        """Replace the running count with a freshly walked one."""
+        if generation != self._generation:
+            # Result belongs to folders that are no longer tracked
+            return
+        self._ready = True
+        self._set_count(count + self._walk_delta)
+        self._walk_delta = 0
+    
+    def seed(self, count):
+        """
+        Provide a count from a faster source (e.g. the metadata index).
+        
+        Ignored once the count is ready; a running walk still replaces it.
+        
+        Args:
+            count (int): File count
+        """
+        if not self._ready:
+            self._ready = True
+            self._walk_delta = 0
+            self._count = max(0, count)
+            self.count_changed.emit(self._count)
+    
+    def _is_tracked(self, path):
+        """Check whether a path lies inside one of the counted folders."""
+        return bool(path) and os.path.normpath(path).startswith(self._folder_prefixes)
+    
+    def apply_changes(self, changes):
+        """
+        Adjust the count from a batch of file watcher changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        delta = 0
+        folder_removed = False
+        for event_type, src_path, dest_path in changes:
+            if event_type == FileWatcher.CREATED:
+                if self._is_tracked(src_path):
+                    delta += 1
+            elif event_type == FileWatcher.DELETED:
+                if self._is_tracked(src_path):
+                    delta -= 1
+            elif event_type == FileWatcher.MOVED:
+                delta -= self._is_tracked(src_path)
+                delta += self._is_tracked(dest_path)
+            elif event_type == FileWatcher.DIR_DELETED:
+                folder_removed = folder_removed or self._is_tracked(src_path)
+        
+        if delta:
+            if self._count_thread and self._count_thread.isRunning():
+                self._walk_delta += delta
+            if self._ready:
+                self._set_count(self._count + delta)
+        
+        if touches_ignore_file(changes) or folder_removed:
+            # Files may have become (un)ignored anywhere below, or a folder
+            # moved away took its files without an event each - count again
+            self.recheck()
+    
+    def _set_count(self, count):
+        """Update the count and notify listeners."""
+        count = max(0, count)
+        if count != self._count:
+            self._count = count
+            self.count_changed.emit(count)
+    
+    def stop(self):
+        """Stop the periodic re-check and any running walk."""
+        self._recheck_timer.stop()
+        self._generation += 1
+        if self._count_thread and self._count_thread.isRunning():
+            self._count_thread.requestInterruption()
+            self._count_thread.wait(1000)
+        self._count_thread = None
@@ -1,52 +1,159 @@
 """File watcher service using watchdog for real-time file monitoring."""
+import os
+import threading
+import time
 from pathlib import Path
-from PyQt5.QtCore import QObject, pyqtSignal
-from watchdog.observers import Observer
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
+from services import events, metrics
+from services.ignore_rules import IGNORE_FILE_NAME
+from services.snapshot_observer import SnapshotObserver, is_network_path
+
+
+class WatchedLocation:
+    """A tracked location watched by a FileWatcher."""
+    
+    __slots__ = ('path', 'ignore_matcher', 'journal', 'journal_position', 'backend', 'watch')
+    
+    def __init__(self, path, ignore_matcher=None, journal=None):
+        """
+        Initialize watched location.
+        
+        Args:
+            path (str): Root directory of the location
+            ignore_matcher (IgnoreMatcher): Rules for the location, or None
+            journal (ChangeJournal): Journal of the location, or None
+        """
+        self.path = path
+        self.ignore_matcher = ignore_matcher
+        self.journal = journal
+        self.journal_position = journal.position if journal else None
+        self.backend = None  # Backend of the observer watching it
+        self.watch = None  # Handle returned by the observer's schedule()
+    
+    def contains(self, path):
+        """Check whether a path is inside this location."""
+        return path == self.path or path.startswith(self.path.rstrip(os.sep) + os.sep)
 
 
 class FileWatcherEventHandler(FileSystemEventHandler):
-    """Event handler for file system events."""
+    """Event handler for file system events of one watched location."""
     
-    def __init__(self, watcher):
+    def __init__(self, watcher, location):
         """
         Initialize event handler.
         
         Args:
             watcher: FileWatcher instance to forward events to
+            location (WatchedLocation): Location the events belong to
         """
         super().__init__()
         self.watcher = watcher
+        self.location = location
+    
+    @staticmethod
+    def _is_ignored(location, path, is_dir=False):
+        """Check a path against a location's ignore rules."""
+        matcher = location.ignore_matcher
+        if matcher is None:
+            return False
+        if os.path.basename(path) == IGNORE_FILE_NAME:
+            # Rules changed - drop the cached ones for that directory
+            matcher.invalidate(os.path.dirname(path))
+        return matcher.is_ignored(path, is_dir)
     
     def on_created(self, event):
         """Handle file/directory created event."""
-        if not event.is_directory:
-            self.watcher.file_created.emit(event.src_path)
+        if not self._is_ignored(self.location, event.src_path, event.is_directory):
+            event_type = FileWatcher.DIR_CREATED if event.is_directory else FileWatcher.CREATED
+            self.watcher.handle_event(self.location, event_type, event.src_path)
     
     def on_deleted(self, event):
         """Handle file/directory deleted event."""
-        if not event.is_directory:
-            self.watcher.file_deleted.emit(event.src_path)
+        if not self._is_ignored(self.location, event.src_path, event.is_directory):
+            event_type = FileWatcher.DIR_DELETED if event.is_directory else FileWatcher.DELETED
+            self.watcher.handle_event(self.location, event_type, event.src_path)
     
     def on_modified(self, event):
-        """Handle file/directory modified event."""
-        if not event.is_directory:
-            self.watcher.file_modified.emit(event.src_path)
+        """Handle file modified event (a directory's own changes are its entries' events)."""
+        if not event.is_directory and not self._is_ignored(self.location, event.src_path):
+            self.watcher.handle_event(self.location, FileWatcher.MODIFIED, event.src_path)
     
     def on_moved(self, event):
         """Handle file/directory moved event."""
-        if not event.is_directory:
-            self.watcher.file_moved.emit(event.src_path, event.dest_path)
+        is_dir = event.is_directory
+        if is_dir:
+            created, deleted, moved = (
+                FileWatcher.DIR_CREATED, FileWatcher.DIR_DELETED, FileWatcher.DIR_MOVED
+            )
+        else:
+            created, deleted, moved = FileWatcher.CREATED, FileWatcher.DELETED, FileWatcher.MOVED
+        location = self.location
+        dest_location = self.watcher.location_of(event.dest_path)
+        src_ignored = self._is_ignored(location, event.src_path, is_dir)
+        dest_ignored = (dest_location is None
+                        or self._is_ignored(dest_location, event.dest_path, is_dir))
+        if src_ignored and dest_ignored:
+            return
+        if dest_location is not location:
+            # Moved to another location (or out of all of them); each
+            # location only ever sees changes to its own files
+            if not src_ignored:
+                self.watcher.handle_event(location, deleted, event.src_path)
+            if not dest_ignored:
+                self.watcher.handle_event(dest_location, created, event.dest_path)
+        elif src_ignored:
+            # e.g. an editor renaming its temporary file over the real one
+            self.watcher.handle_event(location, created, event.dest_path)
+        elif dest_ignored:
+            self.watcher.handle_event(location, deleted, event.src_path)
+        else:
+            self.watcher.handle_event(location, moved, event.src_path, event.dest_path)
 
 
 class FileWatcher(QObject):
-    """File watcher service that monitors file system changes."""
+    """
+    File watcher service that monitors file system changes.
+    
+    Any number of tracked locations can be watched at once. They share one
+    observer per backend (native notifications, or polling for network
+    shares), with a watch per location, and changes are reported together
+    with the location they belong to.
+    """
+    
+    # Event types used in batched change tuples
+    CREATED = events.CREATED
+    DELETED = events.DELETED
+    MODIFIED = events.MODIFIED
+    MOVED = events.MOVED
+    DIR_CREATED = events.DIR_CREATED
+    DIR_DELETED = events.DIR_DELETED
+    DIR_MOVED = events.DIR_MOVED
+    
+    # Observer backends
+    BACKEND_AUTO = 'auto'  # Polling on network shares, native elsewhere
+    BACKEND_NATIVE = 'native'
+    BACKEND_POLLING = 'polling'
+    BACKENDS = (BACKEND_AUTO, BACKEND_NATIVE, BACKEND_POLLING)
+    
+    DEFAULT_BATCH_WINDOW_MS = 250
+    DEFAULT_BATCH_MAX_LATENCY_MS = 1000
     
     # Signals emitted when file events occur
     file_created = pyqtSignal(str)  # File path
     file_deleted = pyqtSignal(str)  # File path
     file_modified = pyqtSignal(str)  # File path
     file_moved = pyqtSignal(str, str)  # Source path, destination path
+    directory_created = pyqtSignal(str)  # Directory path
+    directory_deleted = pyqtSignal(str)  # Directory path
+    directory_moved = pyqtSignal(str, str)  # Source path, destination path
+    # Emitted once per batching window and location with the location path
+    # and a list of (event_type, src_path, dest_path) tuples; dest_path is
+    # None unless moved
+    changes_batched = pyqtSignal(str, list)
+    
+    # Internal: wakes the GUI thread when the first event of a batch arrives
+    _batch_started = pyqtSignal()
     
     def __init__(self, parent=None):
         """
@@ -56,50 +163,340 @@ class FileWatcher(QObject):
             parent: Parent QObject
         """
         super().__init__(parent)
-        self.observer = None
-        self.tracked_path = None
+        self.locations = {}  # Location path -> WatchedLocation
+        self.observers = {}  # Backend -> running observer
         self.is_watching = False
+        self.backend = self.BACKEND_AUTO
+        
+        # Batching state (disabled by default)
+        self.batching_enabled = False
+        self.batch_window_ms = self.DEFAULT_BATCH_WINDOW_MS
+        self.batch_max_latency_ms = self.DEFAULT_BATCH_MAX_LATENCY_MS
+        self._pending = {}  # Location path -> {path: (event_type, src_path, dest_path)}
+        self._pending_lock = threading.Lock()
+        self._batch_open = False
+        self._batch_open_time = 0.0
+        self._last_event_time = 0.0
+        
+        self._window_timer = QTimer(self)
+        self._window_timer.setSingleShot(True)
+        self._window_timer.timeout.connect(self._on_window_timeout)
+        self._latency_timer = QTimer(self)
+        self._latency_timer.setSingleShot(True)
+        self._latency_timer.timeout.connect(self.flush_pending)
+        self._batch_started.connect(self._on_batch_started)
     
-    def start_watching(self, path):
+    def set_backend(self, backend):
         """
-        Start watching the specified path.
+        Choose how file changes are detected.
+        
+        Native observers rely on operating system notifications, which
+        SMB/NFS mounts do not deliver for changes made by other machines.
+        The polling backend works everywhere at the cost of some latency.
+        Takes effect for locations watched from now on, or for all of
+        them after restart_watching().
         
         Args:
-            path (str): Path to watch (should be the base tracked location)
+            backend (str): BACKEND_AUTO, BACKEND_NATIVE or BACKEND_POLLING
         """
-        if self.is_watching:
-            self.stop_watching()
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown file watcher backend: {backend}")
+        self.backend = backend
+    
+    @property
+    def tracked_paths(self):
+        """list: Paths of the watched locations."""
+        return list(self.locations)
+    
+    def location_of(self, path):
+        """
+        Find the watched location a path belongs to.
+        
+        Args:
+            path (str): File path
+        
+        Returns:
+            WatchedLocation: Location containing the path, or None
+        """
+        best = None
+        for location in list(self.locations.values()):
+            if location.contains(path) and (best is None or len(location.path) > len(best.path)):
+                best = location
+        return best
+    
+    def active_backend(self, path):
+        """
+        Get the backend watching a location.
+        
+        Args:
+            path (str): Location path
+        
+        Returns:
+            str: BACKEND_NATIVE or BACKEND_POLLING, or None if not watched
+        """
+        location = self.locations.get(os.path.normpath(str(path)))
+        return location.backend if location else None
+    
+    def journal_position(self, path):
+        """
+        Get the journal position of a location after its last emitted batch.
+        
+        Args:
+            path (str): Location path
+        
+        Returns:
+            str: Journal position, or None without a journal
+        """
+        location = self.locations.get(os.path.normpath(str(path)))
+        return location.journal_position if location else None
+    
+    def set_batching(self, enabled, window_ms=None, max_latency_ms=None):
+        """
+        Enable or disable batched event delivery.
+        
+        When enabled, events are coalesced per path and delivered through
+        changes_batched once the watcher has been quiet for window_ms, and
+        never later than max_latency_ms after the first event of a batch.
+        The per-event signals are not emitted while batching is enabled.
+        
+        Args:
+            enabled (bool): Whether to batch events
+            window_ms (int): Quiet period that closes a batch
+            max_latency_ms (int): Upper bound on the delay of any event
+        """
+        if window_ms is not None:
+            self.batch_window_ms = max(0, int(window_ms))
+        if max_latency_ms is not None:
+            self.batch_max_latency_ms = max(self.batch_window_ms, int(max_latency_ms))
+        if self.batching_enabled and not enabled:
+            self.flush_pending()
+        self.batching_enabled = enabled
+    
+    def handle_event(self, location, event_type, src_path, dest_path=None):
+        """
+        Deliver a file event, either immediately or into the current batch.
+        
+        Called from the watchdog observer thread.
+        
+        Args:
+            location (WatchedLocation): Location the event belongs to
+            event_type (str): One of CREATED, DELETED, MODIFIED, MOVED or
+                the DIR_ types
+            src_path (str): Path the event refers to
+            dest_path (str): Destination path for MOVED and DIR_MOVED events
+        """
+        metrics.increment('watcher.events')
+        if not self.batching_enabled:
+            if location.journal:
+                location.journal_position = location.journal.append(
+                    [(event_type, src_path, dest_path)]
+                )
+            if event_type == self.CREATED:
+                self.file_created.emit(src_path)
+            elif event_type == self.DELETED:
+                self.file_deleted.emit(src_path)
+            elif event_type == self.MODIFIED:
+                self.file_modified.emit(src_path)
+            elif event_type == self.MOVED:
+                self.file_moved.emit(src_path, dest_path)
+            elif event_type == self.DIR_CREATED:
+                self.directory_created.emit(src_path)
+            elif event_type == self.DIR_DELETED:
+                self.directory_deleted.emit(src_path)
+            elif event_type == self.DIR_MOVED:
+                self.directory_moved.emit(src_path, dest_path)
+            return
+        
+        with self._pending_lock:
+            self._merge_change(location, event_type, src_path, dest_path)
+            self._last_event_time = time.monotonic()
+            start_batch = not self._batch_open
+            if start_batch:
+                self._batch_open_time = self._last_event_time
+            self._batch_open = True
+        
+        if start_batch:
+            self._batch_started.emit()
+    
+    def _merge_change(self, location, event_type, src_path, dest_path):
+        """
+        Merge an event into the location's pending batch (caller holds the lock).
+        
+        Args:
+            location (WatchedLocation): Location the event belongs to
+            event_type (str): Event type
+            src_path (str): Source path
+            dest_path (str): Destination path for MOVED events
+        """
+        pending = self._pending.setdefault(location.path, {})
+        events.merge_change(pending, event_type, src_path, dest_path)
+    
+    def _on_batch_started(self):
+        """Start the batching timers when the first event of a batch arrives."""
+        if not self._window_timer.isActive():
+            self._window_timer.start(self.batch_window_ms)
+        if not self._latency_timer.isActive():
+            self._latency_timer.start(self.batch_max_latency_ms)
+    
+    def _on_window_timeout(self):
+        """Flush the batch if no event arrived during the last window."""
+        with self._pending_lock:
+            idle_ms = (time.monotonic() - self._last_event_time) * 1000
+        remaining_ms = self.batch_window_ms - idle_ms
+        if remaining_ms > 1:
+            self._window_timer.start(int(remaining_ms))
+        else:
+            self.flush_pending()
+    
+    def flush_pending(self):
+        """Emit the pending batches immediately, if there are any."""
+        self._window_timer.stop()
+        self._latency_timer.stop()
+        
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = {}
+            if self._batch_open:
+                # Delay of the oldest event in the batch
+                metrics.observe('watcher.batch_latency',
+                                (time.monotonic() - self._batch_open_time) * 1000)
+            self._batch_open = False
+        
+        for path, batch in pending.items():
+            location = self.locations.get(path)
+            if location is None or not batch:
+                continue
+            changes = list(batch.values())
+            metrics.observe('watcher.batch_size', len(changes), metrics.COUNT_BUCKETS)
+            if location.journal:
+                with metrics.timer('watcher.journal_append'):
+                    location.journal_position = location.journal.append(changes)
+            # Includes the time the connected slots take to apply the batch
+            with metrics.timer('watcher.dispatch'):
+                self.changes_batched.emit(path, changes)
+    
+    def watch_location(self, path, ignore_matcher=None, journal=None):
+        """
+        Start watching a tracked location.
+        
+        Args:
+            path (str): Root directory of the location
+            ignore_matcher (IgnoreMatcher): Events for ignored paths are dropped
+            journal (ChangeJournal): Every delivered change is recorded in it
+        
+        Returns:
+            bool: True if the location is being watched
+        """
+        path = os.path.normpath(str(path))
+        if path in self.locations:
+            self.unwatch_location(path)
+        if not Path(path).exists():
+            return False
         
-        tracked_path = Path(path)
-        if not tracked_path.exists():
+        location = WatchedLocation(path, ignore_matcher, journal)
+        self.locations[path] = location
+        if not self._schedule(location):
+            del self.locations[path]
             return False
+        self.is_watching = True
+        return True
+    
+    def unwatch_location(self, path):
+        """
+        Stop watching a tracked location.
+        
+        Args:
+            path (str): Root directory of the location
+        """
+        path = os.path.normpath(str(path))
+        location = self.locations.pop(path, None)
+        if location is None:
+            return
+        self._unschedule(location)
+        self.is_watching = bool(self.locations)
+        
+        # Nobody listens for the location any more, but keep its last
+        # changes in the journal so they are replayed on next start
+        with self._pending_lock:
+            batch = self._pending.pop(path, None)
+        if batch and location.journal:
+            location.journal_position = location.journal.append(list(batch.values()))
+    
+    def restart_watching(self):
+        """Watch all locations again, e.g. with a different backend."""
+        for location in list(self.locations.values()):
+            self._unschedule(location)
+            self._schedule(location)
+    
+    def _schedule(self, location):
+        """Add a watch for a location to the observer of its backend."""
+        backend = self.backend
+        if backend == self.BACKEND_AUTO:
+            backend = self.BACKEND_POLLING if is_network_path(location.path) else self.BACKEND_NATIVE
         
         try:
-            self.observer = Observer()
-            event_handler = FileWatcherEventHandler(self)
-            self.observer.schedule(event_handler, str(tracked_path), recursive=True)
-            self.observer.start()
-            self.tracked_path = str(tracked_path)
-            self.is_watching = True
+            observer = self.observers.get(backend)
+            if observer is None:
+                if backend == self.BACKEND_POLLING:
+                    observer = SnapshotObserver()
+                else:
+                    # Loads the platform's notification backend; not needed before
+                    # the first location is watched
+                    from watchdog.observers import Observer
+                    observer = Observer()
+                observer.start()
+                self.observers[backend] = observer
+            event_handler = FileWatcherEventHandler(self, location)
+            if backend == self.BACKEND_POLLING:
+                location.watch = observer.schedule(event_handler, location.path, recursive=True,
+                                                   ignore_matcher=location.ignore_matcher)
+            else:
+                location.watch = observer.schedule(event_handler, location.path, recursive=True)
+            location.backend = backend
             return True
         except Exception as e:
-            print(f"Error starting file watcher: {e}")
+            print(f"Error starting file watcher for {location.path}: {e}")
             return False
     
+    def _unschedule(self, location):
+        """Remove a location's watch; observers without watches are stopped."""
+        observer = self.observers.get(location.backend)
+        if observer is None or location.watch is None:
+            return
+        try:
+            observer.unschedule(location.watch)
+        except Exception as e:
+            print(f"Error stopping file watcher for {location.path}: {e}")
+        location.watch = None
+        backend, location.backend = location.backend, None
+        if not any(other.backend == backend for other in self.locations.values()):
+            self._stop_observer(backend)
+    
+    def _stop_observer(self, backend):
+        """Stop and drop the observer of a backend."""
+        observer = self.observers.pop(backend, None)
+        if observer is None:
+            return
+        try:
+            observer.stop()
+            observer.join(timeout=1.0)
+        except Exception as e:
+            print(f"Error stopping file watcher: {e}")
+    
     def stop_watching(self):
-        """Stop watching file changes."""
-        if self.observer and self.is_watching:
-            try:
-                self.observer.stop()
-                self.observer.join(timeout=1.0)
-            except Exception as e:
-                print(f"Error stopping file watcher: {e}")
-            finally:
-                self.observer = None
-                self.is_watching = False
-                self.tracked_path = None
+        """Stop watching all locations."""
+        for path in list(self.locations):
+            self.unwatch_location(path)
+        for backend in list(self.observers):
+            self._stop_observer(backend)
+        self.is_watching = False
+        self._window_timer.stop()
+        self._latency_timer.stop()
     
     def __del__(self):
         """Cleanup on deletion."""
-        self.stop_watching()
-
+        try:
+            self.stop_watching()
+        except RuntimeError:
+            # Underlying Qt objects already deleted
+            pass
@@ -0,0 +1,339 @@
+"""Gitignore-style ignore rules (.dmsignore) for the tracked location."""
+import os
+import re
+import sys
+import threading
+
+
+IGNORE_FILE_NAME = ".dmsignore"
+
+# Always ignored: editor temporaries, office lock files, VCS and thumbnail caches.
+# A .dmsignore can re-include any of these with a "!pattern" line.
+DEFAULT_PATTERNS = (
+    ".git/",
+    ".svn/",
+    ".hg/",
+    "~$*",
+    ".~lock.*#",
+    "*~",
+    "*.swp",
+    "*.swx",
+    "*.tmp",
+    "*.part",
+    "*.crdownload",
+    ".DS_Store",
+    "._*",
+    "Thumbs.db",
+    "ehthumbs.db",
+    "desktop.ini",
+    ".thumbnails/",
+    ".Trash-*/",
+    "__pycache__/",
+)
+
+
+def touches_ignore_file(changes):
+    """
+    Check whether a batch of changes includes an ignore file.
+    
+    Args:
+        changes (list): (event_type, src_path, dest_path) tuples
+    
+    Returns:
+        bool: True if any .dmsignore was created, changed, moved or removed
+    """
+    for event_type, src_path, dest_path in changes:
+        if os.path.basename(src_path) == IGNORE_FILE_NAME:
+            return True
+        if dest_path and os.path.basename(dest_path) == IGNORE_FILE_NAME:
+            return True
+    return False
+
+
+def _translate(pattern):
+    """
+    Translate the body of a gitignore pattern into a regular expression.
+    
+    Args:
+        pattern (str): Pattern without leading '!' or trailing '/'
+    
+    Returns:
+        str: Regular expression source matching a '/'-separated relative path
+    """
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                if at_start and pattern.startswith('**/', i):
+                    parts.append('(?:.*/)?')  # Zero or more directories
+                    i += 3
+                    continue
+                if at_start and i + 2 == n:
+                    parts.append('.*')  # Everything inside
+                    i += 2
+                    continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith('[!', i) or pattern.startswith('[^', i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def compile_pattern(line):
+    """
+    Compile one line of an ignore file.
+    
+    Args:
+        line (str): Line from a .dmsignore file
+    
+    Returns:
+        tuple: (regex source, negate, dir_only), or None for blank lines and comments
+    """
+    line = line.rstrip('\n\r')
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(' ')
+    if stripped.endswith('\\') and len(stripped) < len(line):
+        stripped += ' '
+    line = stripped
+    if not line or line.startswith('#'):
+        return None
+    
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+    
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    
+    # A slash anywhere but the end anchors the pattern to the ignore file's directory
+    anchored = '/' in line
+    source = _translate(line.lstrip('/'))
+    if not anchored:
+        source = '(?:.*/)?' + source
+    return source, negate, dir_only
+
+
+class IgnoreRules:
+    """
+    Compiled rules of one ignore file, matched against paths relative to
+    the directory that contains it. Later rules override earlier ones.
+    """
+    
+    _FLAGS = re.IGNORECASE if sys.platform == 'win32' else 0
+    
+    def __init__(self, lines):
+        """
+        Compile ignore rules.
+        
+        Args:
+            lines (iterable): Pattern lines
+        """
+        self.rules = []  # (compiled regex, negate, dir_only)
+        for line in lines:
+            compiled = compile_pattern(line)
+            if compiled:
+                source, negate, dir_only = compiled
+                self.rules.append((re.compile(source + r'\Z', self._FLAGS), negate, dir_only))
+        
+        # One combined regex answers the common "no rule matches" case
+        self._any = None
+        if self.rules:
+            self._any = re.compile(
+                '|'.join(f'(?:{r.pattern})' for r, _, _ in self.rules), self._FLAGS
+            )
+        self._has_special = any(negate or dir_only for _, negate, dir_only in self.rules)
+    
+    @classmethod
+    def from_file(cls, file_path):
+        """
+        Load rules from an ignore file.
+        
+        Args:
+            file_path (str): Path to the ignore file
+        
+        Returns:
+            IgnoreRules: Compiled rules, or None if the file cannot be read
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+    
+    def match(self, relative_path, is_dir):
+        """
+        Match a path against the rules.
+        
+        Args:
+            relative_path (str): '/'-separated path relative to the rules' directory
+            is_dir (bool): Whether the path is a directory
+        
+        Returns:
+            bool: True if ignored, False if re-included, None if no rule matches
+        """
+        if self._any is None or not self._any.match(relative_path):
+            return None
+        if not self._has_special:
+            return True
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                return not negate
+        return None
+
+
+class IgnoreMatcher:
+    """
+    Decides which paths under a tracked location are ignored.
+    
+    Combines the default patterns with the .dmsignore file of the location
+    and of every directory below it; rules in deeper directories win, as in
+    git. Anything inside an ignored directory is ignored too, so walkers
+    can prune ignored directories without listing them. Rule files are
+    loaded lazily and cached; the matcher is safe to share between threads.
+    """
+    
+    def __init__(self, root_path, default_patterns=DEFAULT_PATTERNS):
+        """
+        Initialize ignore matcher.
+        
+        Args:
+            root_path (str): Tracked location
+            default_patterns (iterable): Patterns applied before any .dmsignore
+        """
+        self.root_path = os.path.normpath(str(root_path))
+        self._root_prefix = self.root_path.rstrip(os.sep) + os.sep
+        self._defaults = IgnoreRules(default_patterns)
+        self._lock = threading.Lock()
+        self._rules = {}  # Directory -> IgnoreRules or None
+        self._chains = {}  # Directory -> tuple of (directory, IgnoreRules) to apply
+        self._ignored_dirs = {}  # Directory -> bool
+    
+    def invalidate(self, directory=None):
+        """
+        Forget cached rules after an ignore file changed.
+        
+        Args:
+            directory (str): Directory whose .dmsignore changed (None for all)
+        """
+        with self._lock:
+            if directory is None:
+                self._rules.clear()
+            else:
+                self._rules.pop(os.path.normpath(directory), None)
+            self._chains.clear()
+            self._ignored_dirs.clear()
+    
+    def _relative_parts(self, path):
+        """Split a path into its components below the root, or None if outside."""
+        if path == self.root_path:
+            return []
+        if not path.startswith(self._root_prefix):
+            return None
+        return path[len(self._root_prefix):].split(os.sep)
+    
+    def _rules_for(self, directory):
+        """Get the .dmsignore rules of one directory (caller holds the lock)."""
+        if directory not in self._rules:
+            file_path = os.path.join(directory, IGNORE_FILE_NAME)
+            self._rules[directory] = (
+                IgnoreRules.from_file(file_path) if os.path.isfile(file_path) else None
+            )
+        return self._rules[directory]
+    
+    def _chain_for(self, directory):
+        """Get the rules that apply to entries of a directory (caller holds the lock)."""
+        chain = self._chains.get(directory)
+        if chain is None:
+            if directory == self.root_path:
+                chain = ((self.root_path, self._defaults),)
+            else:
+                chain = self._chain_for(os.path.dirname(directory))
+            rules = self._rules_for(directory)
+            if rules is not None and rules.rules:
+                chain = chain + ((directory, rules),)
+            self._chains[directory] = chain
+        return chain
+    
+    def _match_entry(self, directory, name, is_dir):
+        """Match one entry of a non-ignored directory (caller holds the lock)."""
+        path = os.path.join(directory, name)
+        for base, rules in reversed(self._chain_for(directory)):
+            relative = path[len(base) + 1:] if path.startswith(base + os.sep) else name
+            if os.sep != '/':
+                relative = relative.replace(os.sep, '/')
+            result = rules.match(relative, is_dir)
+            if result is not None:
+                return result
+        return False
+    
+    def is_ignored_entry(self, directory, name, is_dir):
+        """
+        Check one entry of a directory that is itself not ignored.
+        
+        This is what tree walks use: they never descend into ignored
+        directories, so only the entry itself needs to be matched.
+        
+        Args:
+            directory (str): Directory being listed
+            name (str): Entry name
+            is_dir (bool): Whether the entry is a directory
+        
+        Returns:
+            bool: True if the entry should be skipped
+        """
+        with self._lock:
+            return self._match_entry(os.path.normpath(directory), name, is_dir)
+    
+    def is_ignored(self, path, is_dir=False):
+        """
+        Check an arbitrary path, including whether a parent directory is ignored.
+        
+        Args:
+            path (str): Path to check
+            is_dir (bool): Whether the path is a directory
+        
+        Returns:
+            bool: True if the path is ignored (paths outside the root never are)
+        """
+        path = os.path.normpath(str(path))
+        parts = self._relative_parts(path)
+        if not parts:
+            return False
+        
+        with self._lock:
+            # Parent directories first; their answers are cached
+            directory = self.root_path
+            for part in parts[:-1]:
+                child = os.path.join(directory, part)
+                ignored = self._ignored_dirs.get(child)
+                if ignored is None:
+                    ignored = self._match_entry(directory, part, True)
+                    self._ignored_dirs[child] = ignored
+                if ignored:
+                    return True
+                directory = child
+            return self._match_entry(directory, parts[-1], is_dir)
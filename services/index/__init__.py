@@ -0,0 +1,5 @@
+# Index package
+from services.index.metadata_index import MetadataIndex
+from services.index.content_index import ContentIndex
+from services.index.trigram_index import TrigramIndex
+from services.index.hash_index import HashIndex
@@ -0,0 +1,675 @@
+"""Full-text inverted index over document contents."""
+import heapq
+import math
+import os
+import re
+from services import events
+from services.index.sqlite_store import SqliteStore, prefix_range
+from services.tree_walker import walk_files
+
+
+TEXT_EXTENSIONS = ('.txt', '.md', '.csv')
+PDF_EXTENSIONS = ('.pdf',)
+INDEXED_EXTENSIONS = TEXT_EXTENSIONS + PDF_EXTENSIONS
+
+# Only the first part of very large files is indexed
+MAX_TEXT_BYTES = 8 * 1024 * 1024
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_MIN_TOKEN_LENGTH = 2
+_MAX_TOKEN_LENGTH = 40
+
+_pdf_warned = False
+
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms.
+    
+    Args:
+        text (str): Text to tokenize
+    
+    Returns:
+        list: Terms in order of appearance
+    """
+    return [
+        token for token in _TOKEN_RE.findall(text.lower())
+        if _MIN_TOKEN_LENGTH <= len(token) <= _MAX_TOKEN_LENGTH
+    ]
+
+
+def is_indexable(path):
+    """
+    Check whether a file type is supported by the content index.
+    
+    Args:
+        path (str): File path
+    
+    Returns:
+        bool: True if the extension is indexed
+    """
+    return path.lower().endswith(INDEXED_EXTENSIONS)
+
+
+def extract_text(path):
+    """
+    Extract plain text from a supported document.
+    
+    PDFs are read with pypdf when it is installed; only PDFs with a text
+    layer produce any text (scans without OCR are skipped).
+    
+    Args:
+        path (str): File path
+    
+    Returns:
+        str: Extracted text, or None if the file is unsupported or unreadable
+    """
+    lower = path.lower()
+    try:
+        if lower.endswith(TEXT_EXTENSIONS):
+            with open(path, 'rb') as f:
+                return f.read(MAX_TEXT_BYTES).decode('utf-8', errors='ignore')
+        if lower.endswith(PDF_EXTENSIONS):
+            return _extract_pdf_text(path)
+    except (OSError, ValueError) as e:
+        print(f"Could not extract text from {path}: {e}")
+    return None
+
+
+def _extract_pdf_text(path):
+    """Extract the text layer of a PDF using pypdf, if available."""
+    global _pdf_warned
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        if not _pdf_warned:
+            print("pypdf not installed. PDF contents will not be searchable.")
+            _pdf_warned = True
+        return None
+    
+    try:
+        reader = PdfReader(path)
+        parts = []
+        size = 0
+        for page in reader.pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            size += len(text)
+            if size >= MAX_TEXT_BYTES:
+                break
+        return '\n'.join(parts)
+    except Exception as e:
+        print(f"Could not read PDF {path}: {e}")
+        return None
+
+
+def _write_varint(out, value):
+    """Append an unsigned LEB128 varint to a bytearray."""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_postings(postings):
+    """
+    Compress a postings list.
+    
+    Doc ids are delta-encoded and, like the term frequencies, stored as
+    varints, so a typical posting takes two or three bytes.
+    
+    Args:
+        postings (list): (doc_id, term_frequency) pairs sorted by doc_id
+    
+    Returns:
+        bytes: Encoded postings
+    """
+    out = bytearray()
+    previous = 0
+    for doc_id, tf in postings:
+        _write_varint(out, doc_id - previous)
+        _write_varint(out, tf)
+        previous = doc_id
+    return bytes(out)
+
+
+def decode_postings(blob):
+    """
+    Decompress a postings list produced by encode_postings().
+    
+    Args:
+        blob (bytes): Encoded postings
+    
+    Returns:
+        list: (doc_id, term_frequency) pairs sorted by doc_id
+    """
+    postings = []
+    doc_id = 0
+    value = 0
+    shift = 0
+    pending_doc = None
+    for byte in blob:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if pending_doc is None:
+            doc_id += value
+            pending_doc = doc_id
+        else:
+            postings.append((pending_doc, value))
+            pending_doc = None
+        value = 0
+        shift = 0
+    return postings
+
+
+def encode_ids(ids):
+    """
+    Compress a sorted list of integer ids as delta varints.
+    
+    Args:
+        ids (list): Ids in ascending order
+    
+    Returns:
+        bytes: Encoded ids
+    """
+    out = bytearray()
+    previous = 0
+    for value in ids:
+        _write_varint(out, value - previous)
+        previous = value
+    return bytes(out)
+
+
+def decode_ids(blob):
+    """
+    Decompress ids produced by encode_ids().
+    
+    Args:
+        blob (bytes): Encoded ids
+    
+    Returns:
+        list: Ids in ascending order
+    """
+    ids = []
+    current = 0
+    value = 0
+    shift = 0
+    for byte in blob:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += value
+        ids.append(current)
+        value = 0
+        shift = 0
+    return ids
+
+
+class ContentIndex(SqliteStore):
+    """
+    On-disk inverted index of document text with BM25 ranking.
+    
+    The postings of a term are stored as compressed blocks. Each batch of
+    updates appends one block per term it adds documents to instead of
+    rewriting the term's whole postings; the newest blocks of a term are
+    merged once they are as large as the block before them, which keeps a
+    term at a few blocks of doubling size. Removed documents
+    stay in the blocks until a merge drops them, and are skipped by
+    queries meanwhile. Every document stores the ids of its terms so their
+    document frequencies can be updated when it changes or is deleted.
+    
+    The document count and total length used for ranking are kept in meta
+    rows, shared by every location in the database like the terms are.
+    """
+    
+    DB_FILE_NAME = "content.db"
+    SCHEMA_VERSION = 2
+    
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+    
+    # How many vocabulary terms a trailing partial word may expand to
+    MAX_PREFIX_EXPANSION = 30
+    
+    # Doc ids checked per query when dropping removed documents from a block
+    _LIVE_CHECK_CHUNK = 500
+    
+    def __init__(self, root_path, db_path=None, ignore_matcher=None):
+        """
+        Initialize content index.
+        
+        Args:
+            root_path (str): Tracked location whose documents are indexed
+            db_path (str): Database file (defaults to ~/.dms_client/content.db)
+            ignore_matcher (IgnoreMatcher): Ignored documents are not indexed
+        """
+        self.root_path = os.path.normpath(str(root_path))
+        self.ignore_matcher = ignore_matcher
+        self._docs = None  # Doc id -> (path, length) below root_path, loaded on first search
+        self._docs_version = None  # docs_version meta value _docs is current with
+        super().__init__(db_path)
+    
+    def _create_schema(self):
+        """Create tables if they don't exist."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if 0 < version < 2:
+            # Version 1 rewrote whole postings lists; documents are indexed again
+            self._conn.execute("DROP TABLE IF EXISTS docs")
+            self._conn.execute("DROP TABLE IF EXISTS terms")
+            self._conn.execute("DELETE FROM meta WHERE key LIKE 'journal_position:%'")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                length INTEGER NOT NULL,
+                term_ids BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE NOT NULL,
+                df INTEGER NOT NULL,
+                dead INTEGER NOT NULL
+            )
+        """)
+        # Postings blocks of a term, oldest first; count includes removed documents
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                id INTEGER PRIMARY KEY,
+                term_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS postings_term ON postings (term_id, id)"
+        )
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+    
+    def stale_paths(self):
+        """
+        Compare the index with the disk.
+        
+        Returns:
+            tuple: (paths to (re)index, indexed paths that no longer exist)
+        """
+        low, high = prefix_range(self.root_path)
+        with self._lock:
+            indexed = {
+                r[0]: (r[1], r[2]) for r in self._conn.execute(
+                    "SELECT path, size, mtime FROM docs WHERE path >= ? AND path < ?",
+                    (low, high)
+                )
+            }
+        
+        to_index = []
+        for entry in walk_files(self.root_path, self.ignore_matcher):
+            if not is_indexable(entry.name):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if indexed.pop(entry.path, None) != (st.st_size, st.st_mtime):
+                to_index.append(entry.path)
+        return to_index, list(indexed)
+    
+    def update_documents(self, paths=(), removed=(), should_stop=None):
+        """
+        Index or re-index documents and drop removed ones, in one batch.
+        
+        Args:
+            paths (iterable): Documents to (re)index
+            removed (iterable): Documents to remove from the index
+            should_stop (callable): Optional callable returning True to stop
+                extracting; checked before each document, and the documents
+                extracted so far are still indexed
+        """
+        removed = set(removed)
+        
+        # Extract text outside the lock - this is the slow part
+        extracted = []
+        for path in paths:
+            if should_stop and should_stop():
+                break
+            if not is_indexable(path):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                removed.add(path)
+                continue
+            text = extract_text(path)
+            extracted.append((path, st, tokenize(text) if text else []))
+        
+        stale = removed | {path for path, _, _ in extracted}
+        if not stale:
+            return
+        
+        low, high = prefix_range(self.root_path)
+        with self._transaction():
+            version = int(self.get_meta('docs_version', 0))
+            if self._docs_version != version:
+                # Another store changed the documents since the cache was loaded
+                self._docs = None
+            doc_count = int(self.get_meta('doc_count', 0))
+            total_length = int(self.get_meta('total_length', 0))
+            
+            removals, removed_count, removed_length = self._remove_documents(stale)
+            doc_count -= removed_count
+            total_length -= removed_length
+            additions = {}  # Term -> [(doc_id, tf)]
+            doc_terms = []  # (doc_id, terms) pairs
+            for path, st, tokens in extracted:
+                frequencies = {}
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + 1
+                cursor = self._conn.execute(
+                    "INSERT INTO docs (path, size, mtime, length, term_ids) VALUES (?, ?, ?, ?, ?)",
+                    (path, st.st_size, st.st_mtime, len(tokens), b'')
+                )
+                doc_id = cursor.lastrowid
+                for term, tf in frequencies.items():
+                    additions.setdefault(term, []).append((doc_id, tf))
+                doc_terms.append((doc_id, list(frequencies)))
+                doc_count += 1
+                total_length += len(tokens)
+                if self._docs is not None and low <= path < high:
+                    self._docs[doc_id] = (path, len(tokens))
+            
+            # Term ids are only known once the postings have been merged
+            term_ids = self._merge_postings(additions, removals)
+            for doc_id, terms in doc_terms:
+                blob = encode_ids(sorted(term_ids[t] for t in terms))
+                self._conn.execute("UPDATE docs SET term_ids = ? WHERE id = ?", (blob, doc_id))
+            
+            self.set_meta('doc_count', doc_count)
+            self.set_meta('total_length', total_length)
+            self.set_meta('docs_version', version + 1)
+            if self._docs is not None:
+                self._docs_version = version + 1
+    
+    def _remove_documents(self, paths):
+        """
+        Delete documents and collect the terms they must be removed from.
+        
+        Caller holds a transaction.
+        
+        Args:
+            paths (set): Document paths
+        
+        Returns:
+            tuple: (term id -> set of removed doc ids, number of documents
+                removed, their total length)
+        """
+        removals = {}
+        count = 0
+        total_length = 0
+        for path in paths:
+            row = self._conn.execute(
+                "SELECT id, length, term_ids FROM docs WHERE path = ?", (path,)
+            ).fetchone()
+            if not row:
+                continue
+            doc_id, length, blob = row
+            for term_id in decode_ids(blob):
+                removals.setdefault(term_id, set()).add(doc_id)
+            self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+            count += 1
+            total_length += length
+            if self._docs is not None:
+                self._docs.pop(doc_id, None)
+        return removals, count, total_length
+    
+    def _merge_postings(self, additions, removals):
+        """
+        Add a batch to the postings of the terms it touches.
+        
+        The new postings of each term go into a new block. Removed documents
+        only lower the document frequency; they are dropped from the blocks
+        once the term's blocks are merged.
+        
+        Caller holds a transaction.
+        
+        Args:
+            additions (dict): Term -> [(doc_id, tf)] to add
+            removals (dict): Term id -> set of doc ids to remove
+        
+        Returns:
+            dict: Term -> term id for every added term
+        """
+        term_ids = {}
+        counts = {}  # Term id -> [df, dead] after the batch
+        for term, new_postings in additions.items():
+            row = self._conn.execute(
+                "SELECT id, df, dead FROM terms WHERE term = ?", (term,)
+            ).fetchone()
+            if row:
+                term_id, df, dead = row
+            else:
+                term_id = self._conn.execute(
+                    "INSERT INTO terms (term, df, dead) VALUES (?, 0, 0)", (term,)
+                ).lastrowid
+                df, dead = 0, 0
+            counts[term_id] = [df + len(new_postings), dead]
+            term_ids[term] = term_id
+            # New documents always get higher ids, so blocks are in doc id order
+            self._conn.execute(
+                "INSERT INTO postings (term_id, count, data) VALUES (?, ?, ?)",
+                (term_id, len(new_postings), encode_postings(sorted(new_postings)))
+            )
+        
+        for term_id, gone in removals.items():
+            if term_id not in counts:
+                row = self._conn.execute(
+                    "SELECT df, dead FROM terms WHERE id = ?", (term_id,)
+                ).fetchone()
+                if not row:
+                    continue
+                counts[term_id] = list(row)
+            counts[term_id][0] -= len(gone)
+            counts[term_id][1] += len(gone)
+        
+        for term_id, (df, dead) in counts.items():
+            self._update_term(term_id, df, dead)
+        return term_ids
+    
+    def _update_term(self, term_id, df, dead):
+        """
+        Store a term's new counts and merge its postings blocks if due.
+        
+        Like a binary counter, the newest blocks are merged while the block
+        before them is no larger than they are together, so each posting
+        is rewritten only a logarithmic number of times. All blocks are
+        merged once removed documents make up most of them, and the term is
+        deleted once it has no documents left.
+        
+        Caller holds a transaction.
+        
+        Args:
+            term_id (int): Term id
+            df (int): Number of documents containing the term
+            dead (int): Removed documents still in its blocks
+        """
+        if df <= 0:
+            self._conn.execute("DELETE FROM postings WHERE term_id = ?", (term_id,))
+            self._conn.execute("DELETE FROM terms WHERE id = ?", (term_id,))
+            return
+        
+        blocks = self._conn.execute(
+            "SELECT id, count FROM postings WHERE term_id = ? ORDER BY id", (term_id,)
+        ).fetchall()
+        if dead > df:
+            merge = len(blocks)
+        else:
+            merge = 1
+            size = blocks[-1][1]
+            while merge < len(blocks) and blocks[-merge - 1][1] <= size:
+                merge += 1
+                size += blocks[-merge][1]
+        
+        if merge >= 2:
+            merged_ids = [block_id for block_id, _ in blocks[-merge:]]
+            postings = []
+            for block_id in merged_ids:
+                data = self._conn.execute(
+                    "SELECT data FROM postings WHERE id = ?", (block_id,)
+                ).fetchone()[0]
+                postings.extend(decode_postings(data))
+            if dead:
+                live = self._live_doc_ids([doc_id for doc_id, _ in postings])
+                merged_count = len(postings)
+                postings = [p for p in postings if p[0] in live]
+                dead -= merged_count - len(postings)
+            
+            # The merged block takes the place of the oldest one it replaces
+            self._conn.execute(
+                "UPDATE postings SET count = ?, data = ? WHERE id = ?",
+                (len(postings), encode_postings(postings), merged_ids[0])
+            )
+            self._conn.executemany(
+                "DELETE FROM postings WHERE id = ?", [(block_id,) for block_id in merged_ids[1:]]
+            )
+        self._conn.execute("UPDATE terms SET df = ?, dead = ? WHERE id = ?", (df, dead, term_id))
+    
+    def _live_doc_ids(self, doc_ids):
+        """Get the doc ids still in the index (caller holds the lock)."""
+        live = set()
+        for start in range(0, len(doc_ids), self._LIVE_CHECK_CHUNK):
+            chunk = doc_ids[start:start + self._LIVE_CHECK_CHUNK]
+            marks = ','.join('?' * len(chunk))
+            live.update(r[0] for r in self._conn.execute(
+                f"SELECT id FROM docs WHERE id IN ({marks})", chunk
+            ))
+        return live
+    
+    def apply_changes(self, changes, should_stop=None):
+        """
+        Update the index from a batch of file watcher changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+            should_stop (callable): Optional callable returning True to stop
+                early (see update_documents())
+        """
+        to_index = []
+        removed = []
+        for event_type, src_path, dest_path in changes:
+            if event_type in (events.CREATED, events.MODIFIED):
+                if is_indexable(src_path):
+                    to_index.append(os.path.normpath(src_path))
+            elif event_type == events.DELETED:
+                removed.append(os.path.normpath(src_path))
+            elif event_type == events.MOVED:
+                removed.append(os.path.normpath(src_path))
+                if is_indexable(dest_path):
+                    to_index.append(os.path.normpath(dest_path))
+            elif event_type == events.DIR_DELETED:
+                # Also sent alone for a folder moved out of the location
+                removed.extend(self._documents_below(os.path.normpath(src_path)))
+        self.update_documents(to_index, removed, should_stop)
+    
+    def _documents_below(self, directory):
+        """Get the paths of the indexed documents below a directory."""
+        low, high = prefix_range(directory)
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT path FROM docs WHERE path >= ? AND path < ?", (low, high)
+            )]
+    
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    
+    def search(self, query, limit=50):
+        """
+        Find documents matching a query, best matches first.
+        
+        All query words are scored with BM25 (documents need not contain
+        every word). The last word is also treated as a prefix so results
+        appear while the user is still typing it.
+        
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results
+        
+        Returns:
+            list: (path, score) tuples sorted by descending score
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        
+        with self._lock:
+            docs = self._load_docs()
+            if not docs:
+                return []
+            # Ranking statistics cover every location, like the document frequencies
+            doc_count = max(1, int(self.get_meta('doc_count', 0)))
+            average_length = (int(self.get_meta('total_length', 0)) / doc_count) or 1
+            
+            term_rows = []
+            for word in words[:-1]:
+                row = self._conn.execute(
+                    "SELECT id, df FROM terms WHERE term = ?", (word,)
+                ).fetchone()
+                if row:
+                    term_rows.append(row)
+            last = words[-1]
+            term_rows.extend(self._conn.execute(
+                "SELECT id, df FROM terms WHERE term >= ? AND term < ? "
+                "ORDER BY term = ? DESC, df DESC LIMIT ?",
+                (last, last + '\uffff', last, self.MAX_PREFIX_EXPANSION)
+            ).fetchall())
+            
+            scores = {}
+            for term_id, df in term_rows:
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for (blob,) in self._conn.execute(
+                    "SELECT data FROM postings WHERE term_id = ?", (term_id,)
+                ):
+                    for doc_id, tf in decode_postings(blob):
+                        # Skips removed documents and those of other locations
+                        doc = docs.get(doc_id)
+                        if doc is None:
+                            continue
+                        norm = self.K1 * (1 - self.B + self.B * doc[1] / average_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+            
+            best = heapq.nlargest(
+                limit, ((score, docs[doc_id][0]) for doc_id, score in scores.items())
+            )
+        return [(path, score) for score, path in best]
+    
+    def _load_docs(self):
+        """
+        Get the documents below the tracked location, loading them if needed.
+        
+        The cache is reloaded when another store changed the documents
+        since it was loaded. Caller holds the lock.
+        
+        Returns:
+            dict: Doc id -> (path, length)
+        """
+        version = int(self.get_meta('docs_version', 0))
+        if self._docs is None or self._docs_version != version:
+            low, high = prefix_range(self.root_path)
+            self._docs = {
+                r[0]: (r[1], r[2]) for r in self._conn.execute(
+                    "SELECT id, path, length FROM docs WHERE path >= ? AND path < ?",
+                    (low, high)
+                )
+            }
+            self._docs_version = version
+        return self._docs
@@ -0,0 +1,87 @@
+"""Content index queries run off the GUI thread."""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for
+from PyQt5.QtCore import QObject, pyqtSignal
+from services import metrics
+
+
+class ContentSearcher(QObject):
+    """
+    Runs ContentIndex.search() on a background thread.
+    
+    A query can wait for the store lock while the content index worker
+    merges a batch, so it must not run on the GUI thread. Only the latest
+    query matters while the user types: queries still waiting when a newer
+    one arrives are skipped, and every result carries its request id so
+    the caller can drop stale ones.
+    """
+    
+    results_ready = pyqtSignal(int, list)  # Request id, (path, score) tuples
+    
+    def __init__(self, parent=None):
+        """
+        Initialize content searcher.
+        
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._latest_id = 0
+        self._future = None  # Last query handed to the pool
+    
+    def search(self, content_index, text, limit):
+        """
+        Start a query; results_ready is emitted when it is done.
+        
+        Args:
+            content_index: ContentIndex to query
+            text (str): Search text
+            limit (int): Maximum number of results
+        
+        Returns:
+            int: Request id used in results_ready
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='content-search')
+        with self._lock:
+            self._latest_id += 1
+            request_id = self._latest_id
+        self._future = self._pool.submit(self._search, request_id, content_index, text, limit)
+        return request_id
+    
+    def cancel(self, wait=False):
+        """
+        Skip the queries not run yet.
+        
+        Args:
+            wait (bool): Also wait for a running query, e.g. before the
+                index it uses is closed
+        """
+        with self._lock:
+            self._latest_id += 1
+        future = self._future
+        if wait and future is not None:
+            # The pool has one thread, so earlier queries are done by then
+            wait_for([future])
+    
+    def _search(self, request_id, content_index, text, limit):
+        """Run one query (runs on the pool)."""
+        with self._lock:
+            if request_id != self._latest_id:
+                return
+        results = []
+        try:
+            with metrics.timer('search.content'):
+                results = content_index.search(text, limit)
+        except Exception as e:
+            print(f"Content search error: {e}")
+        self.results_ready.emit(request_id, results)
+    
+    def shutdown(self):
+        """Skip queued queries and stop the worker thread."""
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,158 @@
+"""Background thread that keeps a ContentIndex current."""
+import queue
+from PyQt5.QtCore import QThread, pyqtSignal
+from services.events import coalesce
+from services.ignore_rules import touches_ignore_file
+
+
+class ContentIndexWorker(QThread):
+    """
+    Thread that extracts document text and updates the content index.
+    
+    On start-up it syncs the index with the disk, then it applies file
+    watcher changes as they arrive. Documents are indexed in batches so
+    each postings list is rewritten once per batch, not once per document.
+    
+    With a change journal, the start-up sync replays the changes recorded
+    since the index was last current instead of walking the whole tree,
+    unless the previous session did not shut down cleanly.
+    """
+    
+    sync_progress = pyqtSignal(int, int)  # Documents indexed, documents to index
+    index_updated = pyqtSignal()  # Emitted after each committed batch
+    index_error = pyqtSignal(str)  # Error message
+    
+    BATCH_SIZE = 200
+    
+    _SYNC = 'sync'
+    _APPLY = 'apply'
+    
+    def __init__(self, content_index, journal=None, parent=None):
+        """
+        Initialize content index worker.
+        
+        Args:
+            content_index: ContentIndex instance to update
+            journal: Optional ChangeJournal of the location
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.content_index = content_index
+        self.journal = journal
+        self._synced = False
+        self._tasks = queue.Queue()
+    
+    def request_sync(self, full=False):
+        """
+        Queue a comparison of the index with the disk.
+        
+        Args:
+            full (bool): Walk the tree even if the journal could be replayed
+        """
+        self._tasks.put((self._SYNC, full))
+    
+    def enqueue_changes(self, changes, journal_position=None):
+        """
+        Queue a batch of file watcher changes for the content index.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+            journal_position (str): Journal position after this batch
+        """
+        if changes:
+            self._tasks.put((self._APPLY, (list(changes), journal_position)))
+    
+    def stop(self):
+        """
+        Stop the worker and wait until it has finished.
+        
+        Extraction checks for interruption before every document, so this
+        returns after at most one document; the content index must not be
+        closed while the thread still uses it.
+        """
+        self.requestInterruption()
+        self._tasks.put(None)
+        self.wait()
+    
+    def run(self):
+        """Process queued content index tasks until stopped."""
+        while not self.isInterruptionRequested():
+            task = self._tasks.get()
+            if task is None:
+                break
+            kind, payload = task
+            try:
+                if kind == self._SYNC:
+                    self._sync(full=payload)
+                else:
+                    changes, position = payload
+                    self.content_index.apply_changes(changes, self.isInterruptionRequested)
+                    if self.isInterruptionRequested():
+                        # Part of the batch may be missing; it is replayed next time
+                        break
+                    if position and self._synced:
+                        self.content_index.journal_position = position
+                    self.index_updated.emit()
+                    if touches_ignore_file(changes):
+                        # Documents may have become (un)ignored - compare with the disk
+                        self._sync(full=True)
+            except Exception as e:
+                print(f"Content index error: {e}")
+                self.index_error.emit(str(e))
+    
+    def _sync(self, full=False):
+        """
+        Index new and changed documents and drop deleted ones.
+        
+        Args:
+            full (bool): Walk the tree even if the journal could be replayed
+        """
+        journal = self.journal
+        position = journal.position if journal is not None else None
+        replay = None
+        if journal is not None and journal.clean_shutdown and not full:
+            replay = journal.read_since(self.content_index.journal_position)
+        
+        if replay is None:
+            if not self._sync_with_disk():
+                return
+        else:
+            changes = coalesce(replay)
+            total = len(changes)
+            for start in range(0, total, self.BATCH_SIZE):
+                if self.isInterruptionRequested():
+                    return
+                self.content_index.apply_changes(
+                    changes[start:start + self.BATCH_SIZE], self.isInterruptionRequested
+                )
+                self.sync_progress.emit(min(start + self.BATCH_SIZE, total), total)
+                self.index_updated.emit()
+            if self.isInterruptionRequested():
+                # The last batch may be incomplete
+                return
+        
+        if position is not None and self._tasks.empty():
+            # Queued batches would otherwise be marked applied too early
+            self.content_index.journal_position = position
+        self._synced = True
+    
+    def _sync_with_disk(self):
+        """
+        Walk the tree and bring every document up to date.
+        
+        Returns:
+            bool: False if interrupted
+        """
+        to_index, removed = self.content_index.stale_paths()
+        total = len(to_index)
+        if removed:
+            self.content_index.update_documents(removed=removed)
+        for start in range(0, total, self.BATCH_SIZE):
+            if self.isInterruptionRequested():
+                return False
+            self.content_index.update_documents(
+                to_index[start:start + self.BATCH_SIZE], should_stop=self.isInterruptionRequested
+            )
+            self.sync_progress.emit(min(start + self.BATCH_SIZE, total), total)
+            self.index_updated.emit()
+        return not self.isInterruptionRequested()
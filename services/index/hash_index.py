@@ -0,0 +1,342 @@
+"""Content hashes of files that might be duplicates of each other."""
+import functools
+import hashlib
+import os
+from collections import defaultdict
+from services import events
+from services.index.sqlite_store import SqliteStore, prefix_range
+
+
+# Bytes read from each end of a file for its partial hash
+PARTIAL_BYTES = 64 * 1024
+
+# Read size for full hashes
+HASH_CHUNK_BYTES = 1024 * 1024
+
+# Files handed to the hashing map at a time, so a pool never queues the whole tree
+MAP_CHUNK_SIZE = 64
+
+
+def _new_hash():
+    """Create the hash object used for all digests."""
+    return hashlib.blake2b(digest_size=20)
+
+
+def partial_digest(path, size):
+    """
+    Hash the first and last PARTIAL_BYTES of a file.
+    
+    Files no larger than 2 * PARTIAL_BYTES are hashed completely, so for
+    them the partial digest is the full digest.
+    
+    Args:
+        path (str): File path
+        size (int): File size
+    
+    Returns:
+        bytes: Digest
+    """
+    digest = _new_hash()
+    with open(path, 'rb') as f:
+        if size <= 2 * PARTIAL_BYTES:
+            digest.update(f.read())
+        else:
+            digest.update(f.read(PARTIAL_BYTES))
+            f.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(f.read(PARTIAL_BYTES))
+    return digest.digest()
+
+
+def full_digest(path, should_stop=None):
+    """
+    Hash a whole file.
+    
+    Args:
+        path (str): File path
+        should_stop (callable): Optional callable returning True to give up;
+            checked after every HASH_CHUNK_BYTES, so large files stop quickly
+    
+    Returns:
+        bytes: Digest, or None if stopped
+    """
+    digest = _new_hash()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            if should_stop and should_stop():
+                return None
+            digest.update(chunk)
+    return digest.digest()
+
+
+class HashIndex(SqliteStore):
+    """
+    Digests of the files under a tracked location that share their size
+    with another file, i.e. every file that could have a duplicate.
+    
+    Hashing is staged so that as little as possible is read: files of a
+    unique size are never opened, files of a shared size get a partial
+    hash of their ends, and only files whose partial hashes collide are
+    hashed completely. Digests are cached with the file's (inode, size,
+    mtime) and reused for as long as those are unchanged.
+    """
+    
+    DB_FILE_NAME = "hashes.db"
+    SCHEMA_VERSION = 1
+    
+    def __init__(self, root_path, db_path=None):
+        """
+        Initialize hash index.
+        
+        Args:
+            root_path (str): Tracked location
+            db_path (str): Database file (defaults to ~/.dms_client/hashes.db)
+        """
+        self.root_path = os.path.normpath(str(root_path))
+        super().__init__(db_path)
+    
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist."""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                partial BLOB,
+                full BLOB
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS hashes_full ON hashes (full) WHERE full IS NOT NULL"
+        )
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+    
+    def hash_candidates(self, files, map_function=map, should_stop=None):
+        """
+        Hash files that may be duplicates and store the digests.
+        
+        Args:
+            files (iterable): (path, size, mtime, inode) of files to consider;
+                only files sharing their size with another one are read
+            map_function (callable): map() replacement used to run the hashing,
+                e.g. the map of a thread pool
+            should_stop (callable): Optional callable returning True to abort
+        
+        Returns:
+            int: Number of files that had to be read
+        """
+        by_size = defaultdict(list)
+        for path, size, mtime, inode in files:
+            if size > 0:
+                by_size[size].append((os.path.normpath(path), size, mtime, inode))
+        groups = [group for group in by_size.values() if len(group) > 1]
+        candidates = [f for group in groups for f in group]
+        if not candidates:
+            return 0
+        
+        cached = self._cached_digests(candidates)
+        
+        # Stage 1: partial hashes of every candidate
+        missing = [f for f in candidates if f[0] not in cached]
+        partials = self._map_chunked(self._safe_partial, missing, map_function, should_stop)
+        for f, digest in partials:
+            if digest is not None:
+                cached[f[0]] = (digest, digest if f[1] <= 2 * PARTIAL_BYTES else None)
+        files_read = len(partials)
+        
+        # Stage 2: full hashes where partial hashes collide
+        by_partial = defaultdict(list)
+        for f in candidates:
+            digests = cached.get(f[0])
+            if digests is not None:
+                by_partial[(f[1], digests[0])].append(f)
+        missing = [
+            f for group in by_partial.values() if len(group) > 1
+            for f in group if cached[f[0]][1] is None
+        ]
+        full = functools.partial(self._safe_full, should_stop=should_stop)
+        for f, digest in self._map_chunked(full, missing, map_function, should_stop):
+            if digest is not None:
+                cached[f[0]] = (cached[f[0]][0], digest)
+        
+        with self._transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (path, inode, size, mtime) + cached[path]
+                    for path, size, mtime, inode in candidates if path in cached
+                ]
+            )
+        return files_read
+    
+    @staticmethod
+    def _map_chunked(function, files, map_function, should_stop):
+        """
+        Apply a hash function to files a chunk at a time.
+        
+        Returns:
+            list: (file, result) pairs for the files processed before stopping
+        """
+        results = []
+        for start in range(0, len(files), MAP_CHUNK_SIZE):
+            if should_stop and should_stop():
+                break
+            chunk = files[start:start + MAP_CHUNK_SIZE]
+            results.extend(zip(chunk, map_function(function, chunk)))
+        return results
+    
+    @staticmethod
+    def _safe_partial(file_info):
+        """Partial digest of a (path, size, mtime, inode) tuple, or None if unreadable."""
+        try:
+            return partial_digest(file_info[0], file_info[1])
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _safe_full(file_info, should_stop=None):
+        """Full digest of a (path, size, mtime, inode) tuple, or None if unreadable or stopped."""
+        try:
+            return full_digest(file_info[0], should_stop)
+        except OSError:
+            return None
+    
+    def _cached_digests(self, files):
+        """
+        Look up stored digests that are still valid.
+        
+        Args:
+            files (list): (path, size, mtime, inode) tuples
+        
+        Returns:
+            dict: Path -> (partial, full) for files whose inode, size and
+                  mtime match the stored row
+        """
+        cached = {}
+        with self._lock:
+            for path, size, mtime, inode in files:
+                row = self._conn.execute(
+                    "SELECT inode, size, mtime, partial, full FROM hashes WHERE path = ?",
+                    (path,)
+                ).fetchone()
+                if row and row[:3] == (inode, size, mtime) and row[3] is not None:
+                    cached[path] = (row[3], row[4])
+        return cached
+    
+    def retain(self, paths):
+        """
+        Drop stored digests of all files under the location except the given ones.
+        
+        Args:
+            paths (iterable): Paths to keep
+        """
+        keep = {os.path.normpath(p) for p in paths}
+        low, high = prefix_range(self.root_path)
+        with self._transaction():
+            stale = [
+                (path,) for (path,) in self._conn.execute(
+                    "SELECT path FROM hashes WHERE path >= ? AND path < ?", (low, high)
+                )
+                if path not in keep
+            ]
+            self._conn.executemany("DELETE FROM hashes WHERE path = ?", stale)
+    
+    def apply_changes(self, changes):
+        """
+        Follow deletions and moves from a batch of file watcher changes.
+        
+        Created and modified files are not hashed here; pass them to
+        hash_candidates() together with the files of the same size.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        with self._transaction():
+            for event_type, src_path, dest_path in changes:
+                if event_type in (events.DELETED, events.MODIFIED):
+                    self._conn.execute(
+                        "DELETE FROM hashes WHERE path = ?", (os.path.normpath(src_path),)
+                    )
+                elif event_type == events.MOVED:
+                    # Same inode, size and mtime - the digests stay valid
+                    self._conn.execute(
+                        "DELETE FROM hashes WHERE path = ?", (os.path.normpath(dest_path),)
+                    )
+                    self._conn.execute(
+                        "UPDATE hashes SET path = ? WHERE path = ?",
+                        (os.path.normpath(dest_path), os.path.normpath(src_path))
+                    )
+                elif event_type == events.DIR_DELETED:
+                    # Also sent alone for a folder moved out of the location
+                    low, high = prefix_range(os.path.normpath(src_path))
+                    self._conn.execute(
+                        "DELETE FROM hashes WHERE path >= ? AND path < ?", (low, high)
+                    )
+    
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    
+    def duplicates(self, min_size=1):
+        """
+        Find groups of files with identical contents.
+        
+        Args:
+            min_size (int): Ignore files smaller than this many bytes
+        
+        Returns:
+            list: Dicts with 'size', 'paths' (oldest copy first) and
+                  'wasted_bytes', largest waste first
+        """
+        low, high = prefix_range(self.root_path)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT h.full, h.size, h.path, h.mtime FROM hashes h "
+                "JOIN (SELECT full, size FROM hashes WHERE full IS NOT NULL AND size >= ? "
+                "      AND path >= ? AND path < ? "
+                "      GROUP BY full, size HAVING COUNT(*) > 1) d "
+                "ON h.full = d.full AND h.size = d.size "
+                "WHERE h.path >= ? AND h.path < ? "
+                "ORDER BY h.full, h.size, h.mtime, h.path",
+                (min_size, low, high, low, high)
+            ).fetchall()
+        
+        groups = []
+        current_key = None
+        for digest, size, path, mtime in rows:
+            if (digest, size) != current_key:
+                current_key = (digest, size)
+                groups.append({'size': size, 'paths': []})
+            groups[-1]['paths'].append(path)
+        for group in groups:
+            group['wasted_bytes'] = group['size'] * (len(group['paths']) - 1)
+        groups.sort(key=lambda g: g['wasted_bytes'], reverse=True)
+        return groups
+    
+    def wasted_bytes_by_folder(self, min_size=1):
+        """
+        Sum up the space taken by redundant copies, per folder.
+        
+        In each group of duplicates the oldest copy counts as the original;
+        every other copy is charged to the folder that contains it.
+        
+        Args:
+            min_size (int): Ignore files smaller than this many bytes
+        
+        Returns:
+            list: (folder, wasted_bytes, redundant_copies) tuples, largest first
+        """
+        wasted = defaultdict(lambda: [0, 0])
+        for group in self.duplicates(min_size):
+            for path in group['paths'][1:]:
+                entry = wasted[os.path.dirname(path)]
+                entry[0] += group['size']
+                entry[1] += 1
+        return sorted(
+            ((folder, b, n) for folder, (b, n) in wasted.items()),
+            key=lambda item: item[1], reverse=True
+        )
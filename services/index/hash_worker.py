@@ -0,0 +1,117 @@
+"""Background thread that keeps a HashIndex current."""
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QThread, pyqtSignal
+from services import events
+
+
+class HashWorker(QThread):
+    """
+    Thread that hashes possible duplicates on a small pool of threads.
+    
+    A scan hashes every file that shares its size with another file in
+    the metadata index; afterwards only created and modified files from
+    file watcher changes are hashed, together with the files of the same
+    size. The pool is bounded and fed a chunk of files at a time, so a
+    large tree never floods it.
+    """
+    
+    duplicates_changed = pyqtSignal()  # Emitted after digests were updated
+    hash_error = pyqtSignal(str)  # Error message
+    
+    MAX_WORKERS = 4
+    
+    _SCAN = 'scan'
+    _APPLY = 'apply'
+    
+    def __init__(self, hash_index, metadata_index, max_workers=None, parent=None):
+        """
+        Initialize hash worker.
+        
+        Args:
+            hash_index: HashIndex instance to update
+            metadata_index: MetadataIndex used to find files of the same size
+            max_workers (int): Hashing threads (defaults to MAX_WORKERS or fewer CPUs)
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.hash_index = hash_index
+        self.metadata_index = metadata_index
+        self.max_workers = max_workers or min(self.MAX_WORKERS, os.cpu_count() or 1)
+        self._tasks = queue.Queue()
+    
+    def request_scan(self):
+        """Queue a scan of every file that may have a duplicate."""
+        self._tasks.put((self._SCAN, None))
+    
+    def enqueue_changes(self, changes):
+        """
+        Queue a batch of file watcher changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        if changes:
+            self._tasks.put((self._APPLY, list(changes)))
+    
+    def stop(self):
+        """
+        Stop the worker and wait until it has finished.
+        
+        Hashing checks for interruption between reads of every file, so
+        this returns soon even in the middle of a large file; the hash
+        index must not be closed while the thread still uses it.
+        """
+        self.requestInterruption()
+        self._tasks.put(None)
+        self.wait()
+    
+    def run(self):
+        """Process queued hashing tasks until stopped."""
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix='hash') as pool:
+            while not self.isInterruptionRequested():
+                task = self._tasks.get()
+                if task is None:
+                    break
+                kind, payload = task
+                try:
+                    if kind == self._SCAN:
+                        self._scan(pool.map)
+                    else:
+                        self._apply(payload, pool.map)
+                except Exception as e:
+                    print(f"Hash worker error: {e}")
+                    self.hash_error.emit(str(e))
+    
+    def _scan(self, map_function):
+        """Hash all size collisions in the metadata index."""
+        candidates = self.metadata_index.files_sharing_size()
+        self.hash_index.retain(path for path, _, _, _ in candidates)
+        files_read = self.hash_index.hash_candidates(
+            candidates, map_function, self.isInterruptionRequested
+        )
+        print(f"Duplicate scan: {len(candidates)} candidates, {files_read} files read")
+        self.duplicates_changed.emit()
+    
+    def _apply(self, changes, map_function):
+        """Update digests for a batch of changes."""
+        self.hash_index.apply_changes(changes)
+        
+        files = {}
+        for event_type, src_path, dest_path in changes:
+            if event_type in (events.CREATED, events.MODIFIED):
+                path = os.path.normpath(src_path)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (path, st.st_size, st.st_mtime, st.st_ino)
+        
+        if files:
+            # New contents can only duplicate files of the same size
+            others = self.metadata_index.files_with_sizes(f[1] for f in files.values())
+            candidates = list(files.values()) + [f for f in others if f[0] not in files]
+            self.hash_index.hash_candidates(candidates, map_function, self.isInterruptionRequested)
+        self.duplicates_changed.emit()
@@ -0,0 +1,156 @@
+"""Background thread that keeps a MetadataIndex current."""
+import queue
+from PyQt5.QtCore import QThread, pyqtSignal
+from services.events import coalesce
+from services.ignore_rules import touches_ignore_file
+
+
+class IndexWorker(QThread):
+    """
+    Thread that runs index catch-up and applies file watcher changes.
+    
+    All writes to the index go through this single thread so the GUI never
+    waits on disk walks or database commits. Change batches that queue up
+    while a catch-up is running are merged into one transaction. An optional
+    in-memory name index is rebuilt from the metadata index after catch-up
+    and then kept current from the same changes.
+    
+    With a change journal, catch-up first replays changes that were
+    journaled but not applied before the last shutdown, then appends the
+    changes found on disk (made while the app was closed) to the journal
+    so other consumers can replay them instead of walking the tree.
+    """
+    
+    catch_up_finished = pyqtSignal(dict)  # Result of MetadataIndex.catch_up()
+    changes_applied = pyqtSignal(list)  # Changes that were written to the index
+    index_error = pyqtSignal(str)  # Error message
+    
+    _CATCH_UP = 'catch_up'
+    _APPLY = 'apply'
+    
+    def __init__(self, metadata_index, name_index=None, journal=None, parent=None):
+        """
+        Initialize index worker.
+        
+        Args:
+            metadata_index: MetadataIndex instance to update
+            name_index: Optional TrigramIndex to keep in sync
+            journal: Optional ChangeJournal of the location
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.metadata_index = metadata_index
+        self.name_index = name_index
+        self.journal = journal
+        self._caught_up = False
+        self._tasks = queue.Queue()
+        self._pushback = None  # Task taken while draining, handled next
+    
+    def request_catch_up(self):
+        """Queue a catch-up of the index with the disk."""
+        self._tasks.put((self._CATCH_UP, None))
+    
+    def enqueue_changes(self, changes, journal_position=None):
+        """
+        Queue a batch of file watcher changes for the index.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+            journal_position (str): Journal position after this batch
+        """
+        if changes:
+            self._tasks.put((self._APPLY, (list(changes), journal_position)))
+    
+    def stop(self):
+        """Stop the worker after the current task and wait for it."""
+        self.requestInterruption()
+        self._tasks.put(None)
+        self.wait(2000)
+    
+    def run(self):
+        """Process queued index tasks until stopped."""
+        while not self.isInterruptionRequested():
+            task = self._next_task()
+            if task is None:
+                break
+            kind, payload = task
+            try:
+                if kind == self._CATCH_UP:
+                    result = self._catch_up()
+                    if self.name_index is not None:
+                        self.name_index.rebuild(self.metadata_index.file_paths())
+                    self.catch_up_finished.emit(result)
+                else:
+                    changes, position = payload
+                    more_changes, more_position = self._drain_pending_changes()
+                    changes = changes + more_changes
+                    position = more_position or position
+                    self.metadata_index.apply_changes(changes)
+                    if position and self._caught_up:
+                        # Until catch-up has replayed the journal, older
+                        # records may still be unapplied
+                        self.metadata_index.journal_position = position
+                    if self.name_index is not None:
+                        self.name_index.apply_changes(changes)
+                    self.changes_applied.emit(changes)
+                    if touches_ignore_file(changes):
+                        # Ignore rules changed - re-list the affected directories
+                        self.request_catch_up()
+            except Exception as e:
+                print(f"Index worker error: {e}")
+                self.index_error.emit(str(e))
+    
+    def _catch_up(self):
+        """
+        Reconcile the index with the journal and the disk.
+        
+        Returns:
+            dict: Result of MetadataIndex.catch_up()
+        """
+        index = self.metadata_index
+        if self.journal is not None and not self._caught_up:
+            # Changes journaled but not applied before the last shutdown
+            replay = self.journal.read_since(index.journal_position)
+            if replay:
+                index.apply_changes(coalesce(replay))
+        
+        # Only directories whose mtime changed while we were away are listed
+        result = index.catch_up(self.isInterruptionRequested)
+        
+        if self.journal is not None:
+            position = self.journal.record_catch_up(result['changes'])
+            if self._tasks.empty() and self._pushback is None:
+                # Queued batches would otherwise be marked applied too early
+                index.journal_position = position
+        self._caught_up = True
+        return result
+    
+    def _next_task(self):
+        """Get the next task, blocking until there is one."""
+        if self._pushback is not None:
+            task, self._pushback = self._pushback, None
+            return task
+        return self._tasks.get()
+    
+    def _drain_pending_changes(self):
+        """
+        Take any further change batches that are already queued.
+        
+        Returns:
+            tuple: (changes, journal position after the last batch taken)
+        """
+        changes = []
+        position = None
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                return changes, position
+            if task is None or task[0] != self._APPLY:
+                # Stop merging; the main loop handles this task next, before
+                # any batch queued after it
+                self._pushback = task
+                return changes, position
+            batch, batch_position = task[1]
+            changes.extend(batch)
+            position = batch_position or position
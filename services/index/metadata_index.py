@@ -0,0 +1,715 @@
+"""Persistent SQLite index of file metadata under the tracked locations."""
+import os
+import sqlite3
+import stat
+from pathlib import Path
+from services import events, metrics
+from services.ignore_rules import IGNORE_FILE_NAME
+from services.index.sqlite_store import SqliteStore, prefix_range
+
+
+class MetadataIndex(SqliteStore):
+    """
+    On-disk index of path, size, mtime, inode and type for every entry
+    under a tracked location.
+    
+    Directory rows also record the directory's own mtime at the time it was
+    last listed, which lets catch_up() skip directories that have not
+    changed since the previous session. The index is safe to share between
+    threads.
+    
+    All tracked locations share one database; each location is a row in
+    the roots table and its entries carry that row's id, so per-location
+    queries don't have to range-scan paths. One MetadataIndex instance
+    serves one location.
+    """
+    
+    DB_FILE_NAME = "index.db"
+    SCHEMA_VERSION = 2
+    
+    # Commit catch-up work after this many directories so readers are not starved
+    CATCH_UP_COMMIT_INTERVAL = 200
+    
+    # mtime stored for directories that have been discovered but not listed yet
+    UNSCANNED_MTIME = -1.0
+    
+    # Sort keys for list_children()
+    SORT_NAME = 'name'
+    SORT_SIZE = 'size'
+    SORT_TYPE = 'type'
+    SORT_MTIME = 'mtime'
+    
+    # SQL expression per sort key; each one is indexed together with the parent.
+    # The type is the lowercase extension, '' for names without one.
+    SORT_EXPRESSIONS = {
+        SORT_NAME: "name COLLATE NOCASE",
+        SORT_SIZE: "size",
+        SORT_TYPE: (
+            "(CASE WHEN instr(name, '.') > 1 "
+            "THEN lower(replace(name, rtrim(name, replace(name, '.', '')), '')) "
+            "ELSE '' END)"
+        ),
+        SORT_MTIME: "mtime",
+    }
+    
+    def __init__(self, root_path, db_path=None, ignore_matcher=None):
+        """
+        Initialize metadata index.
+        
+        Args:
+            root_path (str): Tracked location to index
+            db_path (str): Database file (defaults to ~/.dms_client/index.db)
+            ignore_matcher (IgnoreMatcher): Ignored entries are kept out of the index
+        """
+        self.root_path = os.path.normpath(str(root_path))
+        self.ignore_matcher = ignore_matcher
+        super().__init__(db_path)
+        with self._transaction():
+            self._conn.execute(
+                "INSERT OR IGNORE INTO roots (path) VALUES (?)", (self.root_path,)
+            )
+            self.root_id = self._conn.execute(
+                "SELECT id FROM roots WHERE path = ?", (self.root_path,)
+            ).fetchone()[0]
+    
+    def _create_schema(self):
+        """Create tables and indexes if they don't exist."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 2:
+            # Version 1 had no root ids; the entries are rebuilt by catch-up
+            self._conn.execute("DROP TABLE IF EXISTS entries")
+            self._conn.execute("DELETE FROM meta WHERE key LIKE 'journal_position:%'")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS roots (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                parent TEXT NOT NULL,
+                name TEXT NOT NULL,
+                is_dir INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                inode INTEGER NOT NULL,
+                root_id INTEGER NOT NULL
+            )
+        """)
+        # Directory listings are paged in each sort order straight from these;
+        # they also serve plain lookups by parent
+        self._conn.execute("DROP INDEX IF EXISTS entries_parent")
+        for sort_key, expression in self.SORT_EXPRESSIONS.items():
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS entries_parent_{sort_key} "
+                f"ON entries (parent, is_dir, {expression})"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_name ON entries (name)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_root ON entries (root_id, is_dir)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_size ON entries (root_id, size) WHERE is_dir = 0"
+        )
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
+    # ------------------------------------------------------------------
+    # Updating
+    # ------------------------------------------------------------------
+    
+    @metrics.timed('index.catch_up')
+    def catch_up(self, should_stop=None):
+        """
+        Bring the index up to date with the disk.
+        
+        Every known directory is stat'ed, but only directories whose mtime
+        (or inode) differs from the indexed value are listed again; the
+        subdirectories of unchanged directories come from the index. On a
+        cold start every directory is new, so this is a single full walk.
+        
+        Files edited in place do not change their directory's mtime, so
+        those edits are only picked up from file watcher events.
+        
+        Args:
+            should_stop (callable): Optional callable returning True to abort
+        
+        Returns:
+            dict: 'dirs_checked', 'dirs_scanned' and 'changes', the list of
+                  (event_type, src_path, dest_path) tuples for files that
+                  were added, changed or removed since the last run
+        """
+        changes = []
+        dirs_checked = 0
+        dirs_scanned = 0
+        stack = [self.root_path]
+        
+        while stack:
+            if should_stop and should_stop():
+                break
+            # Work in chunks so watcher updates and queries can interleave
+            with self._transaction():
+                for _ in range(self.CATCH_UP_COMMIT_INTERVAL):
+                    if not stack:
+                        break
+                    directory = stack.pop()
+                    dirs_checked += 1
+                    
+                    try:
+                        dir_stat = os.stat(directory)
+                    except OSError:
+                        changes.extend(self._delete_subtree(directory))
+                        continue
+                    
+                    row = self._conn.execute(
+                        "SELECT mtime, inode FROM entries WHERE path = ? AND is_dir = 1",
+                        (directory,)
+                    ).fetchone()
+                    
+                    if row and row[0] == dir_stat.st_mtime and row[1] == dir_stat.st_ino:
+                        # Listing unchanged - descend into the known subdirectories
+                        stack.extend(r[0] for r in self._conn.execute(
+                            "SELECT path FROM entries WHERE parent = ? AND is_dir = 1",
+                            (directory,)
+                        ))
+                    else:
+                        dirs_scanned += 1
+                        stack.extend(self._rescan_directory(directory, dir_stat, changes))
+        
+        return {
+            'dirs_checked': dirs_checked,
+            'dirs_scanned': dirs_scanned,
+            'changes': changes,
+        }
+    
+    def _rescan_directory(self, directory, dir_stat, changes):
+        """
+        List a directory and reconcile its children with the index.
+        
+        Caller holds an open transaction.
+        
+        Args:
+            directory (str): Directory to list
+            dir_stat (os.stat_result): Current stat of the directory
+            changes (list): List to append file changes to
+        
+        Returns:
+            list: Subdirectory paths to visit next
+        """
+        known = {
+            r[0]: r[1:] for r in self._conn.execute(
+                "SELECT name, is_dir, size, mtime, inode FROM entries WHERE parent = ?",
+                (directory,)
+            )
+        }
+        subdirs = []
+        rows = []
+        matcher = self.ignore_matcher
+        
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if matcher and matcher.is_ignored_entry(directory, entry.name, is_dir):
+                            # Left in `known`, so a newly ignored entry is dropped below
+                            continue
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    
+                    previous = known.pop(entry.name, None)
+                    if previous is not None and bool(previous[0]) != is_dir:
+                        # Type changed - drop the old entry first
+                        changes.extend(self._delete_subtree(entry.path))
+                        previous = None
+                    
+                    if is_dir:
+                        subdirs.append(entry.path)
+                        if previous is None:
+                            rows.append(self._make_row(entry.path, directory, entry.name,
+                                                       True, st, self.UNSCANNED_MTIME))
+                    elif previous is None:
+                        rows.append(self._make_row(entry.path, directory, entry.name, False, st))
+                        changes.append((events.CREATED, entry.path, None))
+                    elif previous[1:] != (st.st_size, st.st_mtime, st.st_ino):
+                        rows.append(self._make_row(entry.path, directory, entry.name, False, st))
+                        changes.append((events.MODIFIED, entry.path, None))
+        except OSError as e:
+            print(f"Error listing {directory} for index: {e}")
+            return subdirs
+        
+        for name in known:
+            changes.extend(self._delete_subtree(os.path.join(directory, name)))
+        
+        rows.append(self._make_row(directory, os.path.dirname(directory),
+                                   os.path.basename(directory), True, dir_stat))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        return subdirs
+    
+    def _make_row(self, path, parent, name, is_dir, st, mtime=None):
+        """Build an entries row of this location from a stat result."""
+        return (
+            path, parent, name, int(is_dir),
+            0 if is_dir else st.st_size,
+            st.st_mtime if mtime is None else mtime,
+            st.st_ino,
+            self.root_id,
+        )
+    
+    def _delete_subtree(self, path):
+        """
+        Remove a path and everything below it (caller holds a transaction).
+        
+        Args:
+            path (str): Path to remove
+        
+        Returns:
+            list: DELETED changes for the files that were removed
+        """
+        low, high = prefix_range(path)
+        removed = [
+            (events.DELETED, r[0], None) for r in self._conn.execute(
+                "SELECT path FROM entries WHERE is_dir = 0 AND "
+                "(path = ? OR (path >= ? AND path < ?))",
+                (path, low, high)
+            )
+        ]
+        self._conn.execute(
+            "DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, low, high)
+        )
+        return removed
+    
+    def _forget_listings(self, directory):
+        """
+        Make catch-up list a directory tree again (caller holds a transaction).
+        
+        Used when an ignore file changes, since that changes which entries
+        belong in the index without touching any directory mtime.
+        
+        Args:
+            directory (str): Root of the tree to re-list
+        """
+        low, high = prefix_range(directory)
+        self._conn.execute(
+            "UPDATE entries SET mtime = ? WHERE is_dir = 1 AND "
+            "(path = ? OR (path >= ? AND path < ?))",
+            (self.UNSCANNED_MTIME, directory, low, high)
+        )
+    
+    def _upsert_file(self, path):
+        """Stat a file and store it (caller holds a transaction)."""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            self._delete_subtree(path)
+            return
+        if stat.S_ISDIR(st.st_mode):
+            return
+        self._ensure_directory(os.path.dirname(path))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            self._make_row(path, os.path.dirname(path), os.path.basename(path), False, st)
+        )
+    
+    def _ensure_directory(self, directory):
+        """
+        Add rows for a directory and the new ones above it (caller holds a transaction).
+        
+        A file in a new folder can be the first sign of the folder, e.g.
+        when it was created and filled within one batch. New folders are
+        added unlisted; catch-up lists them.
+        
+        Args:
+            directory (str): Directory that should have a row
+        """
+        prefix = self.root_path.rstrip(os.sep) + os.sep
+        while directory.startswith(prefix):
+            if self._conn.execute(
+                "SELECT 1 FROM entries WHERE path = ?", (directory,)
+            ).fetchone():
+                return
+            try:
+                st = os.stat(directory, follow_symlinks=False)
+            except OSError:
+                return
+            self._conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._make_row(directory, os.path.dirname(directory),
+                               os.path.basename(directory), True, st, self.UNSCANNED_MTIME)
+            )
+            directory = os.path.dirname(directory)
+    
+    def _upsert_directory(self, directory):
+        """Add a new directory, unlisted (caller holds a transaction)."""
+        try:
+            st = os.stat(directory, follow_symlinks=False)
+        except OSError:
+            self._delete_subtree(directory)
+            return
+        if not stat.S_ISDIR(st.st_mode):
+            return
+        # A file that was replaced by the directory
+        self._conn.execute("DELETE FROM entries WHERE path = ? AND is_dir = 0", (directory,))
+        self._ensure_directory(directory)
+    
+    def _move_subtree(self, src_path, dest_path):
+        """
+        Move a directory and everything below it (caller holds a transaction).
+        
+        The rows are renamed in place, so the moved folder keeps its
+        listings and catch-up does not have to read it again.
+        
+        Args:
+            src_path (str): Old directory path
+            dest_path (str): New directory path
+        """
+        row = self._conn.execute(
+            "SELECT is_dir FROM entries WHERE path = ?", (src_path,)
+        ).fetchone()
+        if row is None or not row[0]:
+            self._delete_subtree(src_path)
+            self._upsert_directory(dest_path)
+            return
+        self._delete_subtree(dest_path)
+        self._ensure_directory(os.path.dirname(dest_path))
+        low, high = prefix_range(src_path)
+        # substr() is 1-based: this keeps the separator after the old path
+        start = len(src_path) + 1
+        self._conn.execute(
+            "UPDATE entries SET path = ? || substr(path, ?), parent = ? || substr(parent, ?) "
+            "WHERE path >= ? AND path < ?",
+            (dest_path, start, dest_path, start, low, high)
+        )
+        self._conn.execute(
+            "UPDATE entries SET path = ?, parent = ?, name = ? WHERE path = ?",
+            (dest_path, os.path.dirname(dest_path), os.path.basename(dest_path), src_path)
+        )
+    
+    def apply_changes(self, changes):
+        """
+        Update the index from a batch of file watcher changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        with self._transaction():
+            for event_type, src_path, dest_path in changes:
+                for path in (src_path, dest_path):
+                    if path and os.path.basename(path) == IGNORE_FILE_NAME:
+                        self._forget_listings(os.path.dirname(os.path.normpath(path)))
+                if event_type in (events.CREATED, events.MODIFIED):
+                    self._upsert_file(os.path.normpath(src_path))
+                elif event_type == events.DELETED:
+                    self._delete_subtree(os.path.normpath(src_path))
+                elif event_type == events.MOVED:
+                    self._delete_subtree(os.path.normpath(src_path))
+                    self._upsert_file(os.path.normpath(dest_path))
+                elif event_type == events.DIR_CREATED:
+                    self._upsert_directory(os.path.normpath(src_path))
+                elif event_type == events.DIR_DELETED:
+                    self._delete_subtree(os.path.normpath(src_path))
+                elif event_type == events.DIR_MOVED:
+                    self._move_subtree(os.path.normpath(src_path), os.path.normpath(dest_path))
+    
+    def forget(self):
+        """Remove the location and all its entries, e.g. when it is no longer tracked."""
+        with self._transaction():
+            self._conn.execute("DELETE FROM entries WHERE root_id = ?", (self.root_id,))
+            self._conn.execute("DELETE FROM roots WHERE id = ?", (self.root_id,))
+            self._conn.execute(
+                "DELETE FROM meta WHERE key = ?", (f"journal_position:{self.root_path}",)
+            )
+    
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    
+    def count_files(self, folder_paths=None):
+        """
+        Count indexed files under the given folders.
+        
+        Args:
+            folder_paths (list): Folders to count (defaults to the whole location)
+        
+        Returns:
+            int: Number of files
+        """
+        if folder_paths is None:
+            with self._lock:
+                return self._conn.execute(
+                    "SELECT COUNT(*) FROM entries WHERE root_id = ? AND is_dir = 0",
+                    (self.root_id,)
+                ).fetchone()[0]
+        total = 0
+        with self._lock:
+            for folder in folder_paths:
+                low, high = prefix_range(os.path.normpath(str(folder)))
+                total += self._conn.execute(
+                    "SELECT COUNT(*) FROM entries WHERE path >= ? AND path < ? AND is_dir = 0",
+                    (low, high)
+                ).fetchone()[0]
+        return total
+    
+    def file_paths(self):
+        """
+        Get the paths of all indexed files under the root.
+        
+        Returns:
+            list: File paths
+        """
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT path FROM entries WHERE root_id = ? AND is_dir = 0",
+                (self.root_id,)
+            )]
+    
+    def files_sharing_size(self, min_size=1):
+        """
+        Get the files whose size is shared by at least one other file.
+        
+        These are the only files that can have a duplicate.
+        
+        Args:
+            min_size (int): Ignore files smaller than this many bytes
+        
+        Returns:
+            list: (path, size, mtime, inode) tuples
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT path, size, mtime, inode FROM entries "
+                "WHERE is_dir = 0 AND root_id = ? AND size IN ("
+                "  SELECT size FROM entries WHERE is_dir = 0 AND root_id = ? "
+                "  AND size >= ? GROUP BY size HAVING COUNT(*) > 1)",
+                (self.root_id, self.root_id, max(1, min_size))
+            ).fetchall()
+    
+    def files_with_sizes(self, sizes):
+        """
+        Get the files of the given sizes.
+        
+        Args:
+            sizes (iterable): File sizes in bytes
+        
+        Returns:
+            list: (path, size, mtime, inode) tuples
+        """
+        rows = []
+        with self._lock:
+            for size in set(sizes):
+                rows.extend(self._conn.execute(
+                    "SELECT path, size, mtime, inode FROM entries "
+                    "WHERE is_dir = 0 AND root_id = ? AND size = ?",
+                    (self.root_id, size)
+                ))
+        return rows
+    
+    def list_directory(self, directory):
+        """
+        List the indexed entries of a directory.
+        
+        Args:
+            directory (str): Directory path
+        
+        Returns:
+            list: Dicts with 'path', 'name', 'is_dir', 'size', 'mtime' and 'inode'
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, name, is_dir, size, mtime, inode FROM entries "
+                "WHERE parent = ? ORDER BY is_dir DESC, name",
+                (os.path.normpath(str(directory)),)
+            ).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+    
+    def list_children(self, directory, sort_key=SORT_NAME, descending=False,
+                      after=None, limit=256):
+        """
+        Get one page of a directory listing, directories first.
+        
+        Pages are read in index order and continue from a cursor instead of
+        an offset, so every page costs the same however large the directory.
+        Ties are broken by row id, which keeps the order stable.
+        
+        Args:
+            directory (str): Directory path
+            sort_key (str): One of the SORT_* constants
+            descending (bool): Reverse the order within directories and files
+            after (tuple): Cursor returned with the previous page (None for the first)
+            limit (int): Maximum number of entries
+        
+        Returns:
+            tuple: (entries, cursor) - a list of dicts with 'path', 'name',
+                   'is_dir', 'size', 'mtime' and 'inode', and the cursor for
+                   the next page, or None after the last page
+        """
+        expression = self.SORT_EXPRESSIONS[sort_key]
+        direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+        directory = os.path.normpath(str(directory))
+        is_dir, key, rowid = after if after else (1, None, None)
+        
+        entries = []
+        with self._lock:
+            while len(entries) < limit:
+                sql = (
+                    f"SELECT path, name, is_dir, size, mtime, inode, {expression}, rowid "
+                    f"FROM entries WHERE parent = ? AND is_dir = ?"
+                )
+                params = [directory, is_dir]
+                if key is not None:
+                    sql += (
+                        f" AND {expression} {compare}= ?"
+                        f" AND ({expression} {compare} ? OR rowid {compare} ?)"
+                    )
+                    params += [key, key, rowid]
+                sql += f" ORDER BY {expression} {direction}, rowid {direction} LIMIT ?"
+                params.append(limit - len(entries))
+                rows = self._conn.execute(sql, params).fetchall()
+                
+                entries.extend(self._row_to_dict(r) for r in rows)
+                if rows:
+                    key, rowid = rows[-1][6], rows[-1][7]
+                if len(entries) < limit:
+                    if not is_dir:
+                        return entries, None
+                    # Directories done - continue with the files
+                    is_dir, key, rowid = 0, None, None
+        return entries, (is_dir, key, rowid)
+    
+    def child_position(self, path, sort_key=SORT_NAME, descending=False):
+        """
+        Get an entry and its row in the order list_children() pages it out.
+        
+        Args:
+            path (str): Path of the entry
+            sort_key (str): One of the SORT_* constants
+            descending (bool): Reversed order within directories and files
+        
+        Returns:
+            tuple: (entry dict, row), or None if the path is not indexed
+        """
+        expression = self.SORT_EXPRESSIONS[sort_key]
+        compare = ">" if descending else "<"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT path, name, is_dir, size, mtime, inode, {expression}, rowid, parent "
+                f"FROM entries WHERE path = ?",
+                (os.path.normpath(str(path)),)
+            ).fetchone()
+            if row is None:
+                return None
+            is_dir, key, rowid, parent = row[2], row[6], row[7], row[8]
+            
+            position = 0
+            if not is_dir:
+                # All directories come first
+                position += self._conn.execute(
+                    "SELECT COUNT(*) FROM entries WHERE parent = ? AND is_dir = 1", (parent,)
+                ).fetchone()[0]
+            position += self._conn.execute(
+                f"SELECT COUNT(*) FROM entries WHERE parent = ? AND is_dir = ? "
+                f"AND {expression} {compare}= ? AND ({expression} {compare} ? OR rowid {compare} ?)",
+                (parent, is_dir, key, key, rowid)
+            ).fetchone()[0]
+        return self._row_to_dict(row), position
+    
+    def is_listed(self, directory):
+        """
+        Check whether a directory's entries are in the index.
+        
+        Args:
+            directory (str): Directory path
+        
+        Returns:
+            bool: True once catch-up has listed the directory
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime FROM entries WHERE path = ? AND is_dir = 1",
+                (os.path.normpath(str(directory)),)
+            ).fetchone()
+        return row is not None and row[0] != self.UNSCANNED_MTIME
+    
+    def search_names(self, text, limit=200, folder=None):
+        """
+        Find indexed files whose name contains the given text.
+        
+        Args:
+            text (str): Case-insensitive substring to look for
+            limit (int): Maximum number of results
+            folder (str): Only search below this folder (defaults to the whole location)
+        
+        Returns:
+            list: Dicts with 'path', 'name', 'is_dir', 'size', 'mtime' and 'inode'
+        """
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where, params = "root_id = ?", [self.root_id]
+        if folder is not None:
+            where += " AND path >= ? AND path < ?"
+            params.extend(prefix_range(os.path.normpath(str(folder))))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, name, is_dir, size, mtime, inode FROM entries "
+                f"WHERE {where} AND name LIKE ? ESCAPE '\\' "
+                "ORDER BY name LIMIT ?",
+                (*params, f"%{escaped}%", limit)
+            ).fetchall()
+        return [self._row_to_dict(r) for r in rows]
+    
+    @classmethod
+    def indexed_roots(cls, db_path=None):
+        """
+        Get the locations that have a root row, without creating the database.
+        
+        Args:
+            db_path (str): Database file (defaults to ~/.dms_client/index.db)
+        
+        Returns:
+            list: Root paths, or an empty list if there is no index yet
+        """
+        db_path = Path(db_path) if db_path is not None else cls.default_db_path()
+        if not db_path.exists():
+            return []
+        try:
+            conn = sqlite3.connect(f"{db_path.absolute().as_uri()}?mode=ro", uri=True)
+            try:
+                return [r[0] for r in conn.execute("SELECT path FROM roots")]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return []
+    
+    def get(self, path):
+        """
+        Get the indexed metadata of a single path.
+        
+        Args:
+            path (str): Path to look up
+        
+        Returns:
+            dict: Entry metadata, or None if the path is not indexed
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, name, is_dir, size, mtime, inode FROM entries WHERE path = ?",
+                (os.path.normpath(str(path)),)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+    
+    @staticmethod
+    def _row_to_dict(row):
+        """Convert a query row to an entry dict."""
+        return {
+            'path': row[0],
+            'name': row[1],
+            'is_dir': bool(row[2]),
+            'size': row[3],
+            'mtime': row[4],
+            'inode': row[5],
+        }
@@ -0,0 +1,88 @@
+"""Filename queries run off the GUI thread."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from services import metrics
+
+
+class NameSearcher(QObject):
+    """
+    Runs TrigramIndex.search() on a background thread.
+    
+    Ranking the matches of a short or common query over a large location
+    takes too long for the GUI thread. Results are emitted per search
+    stage: exact matches as soon as they are ranked, then again with the
+    fuzzy matches added. Only the latest query matters while the user
+    types: a query is skipped or abandoned once a newer one arrives, and
+    every result carries its request id so the caller can drop stale ones.
+    """
+    
+    results_ready = pyqtSignal(int, list, bool)  # Request id, paths so far, whether complete
+    
+    def __init__(self, parent=None):
+        """
+        Initialize name searcher.
+        
+        Args:
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self._pool = None
+        self._lock = threading.Lock()
+        self._latest_id = 0
+    
+    def search(self, name_index, text, limit):
+        """
+        Start a query; results_ready is emitted as its stages finish.
+        
+        Args:
+            name_index: TrigramIndex to query
+            text (str): Search text
+            limit (int): Maximum number of results
+        
+        Returns:
+            int: Request id used in results_ready
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='name-search')
+        with self._lock:
+            self._latest_id += 1
+            request_id = self._latest_id
+        self._pool.submit(self._search, request_id, name_index, text, limit)
+        return request_id
+    
+    def cancel(self):
+        """Skip the queries not run yet and abandon the running one."""
+        with self._lock:
+            self._latest_id += 1
+    
+    def _is_stale(self, request_id):
+        """Check whether a newer query has arrived since request_id."""
+        with self._lock:
+            return request_id != self._latest_id
+    
+    def _search(self, request_id, name_index, text, limit):
+        """Run one query (runs on the pool)."""
+        if self._is_stale(request_id):
+            return
+        paths = []
+        try:
+            with metrics.timer('search.names'):
+                stages = name_index.search_stages(
+                    text, limit, should_stop=lambda: self._is_stale(request_id)
+                )
+                for stage_paths in stages:
+                    if self._is_stale(request_id):
+                        return
+                    paths = paths + stage_paths
+                    self.results_ready.emit(request_id, paths, False)
+        except Exception as e:
+            print(f"Name search error: {e}")
+        self.results_ready.emit(request_id, paths, True)
+    
+    def shutdown(self):
+        """Skip queued queries and stop the worker thread."""
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,145 @@
+"""Shared SQLite connection handling for the on-disk indexes."""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from utils.config import Config
+
+
+def prefix_range(path):
+    """
+    Get the key range covering everything below a directory.
+    
+    Args:
+        path (str): Directory path
+    
+    Returns:
+        tuple: (low, high) such that low <= descendant < high
+    """
+    return path + os.sep, path + chr(ord(os.sep) + 1)
+
+
+class SqliteStore:
+    """
+    Base class for indexes stored in a SQLite file under ~/.dms_client.
+    
+    One connection per database file is shared between threads and
+    guarded by a lock, also by stores of different tracked locations that
+    live in the same file, so their writers queue up on the lock instead
+    of failing with "database is locked". The connection runs in
+    autocommit mode; writes are grouped with _transaction().
+    """
+    
+    DB_FILE_NAME = None  # Set by subclasses
+    
+    # Database path -> [connection, lock, number of open stores]
+    _shared_connections = {}
+    _shared_connections_lock = threading.Lock()
+    
+    # Tracked location of the store; journal offsets are kept per location
+    root_path = None
+    
+    def __init__(self, db_path=None):
+        """
+        Open (and create if needed) the database.
+        
+        Args:
+            db_path (str): Database file (defaults to ~/.dms_client/DB_FILE_NAME)
+        """
+        if db_path is None:
+            db_path = self.default_db_path()
+            db_path.parent.mkdir(exist_ok=True)
+        self.db_path = str(db_path)
+        with SqliteStore._shared_connections_lock:
+            shared = SqliteStore._shared_connections.get(self.db_path)
+            if shared is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                       isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                shared = [conn, threading.RLock(), 0]
+                SqliteStore._shared_connections[self.db_path] = shared
+            shared[2] += 1
+        self._conn, self._lock = shared[0], shared[1]
+        self._closed = False
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._create_schema()
+    
+    @classmethod
+    def default_db_path(cls):
+        """Get the database file used when no db_path is given."""
+        return Path.home() / Config.CONFIG_DIR_NAME / cls.DB_FILE_NAME
+    
+    def _create_schema(self):
+        """Create tables and indexes (runs inside a transaction)."""
+        raise NotImplementedError
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the lock and run the enclosed statements in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def get_meta(self, key, default=None):
+        """
+        Read a value from the store's key/value table.
+        
+        Args:
+            key (str): Key
+            default: Value returned if the key is missing
+        
+        Returns:
+            str: Stored value, or default
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+    
+    def set_meta(self, key, value):
+        """
+        Store a value in the store's key/value table.
+        
+        Args:
+            key (str): Key
+            value (str): Value (None removes the key)
+        """
+        with self._lock:
+            if value is None:
+                self._conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+                )
+    
+    @property
+    def journal_position(self):
+        """str: Change journal position the store is current up to, or None."""
+        return self.get_meta(f"journal_position:{self.root_path}")
+    
+    @journal_position.setter
+    def journal_position(self, position):
+        self.set_meta(f"journal_position:{self.root_path}", position)
+    
+    def close(self):
+        """Release the database connection; it is closed with the last store using it."""
+        with SqliteStore._shared_connections_lock:
+            if self._closed:
+                return
+            self._closed = True
+            shared = SqliteStore._shared_connections[self.db_path]
+            shared[2] -= 1
+            if shared[2] > 0:
+                return
+            del SqliteStore._shared_connections[self.db_path]
+        with self._lock:
+            self._conn.close()
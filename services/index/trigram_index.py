@@ -0,0 +1,326 @@
+"""In-memory trigram index for fast substring and fuzzy filename search."""
+import heapq
+import os
+import threading
+from array import array
+from services import events
+
+
+def trigrams(text):
+    """
+    Get the distinct trigrams of a string.
+    
+    Args:
+        text (str): Lowercase text
+    
+    Returns:
+        set: Three-character substrings
+    """
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _partial_edit_distance(pattern, text, max_distance):
+    """
+    Smallest edit distance between pattern and any substring of text.
+    
+    Args:
+        pattern (str): Query
+        text (str): Name to search in
+        max_distance (int): Stop early once every alignment exceeds this
+    
+    Returns:
+        int: Edit distance (max_distance + 1 if it is larger)
+    """
+    # Sellers' algorithm: matching may start anywhere in text at no cost
+    previous = [0] * (len(text) + 1)
+    for i, p in enumerate(pattern, 1):
+        current = [i]
+        best = i
+        for j, t in enumerate(text, 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (p != t),
+            )
+            current.append(value)
+            if value < best:
+                best = value
+        if best > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous)
+
+
+class TrigramIndex:
+    """
+    Trigram index over the file names under the tracked location.
+    
+    Postings are compact integer arrays. Removed names are tombstoned and
+    skipped during search; the postings are rebuilt once tombstones make up
+    a quarter of the index. All methods are thread-safe; rebuilds and
+    compactions build new postings aside and only lock out searches while
+    swapping them in.
+    """
+    
+    # Result ranks (lower sorts first)
+    _RANK_EXACT = 0
+    _RANK_PREFIX = 1
+    _RANK_SUBSTRING = 2
+    
+    # Shorter queries only get exact substring matches
+    MIN_FUZZY_QUERY_LENGTH = 4
+    
+    # Names scanned between should_stop checks for queries too short for trigrams
+    SCAN_CHUNK = 20000
+    
+    def __init__(self):
+        """Initialize an empty trigram index."""
+        self._lock = threading.Lock()  # Guards the index state against searches
+        self._write_lock = threading.Lock()  # Serializes updates
+        self._clear()
+    
+    def _clear(self):
+        """Reset all index state (caller holds the lock)."""
+        self._names = []  # Id -> lowercase name, or None if removed
+        self._paths = []  # Id -> path, or None if removed
+        self._ids = {}  # Path -> id
+        self._postings = {}  # Trigram -> array of ids
+        self._tombstones = 0
+    
+    def __len__(self):
+        """Number of names in the index."""
+        return len(self._ids)
+    
+    def rebuild(self, paths):
+        """
+        Replace the index contents.
+        
+        Args:
+            paths (iterable): File paths to index
+        """
+        with self._write_lock:
+            self._swap_in(paths)
+    
+    def _swap_in(self, paths):
+        """
+        Build fresh index state and replace the current one with it.
+        
+        The build runs without holding the lock so searches keep working
+        meanwhile. Caller holds the write lock.
+        
+        Args:
+            paths (iterable): File paths to index
+        """
+        fresh = TrigramIndex()
+        for path in paths:
+            fresh._add(path)
+        with self._lock:
+            self._names = fresh._names
+            self._paths = fresh._paths
+            self._ids = fresh._ids
+            self._postings = fresh._postings
+            self._tombstones = 0
+    
+    def _add(self, path):
+        """Add one path (caller holds the lock)."""
+        if path in self._ids:
+            return
+        name = os.path.basename(path).lower()
+        name_id = len(self._names)
+        self._names.append(name)
+        self._paths.append(path)
+        self._ids[path] = name_id
+        postings = self._postings
+        for gram in trigrams(name):
+            ids = postings.get(gram)
+            if ids is None:
+                postings[gram] = array('i', (name_id,))
+            else:
+                ids.append(name_id)
+    
+    def _remove(self, path):
+        """Tombstone one path (caller holds the lock)."""
+        name_id = self._ids.pop(path, None)
+        if name_id is None:
+            return
+        self._names[name_id] = None
+        self._paths[name_id] = None
+        self._tombstones += 1
+    
+    def _compact(self):
+        """Rebuild postings without tombstones (caller holds the write lock)."""
+        # Only updates change the paths, and they wait for the write lock
+        self._swap_in([p for p in self._paths if p is not None])
+    
+    def apply_changes(self, changes):
+        """
+        Update the index from a batch of file watcher changes.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        with self._write_lock:
+            with self._lock:
+                for event_type, src_path, dest_path in changes:
+                    if event_type == events.CREATED:
+                        self._add(os.path.normpath(src_path))
+                    elif event_type == events.DELETED:
+                        self._remove(os.path.normpath(src_path))
+                    elif event_type == events.MOVED:
+                        self._remove(os.path.normpath(src_path))
+                        self._add(os.path.normpath(dest_path))
+                    elif event_type == events.DIR_DELETED:
+                        # Also sent alone for a folder moved out of the location
+                        prefix = os.path.normpath(src_path) + os.sep
+                        for path in [p for p in self._ids if p.startswith(prefix)]:
+                            self._remove(path)
+                compact = self._tombstones > max(1000, len(self._names) // 4)
+            if compact:
+                self._compact()
+    
+    def search(self, query, limit=100, max_typos=1, should_stop=None):
+        """
+        Find file names containing the query, tolerating small typos.
+        
+        Exact substring matches come first (whole-name matches, then
+        prefixes, then other substrings, shorter names first). If there are
+        fewer than limit of those, names containing the query with up to
+        max_typos edits are added.
+        
+        Args:
+            query (str): Text to look for (case-insensitive)
+            limit (int): Maximum number of results
+            max_typos (int): Allowed edits for fuzzy matches
+            should_stop (callable): Optional; checked while searching, the
+                search gives up early once it returns True
+        
+        Returns:
+            list: Matching file paths, best first
+        """
+        results = []
+        for paths in self.search_stages(query, limit, max_typos, should_stop):
+            results.extend(paths)
+        return results
+    
+    def search_stages(self, query, limit=100, max_typos=1, should_stop=None):
+        """
+        Run search() one stage at a time.
+        
+        Exact substring matches are yielded as soon as they are ranked, so
+        they can be shown while the slower fuzzy matching still runs. The
+        lock is not held between stages. Arguments are those of search().
+        
+        Yields:
+            list: File paths, best first, following those already yielded
+        """
+        query = query.strip().lower()
+        if not query:
+            return
+        
+        with self._lock:
+            if len(query) < 3:
+                # Too short for trigrams - scan all names
+                results = self._scan(query, limit, should_stop)
+            else:
+                grams = self._rarest_first(trigrams(query))
+                rarest = self._postings.get(grams[0], ())
+                names = self._names
+                matches = [i for i in rarest if names[i] is not None and query in names[i]]
+                results = self._rank_substring(query, matches, limit)
+        yield results
+        
+        if (len(results) >= limit or max_typos <= 0
+                or len(query) < self.MIN_FUZZY_QUERY_LENGTH
+                or (should_stop is not None and should_stop())):
+            return
+        with self._lock:
+            grams = self._rarest_first(trigrams(query))
+            fuzzy = self._fuzzy(query, grams, set(results), limit - len(results), max_typos)
+        if fuzzy:
+            yield fuzzy
+    
+    def _rarest_first(self, grams):
+        """Order trigrams by posting list length (caller holds the lock)."""
+        return sorted(grams, key=lambda g: len(self._postings.get(g, ())))
+    
+    def _scan(self, query, limit, should_stop):
+        """
+        Rank the names containing a query too short for trigrams.
+        
+        Names are scanned in chunks, keeping only the best limit matches so
+        far, with should_stop checked between chunks. Caller holds the lock.
+        """
+        names = self._names
+        best = []
+        for start in range(0, len(names), self.SCAN_CHUNK):
+            if should_stop is not None and should_stop():
+                break
+            chunk = names[start:start + self.SCAN_CHUNK]
+            found = [start + i for i, n in enumerate(chunk) if n is not None and query in n]
+            if found:
+                best = self._best_ids(query, best + found, limit)
+        return [self._paths[i] for i in best]
+    
+    def _rank_substring(self, query, name_ids, limit):
+        """Order exact substring matches (caller holds the lock)."""
+        return [self._paths[i] for i in self._best_ids(query, name_ids, limit)]
+    
+    def _best_ids(self, query, name_ids, limit):
+        """
+        Pick the limit best-ranked names containing the query.
+        
+        Only the best limit are kept (a bounded heap), instead of sorting
+        every match. Caller holds the lock.
+        """
+        names = self._names
+        exact, prefix, substring = self._RANK_EXACT, self._RANK_PREFIX, self._RANK_SUBSTRING
+        
+        def rank(name_id):
+            name = names[name_id]
+            if not name.startswith(query):
+                return (substring, len(name), name)
+            if len(name) == len(query) or os.path.splitext(name)[0] == query:
+                return (exact, len(name), name)
+            return (prefix, len(name), name)
+        
+        return heapq.nsmallest(limit, name_ids, key=rank)
+    
+    def _fuzzy(self, query, grams, exclude, limit, max_typos):
+        """
+        Find names within max_typos edits of containing the query.
+        
+        Names whose path is in exclude (the exact matches) are skipped.
+        
+        Each edit destroys at most three trigrams, so a match must share at
+        least len(grams) - 3 * max_typos of them. By pigeonhole, every such
+        name appears in one of the rarest (3 * max_typos + 1) postings,
+        which is where candidates are drawn from.
+        
+        Caller holds the lock.
+        """
+        required = max(1, len(grams) - 3 * max_typos)
+        names = self._names
+        candidates = set()
+        for gram in grams[:len(grams) - required + 1]:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                candidates.update(ids)
+        
+        paths = self._paths
+        scored = []
+        for name_id in candidates:
+            name = names[name_id]
+            if name is None or paths[name_id] in exclude:
+                continue
+            shared = sum(1 for g in grams if g in name)
+            if shared >= required:
+                scored.append((-shared, len(name), name_id))
+        
+        results = []
+        # Only the best trigram overlaps are worth an exact edit distance
+        for _, _, name_id in heapq.nsmallest(limit * 4, scored):
+            if _partial_edit_distance(query, names[name_id], max_typos) <= max_typos:
+                results.append(paths[name_id])
+                if len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,298 @@
+"""Lightweight in-process metrics: counters, histograms and timers.
+
+Hot paths record what they did and how long it took so slowness reports
+come with numbers (Help > Diagnostics shows them and saves them as JSON).
+Collection is off by default; while it is off every call returns after a
+single flag check, and timer() hands out one shared no-op context manager.
+This module has no Qt dependency so non-GUI services can use it.
+
+Example:
+    with metrics.timer('browser.refresh'):
+        ...
+    metrics.increment('watcher.events')
+    metrics.observe('watcher.batch_size', len(changes), metrics.COUNT_BUCKETS)
+"""
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds of the histogram buckets; values above the last one land in
+# an overflow bucket
+TIME_BUCKETS_MS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000,
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 100000)
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}  # Name -> Counter
+_histograms = {}  # Name -> Histogram
+
+
+class Counter:
+    """Monotonic count of something that happened."""
+    
+    __slots__ = ('name', 'value')
+    
+    def __init__(self, name):
+        """
+        Initialize counter.
+        
+        Args:
+            name (str): Metric name
+        """
+        self.name = name
+        self.value = 0
+    
+    def to_dict(self):
+        """Describe the counter for a snapshot."""
+        return {'value': self.value}
+
+
+class Histogram:
+    """
+    Distribution of measured values over fixed buckets.
+    
+    Keeps the count, sum, minimum and maximum exactly; percentiles are
+    estimated from the bucket the rank falls in.
+    """
+    
+    __slots__ = ('name', 'bounds', 'buckets', 'count', 'total', 'minimum', 'maximum')
+    
+    def __init__(self, name, bounds=TIME_BUCKETS_MS):
+        """
+        Initialize histogram.
+        
+        Args:
+            name (str): Metric name
+            bounds (tuple): Ascending bucket upper bounds
+        """
+        self.name = name
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+    
+    def observe(self, value):
+        """Add a value (caller holds the lock)."""
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+    
+    def percentile(self, fraction):
+        """
+        Estimate a percentile.
+        
+        Args:
+            fraction (float): Percentile as a fraction, e.g. 0.95
+        
+        Returns:
+            float: Upper bound of the bucket holding the percentile (never
+                   above the maximum), or None without values
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(round(self.count * fraction)))
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(self.bounds):
+                    return min(self.bounds[index], self.maximum)
+                return self.maximum
+        return self.maximum
+    
+    def to_dict(self):
+        """Describe the histogram for a snapshot."""
+        labels = [str(bound) for bound in self.bounds] + ['inf']
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'min': self.minimum,
+            'max': self.maximum,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': {
+                label: bucket_count for label, bucket_count in zip(labels, self.buckets)
+                if bucket_count
+            },
+        }
+
+
+class _Timer:
+    """Context manager recording the time spent in its block, in milliseconds."""
+    
+    __slots__ = ('name', 'start')
+    
+    def __init__(self, name):
+        """
+        Initialize timer.
+        
+        Args:
+            name (str): Histogram name
+        """
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        """Start timing."""
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Record the elapsed time, also when the block raised."""
+        observe(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NullTimer:
+    """Timer handed out while collection is off."""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        """Do nothing."""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Do nothing."""
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def is_enabled():
+    """
+    Check whether metrics are being collected.
+    
+    Returns:
+        bool: True while collection is on
+    """
+    return _enabled
+
+
+def set_enabled(enabled):
+    """
+    Turn collection on or off. Values collected so far are kept.
+    
+    Args:
+        enabled (bool): Whether to collect metrics
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def increment(name, amount=1):
+    """
+    Add to a counter.
+    
+    Args:
+        name (str): Counter name
+        amount (int): Amount to add
+    """
+    if not _enabled:
+        return
+    with _lock:
+        counter = _counters.get(name)
+        if counter is None:
+            counter = _counters[name] = Counter(name)
+        counter.value += amount
+
+
+def observe(name, value, bounds=TIME_BUCKETS_MS):
+    """
+    Record a value in a histogram.
+    
+    Args:
+        name (str): Histogram name
+        value (float): Measured value (milliseconds for timings)
+        bounds (tuple): Bucket bounds, used when the histogram is created
+    """
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram(name, bounds)
+        histogram.observe(value)
+
+
+def timer(name):
+    """
+    Time a block into a histogram of milliseconds.
+    
+    Args:
+        name (str): Histogram name
+    
+    Returns:
+        Context manager; a shared no-op one while collection is off
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function (see timer()).
+    
+    Args:
+        name (str): Histogram name
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _Timer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """
+    Copy the current values.
+    
+    Returns:
+        dict: 'enabled', 'counters' (name -> dict) and 'histograms'
+              (name -> dict), names sorted
+    """
+    with _lock:
+        return {
+            'enabled': _enabled,
+            'counters': {name: _counters[name].to_dict() for name in sorted(_counters)},
+            'histograms': {name: _histograms[name].to_dict() for name in sorted(_histograms)},
+        }
+
+
+def reset():
+    """Drop all collected values."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def dump(path):
+    """
+    Write a snapshot to a JSON file.
+    
+    Args:
+        path (str): File to write
+    """
+    data = snapshot()
+    data['written'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,161 @@
+"""Writing multi-page PDFs one page at a time.
+
+Pages are compressed on their own by encode_page(), which can run on any
+thread, and PdfStreamWriter appends the compressed data to the file in
+page order. Each page's data is written once and never read back, so the
+cost of a page does not grow with the length of the document and memory
+use does not depend on the number of pages. This module has no Qt
+dependency so non-GUI services can use it.
+
+Example:
+    with open(path, 'wb') as output:
+        writer = PdfStreamWriter(output)
+        for image in pages:
+            writer.add_page(encode_page(image, dpi=300))
+        writer.finish()
+"""
+import io
+import zlib
+
+# JPEG quality of color and grayscale pages
+JPEG_QUALITY = 90
+
+
+class EncodedPage:
+    """A page image compressed for a PDF."""
+    
+    __slots__ = ('width', 'height', 'dpi', 'color_space', 'bits', 'pdf_filter', 'data')
+    
+    def __init__(self, width, height, dpi, color_space, bits, pdf_filter, data):
+        """
+        Initialize encoded page.
+        
+        Args:
+            width (int): Width in pixels
+            height (int): Height in pixels
+            dpi (float): Resolution the page size is derived from
+            color_space (str): 'DeviceRGB' or 'DeviceGray'
+            bits (int): Bits per component
+            pdf_filter (str): 'DCTDecode' (JPEG) or 'FlateDecode'
+            data (bytes): Compressed image data
+        """
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.color_space = color_space
+        self.bits = bits
+        self.pdf_filter = pdf_filter
+        self.data = data
+
+
+def encode_page(image, dpi=72):
+    """
+    Compress an image as a PDF page.
+    
+    Color and grayscale pages are stored as JPEG; black and white pages
+    are stored losslessly with zlib.
+    
+    Args:
+        image (PIL.Image): Page image
+        dpi (float): Scan resolution, for the page size
+    
+    Returns:
+        EncodedPage: Compressed page
+    """
+    width, height = image.size
+    if image.mode == '1':
+        # PIL and PDF both use 1 for white
+        data = zlib.compress(image.tobytes('raw', '1'), 6)
+        return EncodedPage(width, height, dpi, 'DeviceGray', 1, 'FlateDecode', data)
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY)
+    color_space = 'DeviceGray' if image.mode == 'L' else 'DeviceRGB'
+    return EncodedPage(width, height, dpi, color_space, 8, 'DCTDecode', buffer.getvalue())
+
+
+class PdfStreamWriter:
+    """
+    Appends encoded pages to a PDF written to a binary file.
+    
+    Objects 1 and 2 are reserved for the catalog and the page tree, which
+    are written by finish() once all pages are known.
+    """
+    
+    def __init__(self, output):
+        """
+        Write the PDF header.
+        
+        Args:
+            output: Binary file to write, positioned at its start
+        """
+        self._file = output
+        self._start = output.tell()
+        self._offsets = {}  # Object number -> byte offset
+        self._next_object = 3
+        self._page_objects = []
+        self._finished = False
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    
+    @property
+    def page_count(self):
+        """int: Number of pages written so far."""
+        return len(self._page_objects)
+    
+    def _write_object(self, number, body, stream=None):
+        """Write an object, optionally followed by stream data."""
+        self._offsets[number] = self._file.tell() - self._start
+        self._file.write(f'{number} 0 obj\n'.encode('ascii'))
+        self._file.write(body.encode('ascii'))
+        if stream is not None:
+            self._file.write(b'\nstream\n')
+            self._file.write(stream)
+            self._file.write(b'\nendstream')
+        self._file.write(b'\nendobj\n')
+    
+    def add_page(self, page):
+        """
+        Append a page.
+        
+        Args:
+            page (EncodedPage): Page from encode_page()
+        """
+        image_object, content_object, page_object = range(self._next_object, self._next_object + 3)
+        self._next_object += 3
+        width_pt = page.width * 72.0 / page.dpi
+        height_pt = page.height * 72.0 / page.dpi
+        
+        self._write_object(
+            image_object,
+            f'<< /Type /XObject /Subtype /Image /Width {page.width} /Height {page.height} '
+            f'/ColorSpace /{page.color_space} /BitsPerComponent {page.bits} '
+            f'/Filter /{page.pdf_filter} /Length {len(page.data)} >>',
+            page.data
+        )
+        content = f'q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q'.encode('ascii')
+        self._write_object(content_object, f'<< /Length {len(content)} >>', content)
+        self._write_object(
+            page_object,
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] '
+            f'/Resources << /XObject << /Im0 {image_object} 0 R >> >> '
+            f'/Contents {content_object} 0 R >>'
+        )
+        self._page_objects.append(page_object)
+    
+    def finish(self):
+        """Write the page tree, catalog and cross-reference table (the file stays open)."""
+        if self._finished:
+            return
+        kids = ' '.join(f'{number} 0 R' for number in self._page_objects)
+        self._write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_objects)} >>')
+        self._write_object(1, '<< /Type /Catalog /Pages 2 0 R >>')
+        
+        xref_offset = self._file.tell() - self._start
+        size = self._next_object
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for number in range(1, size):
+            lines.append(f'{self._offsets[number]:010d} 00000 n \n')
+        lines.append(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n')
+        self._file.write(''.join(lines).encode('ascii'))
+        self._finished = True
@@ -0,0 +1,183 @@
+"""Reading PNM images (scanimage's output format) straight from a stream.
+
+The header gives the image size, so the pixel data is read with readinto()
+into one buffer of exactly that size and handed to Pillow without another
+copy for the common 8-bit formats. Pages written back to back (as with
+scanimage batch scans) are read one after the other from the same stream.
+This module has no Qt dependency so non-GUI services can use it.
+
+Example:
+    page = pnm_stream.read_page(process.stdout, progress=report)
+    if page is not None:
+        image = pnm_stream.to_image(*page)
+"""
+
+# Bytes read per readinto() call; progress is reported after each one
+CHUNK_SIZE = 1024 * 1024
+
+# Magic number -> (Pillow mode, raw mode, samples per pixel) for 8-bit data;
+# PBM uses 1 for black, Pillow's "1" mode 0, hence the inverted raw mode
+FORMATS = {
+    b'P4': ('1', '1;I', 1),
+    b'P5': ('L', 'L', 1),
+    b'P6': ('RGB', 'RGB', 3),
+}
+
+_WHITESPACE = b' \t\r\n\v\f'
+
+
+class PnmError(ValueError):
+    """The stream does not hold a complete binary PNM image."""
+
+
+class PnmHeader:
+    """Size and sample format of a PNM image."""
+    
+    __slots__ = ('magic', 'width', 'height', 'maxval', 'raw')
+    
+    def __init__(self, magic, width, height, maxval, raw):
+        """
+        Initialize header.
+        
+        Args:
+            magic (bytes): b'P4', b'P5' or b'P6'
+            width (int): Width in pixels
+            height (int): Height in pixels
+            maxval (int): Largest sample value (1 for P4)
+            raw (bytes): Header bytes as read, including the final whitespace
+        """
+        self.magic = magic
+        self.width = width
+        self.height = height
+        self.maxval = maxval
+        self.raw = raw
+    
+    @property
+    def data_size(self):
+        """int: Number of bytes of pixel data following the header."""
+        if self.magic == b'P4':
+            return (self.width + 7) // 8 * self.height
+        sample_size = 1 if self.maxval < 256 else 2
+        return self.width * self.height * FORMATS[self.magic][2] * sample_size
+
+
+def _read_token(stream, raw):
+    """
+    Read one header token, skipping whitespace and comments.
+    
+    Args:
+        stream: Binary stream positioned inside the header
+        raw (bytearray): Header bytes read so far, extended in place
+    
+    Returns:
+        bytes: Token (the whitespace after it has been read too)
+    """
+    token = bytearray()
+    while True:
+        char = stream.read(1)
+        if not char:
+            raise PnmError("Stream ended inside the PNM header")
+        raw += char
+        if char == b'#' and not token:
+            # Comment runs to the end of the line
+            while char not in (b'', b'\n', b'\r'):
+                char = stream.read(1)
+                raw += char
+            continue
+        if char in _WHITESPACE:
+            if token:
+                return bytes(token)
+            continue
+        token += char
+        if len(token) > 10:
+            raise PnmError("Invalid PNM header")
+
+
+def read_header(stream):
+    """
+    Read a PNM header.
+    
+    Args:
+        stream: Binary stream positioned at the start of an image
+    
+    Returns:
+        PnmHeader: Parsed header, or None if the stream is at its end
+    """
+    magic = stream.read(2)
+    if not magic:
+        return None
+    if magic not in FORMATS:
+        raise PnmError(f"Not a binary PNM image (starts with {magic!r})")
+    raw = bytearray(magic)
+    try:
+        width = int(_read_token(stream, raw))
+        height = int(_read_token(stream, raw))
+        maxval = 1 if magic == b'P4' else int(_read_token(stream, raw))
+    except ValueError as e:
+        if isinstance(e, PnmError):
+            raise
+        raise PnmError("Invalid PNM header") from None
+    if width <= 0 or height <= 0 or not 0 < maxval < 65536:
+        raise PnmError(f"Invalid PNM size {width}x{height}, maxval {maxval}")
+    return PnmHeader(magic, width, height, maxval, bytes(raw))
+
+
+def read_page(stream, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Read one image from a stream into a buffer sized from its header.
+    
+    Args:
+        stream: Binary stream with a readinto() method, e.g. a pipe
+        progress (callable): Called with (bytes received, bytes expected)
+            after each chunk, header included
+        chunk_size (int): Largest read, in bytes
+    
+    Returns:
+        tuple: (PnmHeader, bytearray of pixel data), or None if the stream
+               ended before another image started
+    """
+    header = read_header(stream)
+    if header is None:
+        return None
+    size = header.data_size
+    total = len(header.raw) + size
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    if progress:
+        progress(len(header.raw), total)
+    while received < size:
+        count = stream.readinto(view[received:received + chunk_size])
+        if not count:
+            raise PnmError(f"Image data ended after {received} of {size} bytes")
+        received += count
+        if progress:
+            progress(len(header.raw) + received, total)
+    view.release()
+    return header, buffer
+
+
+def to_image(header, buffer):
+    """
+    Decode pixel data read by read_page().
+    
+    8-bit grayscale data is used in place; other formats are unpacked once.
+    
+    Args:
+        header (PnmHeader): Header of the image
+        buffer (bytearray): Pixel data
+    
+    Returns:
+        PIL.Image: Decoded image
+    """
+    from PIL import Image
+    
+    size = (header.width, header.height)
+    if header.maxval == 255 or header.magic == b'P4':
+        mode, rawmode, _ = FORMATS[header.magic]
+        return Image.frombuffer(mode, size, buffer, 'raw', rawmode, 0, 1)
+    # 16-bit or unusual maxval: let Pillow's PNM decoder scale the samples
+    import io
+    image = Image.open(io.BytesIO(header.raw + buffer))
+    image.load()
+    return image
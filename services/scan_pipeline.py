@@ -0,0 +1,168 @@
+"""Concurrent acquire, encode and write stages for multi-page scans.
+
+The scanner is the slow part of a batch scan, so it should never wait for
+compression or disk writes. ScanPipeline runs acquisition on one thread,
+hands every page to a pool of encoder threads and writes the results in
+page order on a writer thread. The stages are connected by bounded queues,
+so a fast scanner stalls instead of piling up pages in memory, and while
+page N is compressed and written page N+1 is already being scanned.
+
+Progress is passed back as events and delivered on the thread that called
+run(), which is the only thread that should emit Qt signals. This module
+has no Qt dependency so non-GUI services can use it.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PipelineStopped(Exception):
+    """Raised into the acquisition stage when another stage failed."""
+
+
+class ScanPipeline:
+    """Runs one multi-page scan through the acquire, encode and write stages."""
+    
+    # Encoder threads; pages are scanned far slower than they are compressed
+    ENCODE_WORKERS = 2
+    
+    # Pages that may wait between acquisition and writing, besides the one
+    # being acquired and the one being written
+    QUEUE_SIZE = 2
+    
+    # Event kinds passed to on_event
+    EVENT_PROGRESS = 'progress'  # Arguments reported by the acquisition stage
+    EVENT_WRITTEN = 'written'  # (pages written, pages per minute)
+    
+    _DONE = object()
+    
+    def __init__(self, encode, write, workers=ENCODE_WORKERS, queue_size=QUEUE_SIZE):
+        """
+        Initialize pipeline.
+        
+        Args:
+            encode (callable): Compresses a page image; runs on the encoder
+                threads, several pages at once
+            write (callable): Writes an encoded page; runs on the writer
+                thread, one page at a time in page order
+            workers (int): Number of encoder threads
+            queue_size (int): Encoded or encoding pages waiting for the writer
+        """
+        self.encode = encode
+        self.write = write
+        self.workers = workers
+        self.pages_written = 0
+        self._encoded = queue.Queue(maxsize=queue_size)  # Futures, in page order
+        self._events = queue.Queue()
+        self._stop = threading.Event()
+        self._errors = []
+        self._start_time = None
+    
+    def _fail(self, error, stop=True):
+        """
+        Record the first error and, unless told otherwise, stop the other stages.
+        
+        Args:
+            error (BaseException): Error raised by a stage
+            stop (bool): Stop the writer and acquisition; False when the
+                acquisition stage itself failed, since the pages it already
+                queued have gone through the scanner and must still be written
+        """
+        if not self._errors:
+            self._errors.append(error)
+        if stop:
+            self._stop.set()
+    
+    def _put(self, channel, item):
+        """Put into a bounded queue, giving up when the pipeline stops."""
+        while True:
+            if self._stop.is_set():
+                raise PipelineStopped()
+            try:
+                channel.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def _acquire(self, acquire, pool):
+        """Acquisition stage: submit every page to the encoder pool."""
+        def put_page(image):
+            self._put(self._encoded, pool.submit(self.encode, image))
+        
+        def report(*args):
+            self._events.put((self.EVENT_PROGRESS, args))
+        
+        try:
+            acquire(put_page, report)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            # The writer still writes the pages queued so far
+            self._fail(e, stop=False)
+        finally:
+            # The writer always gets the end marker, even when stopping
+            self._encoded.put(self._DONE)
+    
+    def _write_pages(self):
+        """Writer stage: write encoded pages in the order they were scanned."""
+        try:
+            while True:
+                future = self._encoded.get()
+                if future is self._DONE:
+                    return
+                if self._stop.is_set():
+                    future.cancel()
+                    continue
+                try:
+                    self.write(future.result())
+                except BaseException as e:
+                    self._fail(e)
+                    continue
+                self.pages_written += 1
+                minutes = (time.perf_counter() - self._start_time) / 60
+                self._events.put((self.EVENT_WRITTEN, (self.pages_written, self.pages_written / minutes)))
+        finally:
+            self._events.put((self._DONE, ()))
+    
+    def run(self, acquire, on_event=None):
+        """
+        Scan, encode and write pages until the acquisition stage is done.
+        
+        Args:
+            acquire (callable): Acquisition stage, called on its own thread
+                with (put_page, report). It calls put_page(image) for every
+                page (which blocks while the queues are full and raises
+                PipelineStopped if a later stage failed) and report(*args)
+                to pass progress to on_event.
+            on_event (callable): Called on this thread with (kind, args)
+                for EVENT_PROGRESS and EVENT_WRITTEN events
+        
+        Returns:
+            int: Number of pages written
+        
+        Raises:
+            Exception: The first error raised by any stage, once all
+                stages have stopped (pages_written tells how far it got).
+                Pages acquired before an acquisition error are written
+                first; an encoding or writing error drops the pages after it.
+        """
+        self._start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan-encode') as pool:
+            acquirer = threading.Thread(
+                target=self._acquire, args=(acquire, pool), name='scan-acquire', daemon=True
+            )
+            writer = threading.Thread(target=self._write_pages, name='scan-write', daemon=True)
+            writer.start()
+            acquirer.start()
+            while True:
+                kind, args = self._events.get()
+                if kind is self._DONE:
+                    break
+                if on_event:
+                    on_event(kind, args)
+            acquirer.join()
+            writer.join()
+        if self._errors:
+            raise self._errors[0]
+        return self.pages_written
@@ -0,0 +1,114 @@
+"""The scanners found last time, cached in ~/.dms_client/scanners.json.
+
+Asking SANE for its devices takes seconds (network scanners are probed
+until they time out), so the scanner dialog shows the cached list at once
+and checks it with a detection in the background. Only what is needed to
+list and open a scanner is stored: its SANE device name, vendor and model.
+This module has no Qt dependency so non-GUI services can use it.
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from utils.config import Config
+
+
+class ScannerCache:
+    """Scanner list saved by the last detection, valid for TTL seconds."""
+    
+    FILE_NAME = "scanners.json"
+    
+    # Seconds a detection result is shown without being confirmed; after
+    # that the dialog waits for a new detection as it used to
+    TTL = 24 * 60 * 60
+    
+    # Keys of a scanner info dict that are saved
+    FIELDS = ('name', 'vendor', 'model')
+    
+    def __init__(self, cache_file=None, ttl=TTL):
+        """
+        Initialize scanner cache.
+        
+        Args:
+            cache_file (str): Cache file (defaults to ~/.dms_client/scanners.json)
+            ttl (float): Seconds a saved scanner list stays valid
+        """
+        if cache_file is None:
+            cache_file = Path.home() / Config.CONFIG_DIR_NAME / self.FILE_NAME
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+    
+    def _read(self):
+        """Get the parsed cache file, or None if it is missing or unreadable."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get('scanners'), list):
+            return None
+        if not isinstance(data.get('saved_at'), (int, float)):
+            return None
+        return data
+    
+    def age(self):
+        """
+        Get the time since the scanner list was saved.
+        
+        Returns:
+            float: Seconds since the last detection, or None if there is no cache
+        """
+        data = self._read()
+        if data is None:
+            return None
+        return max(0.0, time.time() - data['saved_at'])
+    
+    def load(self):
+        """
+        Get the saved scanner list.
+        
+        Returns:
+            list: Scanner info dicts (name, vendor, model), or None if
+                  nothing was saved or the list is older than the TTL
+        """
+        data = self._read()
+        if data is None or time.time() - data['saved_at'] > self.ttl:
+            return None
+        scanners = []
+        for scanner in data['scanners']:
+            if isinstance(scanner, dict) and isinstance(scanner.get('name'), str):
+                scanners.append({key: scanner.get(key, 'Unknown') for key in self.FIELDS})
+        return scanners
+    
+    def save(self, scanners):
+        """
+        Replace the saved scanner list.
+        
+        The file is written under a temporary name and renamed into place,
+        so a dialog opening meanwhile never reads half a list.
+        
+        Args:
+            scanners (list): Scanner info dicts from detect_scanners()
+        """
+        data = {
+            'saved_at': time.time(),
+            'scanners': [
+                {key: str(scanner.get(key, 'Unknown')) for key in self.FIELDS}
+                for scanner in scanners
+            ],
+        }
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                prefix=f".{self.FILE_NAME}.", suffix=".tmp", dir=self.cache_file.parent
+            )
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(temp_path, self.cache_file)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            print(f"Error saving scanner cache: {e}")
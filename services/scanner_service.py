@@ -1,11 +1,13 @@
 """Scanner service for detecting and using scanners."""
 import platform
 import subprocess
-import tempfile
-import os
+import threading
 from pathlib import Path
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
-from PIL import Image
+from services import metrics, pdf_stream, pnm_stream
+from services.document_writer import AtomicFile, write_document
+from services.scan_pipeline import ScanPipeline
+from services.scanner_cache import ScannerCache
 
 
 class ScannerService(QObject):
@@ -16,6 +18,12 @@ class ScannerService(QObject):
     scan_complete = pyqtSignal(object)  # PIL Image object
     scan_error = pyqtSignal(str)  # Error message
     scan_progress = pyqtSignal(str)  # Progress message
+    scan_bytes = pyqtSignal(int, int)  # Bytes received, bytes expected
+    page_saved = pyqtSignal(int, float)  # Pages of a batch scan saved so far, pages per minute
+    batch_complete = pyqtSignal(str, int)  # PDF path, number of pages
+    
+    # Seconds scanimage may take for one page before it is stopped
+    SCANIMAGE_TIMEOUT = 60
     
     def __init__(self, parent=None):
         """
@@ -27,15 +35,49 @@ class ScannerService(QObject):
         super().__init__(parent)
         self.available_scanners = []
         self.current_scanner = None
+        self.scanner_cache = ScannerCache()
+        # Held while SANE is asked for devices or a scan runs, so a
+        # background detection never opens the scanner during a scan
+        self.device_lock = threading.Lock()
     
+    def cached_scanners(self):
+        """
+        Get the scanners found by the last detection, without detecting.
+        
+        The cached list is also used for scanning until detect_scanners()
+        replaces it.
+        
+        Returns:
+            list: Scanner info dicts (without 'device'), or None if there is
+                  no recent detection to go by
+        """
+        scanners = self.scanner_cache.load()
+        if scanners is not None:
+            self.available_scanners = scanners
+        return scanners
+    
+    @metrics.timed('scanner.detect')
     def detect_scanners(self):
         """
-        Detect available scanners on the system.
+        Detect available scanners on the system and update the scanner cache.
         
         Returns:
-            list: List of scanner device names (empty list if none found or error)
+            list: List of scanner info dicts (empty list if none found or error)
         """
-        self.available_scanners = []
+        with self.device_lock:
+            scanners = self._find_scanners()
+        self.available_scanners = scanners
+        self.scanner_cache.save(scanners)
+        return scanners
+    
+    def _find_scanners(self):
+        """
+        Ask pyinsane2 for the scanners on the system.
+        
+        Returns:
+            list: List of scanner info dicts (empty list if none found or error)
+        """
+        scanners = []
         try:
             # Try to import pyinsane2
             import pyinsane2
@@ -84,12 +126,12 @@ class ScannerService(QObject):
                         except:
                             pass
                         
-                        self.available_scanners.append(scanner_info)
+                        scanners.append(scanner_info)
                         print(f"Found scanner: {scanner_info['vendor']} {scanner_info['model']} ({device.name})")
                     except Exception as device_error:
                         print(f"Error processing device {device}: {device_error}")
                         # Still add it with minimal info
-                        self.available_scanners.append({
+                        scanners.append({
                             'name': str(device),
                             'vendor': 'Unknown',
                             'model': 'Unknown',
@@ -100,7 +142,7 @@ class ScannerService(QObject):
             # 2. pyinsane2 handles cleanup internally
             # 3. Each scan_document() call will handle its own init/exit
             
-            return self.available_scanners
+            return scanners
         except ImportError:
             # pyinsane2 not installed - this is OK, just return empty list
             # Only print once by checking if we've already warned
@@ -134,6 +176,173 @@ class ScannerService(QObject):
             print(f"Error resetting scanner state: {e}")
             return False
     
+    def _scanimage_choices(self, device_name, option):
+        """
+        Ask scanimage which values an option of a device accepts.
+        
+        Args:
+            device_name (str): SANE device name
+            option (str): Option name without dashes, e.g. 'mode' or 'source'
+        
+        Returns:
+            list: Accepted values (empty if scanimage could not tell)
+        """
+        # Query scanimage directly; this avoids needing to access
+        # scanner.options which might be locked
+        try:
+            query_cmd = ['scanimage', '--device-name', device_name, f'--{option}', 'help']
+            result = subprocess.run(query_cmd, capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                # Parse output to get the options
+                # Format is usually: value1|value2|value3 [default]
+                output = result.stdout.strip()
+                # Extract options (everything before the bracket or newline)
+                if '|' in output:
+                    choice_part = output.split('[')[0].strip() if '[' in output else output.split('\n')[0].strip()
+                    choices = [c.strip() for c in choice_part.split('|')]
+                    print(f"Available scanner {option}s from scanimage: {choices}")
+                    return choices
+        except Exception as query_error:
+            print(f"Could not query scanner {option}s (will use scanner default): {query_error}")
+        # If we can't get the options, scanimage will use the default - that's fine
+        return []
+    
+    def _scanimage_command(self, device_name, resolution, mode):
+        """
+        Build the scanimage command line for a scan.
+        
+        Args:
+            device_name (str): SANE device name
+            resolution (int): DPI resolution
+            mode (str): Color mode ('Color', 'Gray', 'Lineart')
+        
+        Returns:
+            list: Command writing PNM to stdout
+        """
+        # Map our mode to the scanner's own mode names
+        scan_mode = None
+        mode_lower = mode.lower()
+        for m in self._scanimage_choices(device_name, 'mode'):
+            m_str = m.lower()
+            if mode_lower == 'color' and ('color' in m_str or '24bit' in m_str):
+                scan_mode = m
+            elif mode_lower == 'gray' and 'gray' in m_str and 'error' not in m_str:
+                scan_mode = m
+            elif mode_lower == 'lineart' and ('black' in m_str or 'white' in m_str):
+                scan_mode = m
+            if scan_mode:
+                print(f"Using mode: {scan_mode}")
+                break
+        
+        cmd = [
+            'scanimage',
+            '--device-name', device_name,
+            '--resolution', str(resolution),
+            '--format', 'pnm'  # Use PNM format (scanimage standard)
+        ]
+        
+        # Only add mode option if we found a valid one
+        # Use exact mode string from scanner (may contain spaces/special chars)
+        if scan_mode:
+            # scanimage accepts the mode string as-is, even with spaces/brackets
+            cmd.extend(['--mode', scan_mode])
+        return cmd
+    
+    def _read_scanimage(self, cmd, page_handler, max_pages=None, progress=None):
+        """
+        Run scanimage and read the images it writes to stdout.
+        
+        The PNM header tells how large each image is, so the data is read
+        from the pipe straight into a buffer of that size (no temporary
+        file) and scan_bytes reports it as it arrives. Each page is handed
+        on as soon as it is complete; nothing keeps it afterwards.
+        
+        Args:
+            cmd (list): scanimage command line, with --format pnm
+            page_handler (callable): Called with (page number, PIL.Image)
+                for every page, numbered from 1
+            max_pages (int): Stop after this many pages (default: until
+                scanimage stops writing)
+            progress (callable): Called with (bytes received, bytes expected)
+                of the current page (default: emit scan_bytes)
+        
+        Returns:
+            tuple: (number of pages read, exit status, stderr output)
+        """
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # stderr is drained alongside so scanimage can never block on it
+        stderr_chunks = []
+        stderr_thread = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True
+        )
+        stderr_thread.start()
+        timed_out = threading.Event()
+        
+        def stop():
+            timed_out.set()
+            process.kill()
+        
+        killer = None
+        pages = 0
+        read_error = None
+        try:
+            while max_pages is None or pages < max_pages:
+                # Every page gets the full timeout
+                killer = threading.Timer(self.SCANIMAGE_TIMEOUT, stop)
+                killer.start()
+                try:
+                    with metrics.timer('scanner.acquire'):
+                        page = pnm_stream.read_page(process.stdout, progress or self.scan_bytes.emit)
+                except pnm_stream.PnmError as e:
+                    read_error = e
+                    break
+                finally:
+                    killer.cancel()
+                if page is None:
+                    break
+                pages += 1
+                with metrics.timer('scanner.decode'):
+                    image = pnm_stream.to_image(*page)
+                del page
+                page_handler(pages, image)
+                del image
+        finally:
+            if killer is not None:
+                killer.cancel()
+            process.stdout.close()
+            if process.poll() is None and (max_pages is None or pages < max_pages):
+                # Stopped early (error or handler failure): don't wait for more pages
+                process.kill()
+            returncode = process.wait()
+            stderr_thread.join()
+            process.stderr.close()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, self.SCANIMAGE_TIMEOUT)
+        error_output = b''.join(stderr_chunks).decode('utf-8', errors='ignore')
+        
+        if read_error is not None:
+            print(f"Error reading scanimage output: {read_error}")
+            if returncode != 0 or error_output:
+                raise Exception(f"scanimage produced invalid output: {error_output or read_error}")
+            raise read_error
+        return pages, returncode, error_output
+    
+    @staticmethod
+    def _scanimage_errors(error_output):
+        """
+        Get the lines of scanimage's stderr that are actual errors.
+        
+        Args:
+            error_output (str): scanimage stderr output
+        
+        Returns:
+            str: Error lines, without warnings (empty if there are none)
+        """
+        error_lines = [line for line in error_output.split('\n') 
+                     if line and 'rounded value' not in line.lower() 
+                     and 'warning' not in line.lower()]
+        return '\n'.join(error_lines)
+    
     def _scan_with_scanimage(self, scanner, resolution, mode, format_type, device_name=None):
         """
         Fallback method using scanimage command-line tool.
@@ -157,136 +366,31 @@ class ScannerService(QObject):
                 else:
                     raise Exception("Cannot determine scanner device name")
             
-            # Try to get valid mode - query scanimage directly for mode options
-            # This avoids needing to access scanner.options which might be locked
-            use_mode_option = False
-            scan_mode = None
-            
-            # Query scanimage for mode constraint
-            try:
-                query_cmd = ['scanimage', '--device-name', device_name, '--mode', 'help']
-                result = subprocess.run(query_cmd, capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    # Parse output to get mode options
-                    # Format is usually: mode1|mode2|mode3 [default]
-                    output = result.stdout.strip()
-                    # Extract mode options (everything before the bracket or newline)
-                    if '|' in output:
-                        mode_part = output.split('[')[0].strip() if '[' in output else output.split('\n')[0].strip()
-                        available_modes = [m.strip() for m in mode_part.split('|')]
-                        print(f"Available scanner modes from scanimage: {available_modes}")
-                        
-                        # Map our mode to available modes
-                        mode_lower = mode.lower()
-                        if mode_lower == 'color':
-                            for m in available_modes:
-                                m_str = m.lower()
-                                if 'color' in m_str or '24bit' in m_str:
-                                    scan_mode = m
-                                    use_mode_option = True
-                                    print(f"Using mode: {scan_mode}")
-                                    break
-                        elif mode_lower == 'gray':
-                            for m in available_modes:
-                                m_str = m.lower()
-                                if 'gray' in m_str and 'error' not in m_str:
-                                    scan_mode = m
-                                    use_mode_option = True
-                                    print(f"Using mode: {scan_mode}")
-                                    break
-                        elif mode_lower == 'lineart':
-                            for m in available_modes:
-                                m_str = m.lower()
-                                if 'black' in m_str or 'white' in m_str:
-                                    scan_mode = m
-                                    use_mode_option = True
-                                    print(f"Using mode: {scan_mode}")
-                                    break
-            except Exception as mode_error:
-                print(f"Could not query scanner modes (will use scanner default): {mode_error}")
-                # If we can't get modes, scanimage will use default - that's fine
-                pass
+            cmd = self._scanimage_command(device_name, resolution, mode)
+            self.scan_progress.emit("Scanning with scanimage...")
+            print(f"Running scanimage command: {' '.join(cmd)}")
             
-            # Create temp file for output
-            with tempfile.NamedTemporaryFile(suffix='.pnm', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
+            # scanimage outputs image data to stdout; it is read from the pipe
+            # into memory as it arrives
+            images = []
+            _, returncode, error_output = self._read_scanimage(
+                cmd, lambda number, page_image: images.append(page_image), max_pages=1
+            )
             
-            try:
-                # Build scanimage command
-                cmd = [
-                    'scanimage',
-                    '--device-name', device_name,
-                    '--resolution', str(resolution),
-                    '--format', 'pnm'  # Use PNM format (scanimage standard)
-                ]
-                
-                # Only add mode option if we found a valid one
-                # Use exact mode string from scanner (may contain spaces/special chars)
-                if use_mode_option and scan_mode:
-                    # scanimage accepts the mode string as-is, even with spaces/brackets
-                    cmd.extend(['--mode', scan_mode])
-                
-                self.scan_progress.emit("Scanning with scanimage...")
-                print(f"Running scanimage command: {' '.join(cmd)}")
-                
-                # Run scanimage and save to temp file
-                # scanimage outputs image data to stdout
-                with open(tmp_path, 'wb') as out_file:
-                    result = subprocess.run(
-                        cmd,
-                        stdout=out_file,
-                        stderr=subprocess.PIPE,
-                        timeout=60  # 60 second timeout
-                    )
-                
-                # Check if we got actual image data
-                file_size = os.path.getsize(tmp_path) if os.path.exists(tmp_path) else 0
-                error_output = result.stderr.decode('utf-8', errors='ignore')
-                
-                # scanimage may return 0 even if it fails, or non-zero but still produce output
-                # Check for actual image data first
-                if file_size > 100:  # PNM files should be at least 100 bytes
-                    try:
-                        # Try to read the image file
-                        image = Image.open(tmp_path)
-                        print(f"scanimage produced image: {type(image)}, size: {image.size}")
-                        # Success - we have an image despite any error messages
-                    except Exception as img_open_error:
-                        print(f"Error opening scanimage output: {img_open_error}")
-                        # If we can't open it, check the error
-                        if result.returncode != 0 or error_output:
-                            raise Exception(f"scanimage produced invalid output: {error_output}")
-                        raise
-                else:
-                    # No output file or file is too small (invalid)
-                    if result.returncode != 0 or error_output:
-                        # Filter out warning messages - check for actual errors
-                        error_lines = [line for line in error_output.split('\n') 
-                                     if line and 'rounded value' not in line.lower() 
-                                     and 'warning' not in line.lower()]
-                        if error_lines:
-                            error_msg = '\n'.join(error_lines)
-                            print(f"scanimage failed: {error_msg}")
-                            raise Exception(f"scanimage error: {error_msg}")
-                    raise Exception("scanimage produced no output - document may not be in scanner")
-                
-                # Convert format if needed
-                if format_type.upper() == 'JPEG':
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                elif format_type.upper() == 'PDF':
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                
-                return image
-                
-            finally:
-                # Clean up temp file
-                try:
-                    if os.path.exists(tmp_path):
-                        os.unlink(tmp_path)
-                except:
-                    pass
+            # scanimage may return 0 even if it fails, or non-zero but still produce output
+            # Check for actual image data first
+            if not images:
+                if returncode != 0 or error_output:
+                    # Filter out warning messages - check for actual errors
+                    error_msg = self._scanimage_errors(error_output)
+                    if error_msg:
+                        print(f"scanimage failed: {error_msg}")
+                        raise Exception(f"scanimage error: {error_msg}")
+                raise Exception("scanimage produced no output - document may not be in scanner")
+            image = images[0]
+            print(f"scanimage produced image: {type(image)}, size: {image.size}")
+            # Conversion for the save format is left to document_writer
+            return image
                     
         except FileNotFoundError:
             raise Exception("scanimage command not found. Install with: sudo apt install sane-utils")
@@ -295,8 +399,168 @@ class ScannerService(QObject):
         except Exception as e:
             raise Exception(f"scanimage error: {str(e)}")
     
+    def _get_device_name(self, scanner_index):
+        """
+        Get the SANE device name of a scanner.
+        
+        Args:
+            scanner_index (int): Index of the scanner
+        
+        Returns:
+            str: Device name, or None (scan_error has been emitted)
+        """
+        with metrics.timer('scanner.device_lookup'):
+            # Get device name - prefer from stored scanner list to avoid pyinsane2 conflicts
+            if self.available_scanners and scanner_index < len(self.available_scanners):
+                # Use stored device name from detect_scanners()
+                device_name = self.available_scanners[scanner_index]['name']
+                print(f"Using device name from stored list: {device_name}")
+                return device_name
+            # Fallback: get from pyinsane2 (but exit immediately after to unlock scanner)
+            device_name = None
+            try:
+                import pyinsane2
+                pyinsane2.init()
+                devices = pyinsane2.get_devices()
+                if devices and scanner_index < len(devices):
+                    device_name = devices[scanner_index].name
+                pyinsane2.exit()  # Exit immediately to release scanner
+                import time
+                time.sleep(0.2)  # Brief pause to ensure scanner is released
+            except Exception as e:
+                print(f"Error getting device name from pyinsane2: {e}")
+                self.scan_error.emit(f"Could not get scanner device name: {e}")
+                return None
+        if not device_name:
+            self.scan_error.emit(f"Scanner index {scanner_index} not found")
+        return device_name
+    
+    @metrics.timed('scanner.scan_batch')
+    def scan_batch(self, scanner_index=0, resolution=300, mode='Color', save_path=None,
+                   device_name=None):
+        """
+        Scan every page in the document feeder into one PDF.
+        
+        Scanning, compressing and writing run concurrently (see
+        ScanPipeline): while one page is compressed and appended to the
+        PDF the next one is already being scanned. Pages are released once
+        written, so memory use stays at a few pages whatever the size of
+        the stack. page_saved is emitted after each page, batch_complete
+        at the end; pages saved before an error are kept. Scanners without
+        a feeder source (ADF) are refused with scan_error.
+        
+        Args:
+            scanner_index (int): Index of scanner to use
+            resolution (int): DPI resolution (default 300)
+            mode (str): Color mode ('Color', 'Gray', 'Lineart')
+            save_path (str): Path of the PDF to write
+            device_name (str): SANE device name; used instead of scanner_index
+        
+        Returns:
+            int: Number of pages saved (0 if nothing was scanned)
+        """
+        if not save_path:
+            self.scan_error.emit("No file to save the scanned pages to")
+            return 0
+        device_name = device_name or self._get_device_name(scanner_index)
+        if not device_name:
+            return 0
+        
+        try:
+            # The PDF only appears under its name once it is complete
+            output = AtomicFile(save_path)
+        except OSError as e:
+            self.scan_error.emit(f"Error saving image: {str(e)}")
+            return 0
+        writer = pdf_stream.PdfStreamWriter(output.file)
+        
+        def encode_page(image):
+            with metrics.timer('scanner.encode'):
+                return pdf_stream.encode_page(image, resolution)
+        
+        def write_page(page):
+            with metrics.timer('scanner.save'):
+                writer.add_page(page)
+        
+        scan_result = {}
+        
+        def acquire(put_page, report):
+            # Runs on the pipeline's acquisition thread
+            _, scan_result['returncode'], scan_result['error_output'] = self._read_scanimage(
+                cmd, lambda number, image: put_page(image), progress=report
+            )
+        
+        def on_event(kind, args):
+            # Delivered on this thread, so the signals are emitted from here
+            if kind == ScanPipeline.EVENT_PROGRESS:
+                self.scan_bytes.emit(*args)
+                return
+            pages, pages_per_minute = args
+            self.page_saved.emit(pages, pages_per_minute)
+            self.scan_progress.emit(
+                f"Page {pages} saved ({pages_per_minute:.1f} pages/min), scanning next page..."
+            )
+        
+        pipeline = ScanPipeline(encode_page, write_page)
+        error_msg = None
+        try:
+            cmd = self._scanimage_command(device_name, resolution, mode)
+            feeder = [
+                source for source in self._scanimage_choices(device_name, 'source')
+                if 'adf' in source.lower() or 'feeder' in source.lower()
+            ]
+            if feeder:
+                cmd.extend(['--source', feeder[0]])
+                # Batch scans write one file per page; pointing them all at
+                # stdout streams the pages back to back through one pipe
+                cmd.append('--batch=/dev/stdout')
+                self.scan_progress.emit("Scanning pages from the document feeder...")
+                print(f"Running scanimage command: {' '.join(cmd)}")
+                pipeline.run(acquire, on_event)
+            else:
+                # Without a feeder scanimage would scan the glass over and
+                # over until it timed out
+                error_msg = (
+                    "This scanner has no document feeder (or it could not be found). "
+                    "Untick the document feeder option to scan from the glass."
+                )
+        except FileNotFoundError:
+            error_msg = "scanimage command not found. Install with: sudo apt install sane-utils"
+        except subprocess.TimeoutExpired:
+            error_msg = (
+                f"scanimage timed out after page {pipeline.pages_written}. "
+                "Make sure the scanner is ready."
+            )
+        except Exception as e:
+            print(f"Batch scan error: {e}")
+            error_msg = f"Error during scanning after page {pipeline.pages_written}: {str(e)}"
+        finally:
+            # Pages saved before an error are kept
+            if pipeline.pages_written:
+                try:
+                    writer.finish()
+                    output.commit()
+                except OSError as e:
+                    error_msg = f"Error saving image: {str(e)}"
+            else:
+                output.discard()
+        
+        pages = pipeline.pages_written
+        if error_msg is None and not pages:
+            # An empty feeder is reported like any other scanimage error
+            error_msg = "Error during scanning: " + (
+                self._scanimage_errors(scan_result.get('error_output', ''))
+                or "No pages in the document feeder"
+            )
+        if error_msg:
+            self.scan_error.emit(error_msg)
+            return pages
+        self.batch_complete.emit(save_path, pages)
+        return pages
+    
+    @metrics.timed('scanner.scan_document')
     def scan_document(self, scanner_index=0, resolution=300, mode='Color', 
-                     format='PNG', save_path=None):
+                     format='PNG', save_path=None, device_name=None):
         """
         Scan a document using the specified scanner.
         
@@ -306,6 +570,7 @@ class ScannerService(QObject):
             mode (str): Color mode ('Color', 'Gray', 'Lineart')
             format (str): Image format ('PNG', 'JPEG', 'PDF')
             save_path (str): Path to save the scanned document
+            device_name (str): SANE device name; used instead of scanner_index
             
         Returns:
             PIL.Image: Scanned image, or None if error
@@ -317,29 +582,8 @@ class ScannerService(QObject):
             # Use scanimage directly for scanning (more reliable than pyinsane2 for some scanners)
             use_scanimage_direct = True
             
-            # Get device name - prefer from stored scanner list to avoid pyinsane2 conflicts
-            device_name = None
-            if self.available_scanners and scanner_index < len(self.available_scanners):
-                # Use stored device name from detect_scanners()
-                device_name = self.available_scanners[scanner_index]['name']
-                print(f"Using device name from stored list: {device_name}")
-            else:
-                # Fallback: get from pyinsane2 (but exit immediately after to unlock scanner)
-                try:
-                    pyinsane2.init()
-                    devices = pyinsane2.get_devices()
-                    if devices and scanner_index < len(devices):
-                        device_name = devices[scanner_index].name
-                    pyinsane2.exit()  # Exit immediately to release scanner
-                    import time
-                    time.sleep(0.2)  # Brief pause to ensure scanner is released
-                except Exception as e:
-                    print(f"Error getting device name from pyinsane2: {e}")
-                    self.scan_error.emit(f"Could not get scanner device name: {e}")
-                    return None
-            
+            device_name = device_name or self._get_device_name(scanner_index)
             if not device_name:
-                self.scan_error.emit(f"Scanner index {scanner_index} not found")
                 return None
             
             if use_scanimage_direct:
@@ -354,16 +598,7 @@ class ScannerService(QObject):
                         # Save if path provided
                         if save_path:
                             try:
-                                if format.upper() == 'PDF':
-                                    if image.mode != 'RGB':
-                                        image = image.convert('RGB')
-                                    image.save(save_path, 'PDF')
-                                elif format.upper() == 'JPEG':
-                                    if image.mode != 'RGB':
-                                        image = image.convert('RGB')
-                                    image.save(save_path, 'JPEG', quality=95)
-                                else:
-                                    image.save(save_path, 'PNG')
+                                write_document(image, save_path, format, resolution)
                             except Exception as e:
                                 self.scan_error.emit(f"Error saving image: {str(e)}")
                                 return None
@@ -564,6 +799,7 @@ class ScannerService(QObject):
                 
                 # Convert to PIL Image if needed
                 # pyinsane2 images are typically PIL Images already, but handle other formats
+                from PIL import Image
                 if not isinstance(image, Image.Image):
                     try:
                         # Try to convert numpy array to PIL Image
@@ -585,18 +821,7 @@ class ScannerService(QObject):
                 # Save if path provided
                 if save_path:
                     try:
-                        if format.upper() == 'PDF':
-                            # For PDF, convert to RGB if needed
-                            if image.mode != 'RGB':
-                                image = image.convert('RGB')
-                            image.save(save_path, 'PDF')
-                        elif format.upper() == 'JPEG':
-                            # JPEG needs RGB mode
-                            if image.mode != 'RGB':
-                                image = image.convert('RGB')
-                            image.save(save_path, 'JPEG', quality=95)
-                        else:
-                            image.save(save_path, 'PNG')
+                        write_document(image, save_path, format, resolution)
                     except Exception as e:
                         self.scan_error.emit(f"Error saving image: {str(e)}")
                         pyinsane2.exit()
@@ -674,8 +899,12 @@ class ScanThread(QThread):
     scan_complete = pyqtSignal(object)  # PIL Image
     scan_error = pyqtSignal(str)  # Error message
     scan_progress = pyqtSignal(str)  # Progress message
+    scan_bytes = pyqtSignal(int, int)  # Bytes received, bytes expected
+    page_saved = pyqtSignal(int, float)  # Pages of a batch scan saved so far, pages per minute
+    batch_complete = pyqtSignal(str, int)  # PDF path, number of pages
     
-    def __init__(self, scanner_service, scanner_index, resolution, mode, format, save_path):
+    def __init__(self, scanner_service, scanner_index, resolution, mode, format, save_path,
+                 batch=False, device_name=None):
         """
         Initialize scan thread.
         
@@ -686,6 +915,11 @@ class ScanThread(QThread):
             mode: Color mode
             format: Image format
             save_path: Path to save scanned document
+            batch (bool): Scan every page in the document feeder into the
+                PDF at save_path (format is ignored)
+            device_name (str): SANE device name of the scanner; the scanner
+                list can be replaced by a detection, so this is preferred
+                over scanner_index
         """
         super().__init__()
         self.scanner_service = scanner_service
@@ -694,6 +928,8 @@ class ScanThread(QThread):
         self.mode = mode
         self.format = format
         self.save_path = save_path
+        self.batch = batch
+        self.device_name = device_name
     
     def run(self):
         """Run the scan in the thread."""
@@ -701,13 +937,35 @@ class ScanThread(QThread):
         self.scanner_service.scan_complete.connect(self.scan_complete.emit)
         self.scanner_service.scan_error.connect(self.scan_error.emit)
         self.scanner_service.scan_progress.connect(self.scan_progress.emit)
+        self.scanner_service.scan_bytes.connect(self.scan_bytes.emit)
+        self.scanner_service.page_saved.connect(self.page_saved.emit)
+        self.scanner_service.batch_complete.connect(self.batch_complete.emit)
         
-        # Perform scan
-        self.scanner_service.scan_document(
-            self.scanner_index,
-            self.resolution,
-            self.mode,
-            self.format,
-            self.save_path
-        )
+        # The scanner list may still be checked in the background
+        device_lock = self.scanner_service.device_lock
+        if not device_lock.acquire(blocking=False):
+            self.scan_progress.emit("Waiting for scanner detection to finish...")
+            device_lock.acquire()
+        try:
+            if self.batch:
+                self.scanner_service.scan_batch(
+                    self.scanner_index,
+                    self.resolution,
+                    self.mode,
+                    self.save_path,
+                    device_name=self.device_name
+                )
+                return
+            
+            # Perform scan
+            self.scanner_service.scan_document(
+                self.scanner_index,
+                self.resolution,
+                self.mode,
+                self.format,
+                self.save_path,
+                device_name=self.device_name
+            )
+        finally:
+            device_lock.release()
 
@@ -0,0 +1,500 @@
+"""Polling observer for network shares, based on directory snapshots."""
+import os
+import stat
+import sys
+import threading
+from watchdog.events import (
+    DirCreatedEvent, DirDeletedEvent, DirMovedEvent,
+    FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+)
+
+
+# Filesystem types (from /proc/mounts) that native observers cannot watch
+NETWORK_FS_TYPES = {
+    'cifs', 'smb', 'smb2', 'smb3', 'smbfs', 'nfs', 'nfs4', 'afs',
+    'fuse.sshfs', 'fuse.rclone', 'fuse.gvfsd-fuse', '9p', 'davfs', 'ncpfs',
+}
+
+# GetDriveTypeW() result for drive letters mapped to a network share
+DRIVE_REMOTE = 4
+
+
+def is_network_path(path):
+    """
+    Check whether a path lives on a network share.
+    
+    Args:
+        path (str): Path to check
+    
+    Returns:
+        bool: True for SMB/NFS and similar mounts (UNC paths and mapped
+              drive letters on Windows), False if local or unknown
+    """
+    if sys.platform == 'win32':
+        path = os.path.abspath(path)
+        return _is_remote_windows_path(path) or _is_remote_windows_path(os.path.realpath(path))
+    path = os.path.realpath(path)
+    
+    # Longest mount point containing the path decides its filesystem type
+    best_mount, best_type = '', None
+    try:
+        with open('/proc/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                inside = (path == mount_point
+                          or path.startswith(mount_point.rstrip(os.sep) + os.sep))
+                if inside and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, fields[2]
+    except OSError:
+        return False
+    return best_type in NETWORK_FS_TYPES
+
+
+def _is_remote_windows_path(path):
+    """Check for a UNC path or a drive letter mapped to a network share."""
+    if path.startswith('\\\\'):
+        return True
+    drive = os.path.splitdrive(path)[0]
+    if not drive:
+        return False
+    import ctypes
+    return ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == DRIVE_REMOTE
+
+
+class _DirSnapshot:
+    """Stat information of one directory and the files directly in it."""
+    
+    __slots__ = ('mtime', 'inode', 'files', 'subdirs')
+    
+    def __init__(self, mtime, inode):
+        self.mtime = mtime
+        self.inode = inode
+        self.files = {}  # Name -> (mtime, size, inode)
+        self.subdirs = set()  # Names
+
+
+class _Watch:
+    """One watched tree: its handler, ignore rules and snapshot."""
+    
+    __slots__ = ('path', 'handler', 'ignore_matcher', 'snapshots', 'stat_queue',
+                 'sweep_queue', 'ready')
+    
+    def __init__(self, path, handler, ignore_matcher):
+        self.path = path
+        self.handler = handler
+        self.ignore_matcher = ignore_matcher
+        self.snapshots = {}  # Directory path -> _DirSnapshot
+        self.stat_queue = []  # Directories still to stat in the current round
+        self.sweep_queue = []
+        self.ready = False  # Initial snapshot taken
+
+
+class SnapshotObserver(threading.Thread):
+    """
+    Observer that detects changes by polling directory snapshots.
+    
+    Native observers get no notifications for changes made by other
+    machines on SMB/NFS mounts. This observer keeps a snapshot of the
+    tree and on each poll stats only directories: a directory is listed
+    again only when its own mtime changed, which is what happens when
+    files are added, removed or renamed in it. Each poll stats at most
+    STAT_DIRS_PER_POLL directories, taking turns, so a poll of a huge
+    tree stays short; small trees are checked completely every poll.
+    Content changes do not touch the directory mtime, so unchanged
+    directories are also re-listed in rotation, as many per poll as hold
+    about SWEEP_FILES_PER_POLL files between them.
+    
+    The poll interval starts at min_interval and grows while the trees
+    are idle, up to max_interval; any change drops it back to min_interval.
+    
+    Any number of trees can be scheduled, each with its own handler and
+    ignore rules, and all are polled by the one thread. Events are
+    dispatched to the handlers as watchdog file and directory events, so
+    it is a drop-in replacement for watchdog's Observer.
+    """
+    
+    DEFAULT_MIN_INTERVAL = 1.0
+    DEFAULT_MAX_INTERVAL = 30.0
+    BACKOFF_FACTOR = 1.5
+    
+    # Directories stat()ed per poll; on a share each one is a round trip
+    STAT_DIRS_PER_POLL = 500
+    
+    # Files re-stat()ed per poll in unchanged directories to catch in-place edits
+    SWEEP_FILES_PER_POLL = 500
+    
+    def __init__(self, min_interval=None, max_interval=None, ignore_matcher=None):
+        """
+        Initialize snapshot observer.
+        
+        Args:
+            min_interval (float): Poll interval in seconds right after a change
+            max_interval (float): Longest poll interval while idle
+            ignore_matcher (IgnoreMatcher): Default ignore rules for scheduled trees
+        """
+        super().__init__(daemon=True)
+        self.min_interval = min_interval or self.DEFAULT_MIN_INTERVAL
+        self.max_interval = max(self.min_interval, max_interval or self.DEFAULT_MAX_INTERVAL)
+        self.interval = self.min_interval
+        self.ignore_matcher = ignore_matcher
+        self._watches = []
+        self._watches_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+    
+    def schedule(self, event_handler, path, recursive=True, ignore_matcher=None):
+        """
+        Add a tree to watch.
+        
+        The tree is snapshotted on the observer thread, right away if the
+        observer is already running.
+        
+        Args:
+            event_handler: watchdog FileSystemEventHandler
+            path (str): Directory to watch
+            recursive (bool): Only recursive watching is supported
+            ignore_matcher (IgnoreMatcher): Rules for this tree (defaults to the observer's)
+        
+        Returns:
+            object: Watch handle for unschedule()
+        """
+        watch = _Watch(os.path.normpath(str(path)), event_handler,
+                       ignore_matcher or self.ignore_matcher)
+        with self._watches_lock:
+            self._watches.append(watch)
+        self._wakeup.set()
+        return watch
+    
+    def unschedule(self, watch):
+        """
+        Stop watching a tree.
+        
+        Args:
+            watch: Handle returned by schedule()
+        """
+        with self._watches_lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+    
+    def unschedule_all(self):
+        """Stop watching all trees."""
+        with self._watches_lock:
+            self._watches = []
+    
+    def stop(self):
+        """Ask the observer thread to stop after the current poll."""
+        self._stopped.set()
+        self._wakeup.set()
+    
+    def run(self):
+        """Snapshot newly scheduled trees and poll all of them until stopped."""
+        while not self._stopped.is_set():
+            self._snapshot_new_watches()
+            woken = self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            if woken:
+                # A tree was scheduled; snapshot it before the next poll
+                continue
+            try:
+                changed = self.poll()
+            except Exception as e:
+                print(f"Error polling watched locations: {e}")
+                changed = False
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.BACKOFF_FACTOR)
+    
+    def _snapshot_new_watches(self):
+        """Take the initial snapshot of trees scheduled since the last poll."""
+        with self._watches_lock:
+            watches = [watch for watch in self._watches if not watch.ready]
+        for watch in watches:
+            self._snapshot_tree(watch, watch.path)
+            watch.ready = True
+    
+    def poll(self):
+        """
+        Compare every watched tree with its snapshot and dispatch the differences.
+        
+        Returns:
+            bool: True if anything changed
+        """
+        with self._watches_lock:
+            watches = [watch for watch in self._watches if watch.ready]
+        changed = False
+        for watch in watches:
+            try:
+                changed = self._poll_watch(watch) or changed
+            except Exception as e:
+                print(f"Error polling {watch.path}: {e}")
+        return changed
+    
+    def _poll_watch(self, watch):
+        """
+        Compare one tree with its snapshot and dispatch the differences.
+        
+        Args:
+            watch (_Watch): Tree to poll
+        
+        Returns:
+            bool: True if anything changed
+        """
+        created = {}  # Path -> (mtime, size, inode)
+        deleted = {}
+        modified = []
+        created_dirs = {}  # Path -> inode
+        deleted_dirs = {}
+        snapshots = watch.snapshots
+        
+        # Stat the next directories in turn; list only the ones that changed
+        for _ in range(min(self.STAT_DIRS_PER_POLL, len(snapshots))):
+            if not watch.stat_queue:
+                watch.stat_queue = list(snapshots)
+            directory = watch.stat_queue.pop()
+            snapshot = snapshots.get(directory)
+            if snapshot is None:
+                # Removed earlier in this poll along with its parent
+                continue
+            try:
+                st = os.stat(directory)
+            except OSError:
+                # List the parent now, so a renamed directory is matched with
+                # its new name in this poll and reported as a move
+                parent = os.path.dirname(directory)
+                parent_snapshot = snapshots.get(parent) if parent != directory else None
+                try:
+                    parent_st = os.stat(parent) if parent_snapshot is not None else None
+                except OSError:
+                    parent_st = None
+                if parent_st is not None:
+                    # Also forgets the directory, unless it is still there
+                    self._rescan(watch, parent, parent_snapshot, parent_st, created, deleted,
+                                 modified, created_dirs, deleted_dirs)
+                else:
+                    self._forget_tree(watch, directory, deleted, deleted_dirs)
+                continue
+            if st.st_mtime != snapshot.mtime or st.st_ino != snapshot.inode:
+                self._rescan(watch, directory, snapshot, st, created, deleted, modified,
+                             created_dirs, deleted_dirs)
+        
+        # Re-list unchanged directories in turn to catch edits made in place;
+        # listing stats every file, so the budget counts files, not directories
+        budget = self.SWEEP_FILES_PER_POLL
+        for _ in range(len(snapshots)):
+            if budget <= 0:
+                break
+            if not watch.sweep_queue:
+                watch.sweep_queue = list(snapshots)
+            directory = watch.sweep_queue.pop()
+            snapshot = snapshots.get(directory)
+            if snapshot is None:
+                continue
+            cost = len(snapshot.files) + 1
+            if cost > budget and budget < self.SWEEP_FILES_PER_POLL:
+                # Too large for the rest of this poll; it gets the next one alone
+                watch.sweep_queue.append(directory)
+                break
+            budget -= cost
+            try:
+                st = os.stat(directory)
+            except OSError:
+                continue
+            self._rescan(watch, directory, snapshot, st, created, deleted, modified,
+                         created_dirs, deleted_dirs)
+        
+        self._dispatch(watch, created, deleted, modified, created_dirs, deleted_dirs)
+        return bool(created or deleted or modified or created_dirs or deleted_dirs)
+    
+    @staticmethod
+    def _list_directory(directory, matcher):
+        """
+        List a directory.
+        
+        Args:
+            directory (str): Directory path
+            matcher (IgnoreMatcher): Ignore rules, or None
+        
+        Returns:
+            tuple: ({name: (mtime, size, inode)} for files, set of subdirectory names),
+                or None if the directory cannot be read
+        """
+        files = {}
+        subdirs = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not (matcher and matcher.is_ignored_entry(directory, entry.name, True)):
+                                subdirs.add(entry.name)
+                        elif entry.is_file():
+                            if matcher and matcher.is_ignored_entry(directory, entry.name, False):
+                                continue
+                            st = entry.stat()
+                            files[entry.name] = (st.st_mtime, st.st_size, st.st_ino)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return files, subdirs
+    
+    def _snapshot_tree(self, watch, directory, created=None, created_dirs=None):
+        """
+        Snapshot a directory tree.
+        
+        Args:
+            watch (_Watch): Watched tree the directory belongs to
+            directory (str): Root of the tree
+            created (dict): Receives path -> stat tuple of the files found, if given
+            created_dirs (dict): Receives path -> inode of the directories found, if given
+        """
+        stack = [directory]
+        while stack:
+            current = stack.pop()
+            try:
+                st = os.stat(current)
+            except OSError:
+                continue
+            if not stat.S_ISDIR(st.st_mode):
+                continue
+            listing = self._list_directory(current, watch.ignore_matcher)
+            if listing is None:
+                continue
+            snapshot = _DirSnapshot(st.st_mtime, st.st_ino)
+            snapshot.files, snapshot.subdirs = listing
+            watch.snapshots[current] = snapshot
+            if created_dirs is not None:
+                created_dirs[current] = st.st_ino
+            if created is not None:
+                for name, info in snapshot.files.items():
+                    created[os.path.join(current, name)] = info
+            stack.extend(os.path.join(current, name) for name in snapshot.subdirs)
+    
+    def _forget_tree(self, watch, directory, deleted, deleted_dirs):
+        """
+        Drop a directory tree from the snapshot, collecting its files as deleted.
+        
+        Args:
+            watch (_Watch): Watched tree the directory belongs to
+            directory (str): Root of the removed tree
+            deleted (dict): Receives path -> stat tuple of removed files
+            deleted_dirs (dict): Receives path -> inode of removed directories
+        """
+        prefix = directory + os.sep
+        snapshots = watch.snapshots
+        for path in [p for p in snapshots if p == directory or p.startswith(prefix)]:
+            snapshot = snapshots.pop(path)
+            deleted_dirs[path] = snapshot.inode
+            for name, info in snapshot.files.items():
+                deleted[os.path.join(path, name)] = info
+    
+    def _rescan(self, watch, directory, snapshot, st, created, deleted, modified,
+                created_dirs, deleted_dirs):
+        """
+        List a directory again and diff it against its snapshot.
+        
+        Args:
+            watch (_Watch): Watched tree the directory belongs to
+            directory (str): Directory path
+            snapshot (_DirSnapshot): Previous state of the directory
+            st (os.stat_result): Current stat of the directory
+            created (dict): Receives new files
+            deleted (dict): Receives removed files
+            modified (list): Receives changed file paths
+            created_dirs (dict): Receives path -> inode of new directories
+            deleted_dirs (dict): Receives path -> inode of removed directories
+        """
+        listing = self._list_directory(directory, watch.ignore_matcher)
+        if listing is None:
+            return
+        files, subdirs = listing
+        
+        old_files = snapshot.files
+        for name, info in files.items():
+            previous = old_files.get(name)
+            path = os.path.join(directory, name)
+            if previous is None:
+                created[path] = info
+            elif previous[2] != info[2]:
+                # Replaced by a different file under the same name
+                deleted[path] = previous
+                created[path] = info
+            elif previous[:2] != info[:2]:
+                modified.append(path)
+        for name, info in old_files.items():
+            if name not in files:
+                deleted[os.path.join(directory, name)] = info
+        
+        for name in subdirs - snapshot.subdirs:
+            self._snapshot_tree(watch, os.path.join(directory, name), created, created_dirs)
+        for name in snapshot.subdirs - subdirs:
+            self._forget_tree(watch, os.path.join(directory, name), deleted, deleted_dirs)
+        
+        snapshot.mtime = st.st_mtime
+        snapshot.inode = st.st_ino
+        snapshot.files = files
+        snapshot.subdirs = subdirs
+    
+    def _dispatch(self, watch, created, deleted, modified, created_dirs, deleted_dirs):
+        """
+        Send the differences of one poll to the tree's handler.
+        
+        A deleted and a created file with the same inode are reported as
+        a move, which also covers files inside renamed directories;
+        directories are matched the same way. As with native observers,
+        a renamed directory is reported together with everything in it.
+        """
+        handler = watch.handler
+        
+        dirs_by_inode = {}
+        for path, inode in deleted_dirs.items():
+            if inode:
+                dirs_by_inode.setdefault(inode, path)
+        dir_events = []
+        # Parents first, as they appear
+        for path in sorted(created_dirs):
+            inode = created_dirs[path]
+            src_path = dirs_by_inode.pop(inode, None) if inode else None
+            if src_path is None:
+                dir_events.append(DirCreatedEvent(path))
+                continue
+            del deleted_dirs[src_path]
+            if src_path != path:
+                dir_events.append(DirMovedEvent(src_path, path))
+        
+        deleted_by_inode = {}
+        for path, info in deleted.items():
+            if info[2]:
+                deleted_by_inode.setdefault(info[2], path)
+        
+        events = []
+        for path, info in created.items():
+            src_path = deleted_by_inode.pop(info[2], None) if info[2] else None
+            if src_path is None:
+                events.append(FileCreatedEvent(path))
+                continue
+            del deleted[src_path]
+            if src_path == path:
+                # Same file briefly missing, e.g. while its folder was replaced
+                events.append(FileModifiedEvent(path))
+            else:
+                events.append(FileMovedEvent(src_path, path))
+        
+        # Deletions go first so a file renamed over another one ends up moved
+        for path in deleted:
+            handler.dispatch(FileDeletedEvent(path))
+        # Children first, as they disappear
+        for path in sorted(deleted_dirs, reverse=True):
+            handler.dispatch(DirDeletedEvent(path))
+        for event in dir_events:
+            handler.dispatch(event)
+        for event in events:
+            handler.dispatch(event)
+        for path in modified:
+            handler.dispatch(FileModifiedEvent(path))
@@ -0,0 +1,188 @@
+"""Thumbnail rendering and the on-disk thumbnail cache (~/.dms_client/thumbnails)."""
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from utils.config import Config
+
+
+# Image formats Pillow can render; other files keep their file-type icon
+THUMBNAIL_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp',
+    '.pnm', '.pbm', '.pgm', '.ppm',
+})
+
+
+def can_thumbnail(path):
+    """
+    Check whether a file gets a rendered thumbnail.
+    
+    Args:
+        path (str): File path
+    
+    Returns:
+        bool: True for image formats Pillow can read
+    """
+    return os.path.splitext(path)[1].lower() in THUMBNAIL_EXTENSIONS
+
+
+def render_thumbnail(source_path, cache_path, size):
+    """
+    Render a thumbnail into the cache.
+    
+    Runs in a worker process, so it only takes and returns plain values.
+    The thumbnail is written to a temporary file and renamed into place,
+    so readers never see a partial one.
+    
+    Args:
+        source_path (str): Image to render
+        cache_path (str): Where to store the thumbnail (PNG)
+        size (int): Maximum width and height in pixels
+    
+    Returns:
+        int: Size of the written thumbnail in bytes
+    """
+    from PIL import Image
+    
+    with Image.open(source_path) as image:
+        # Lets JPEG decode at a fraction of the full resolution
+        image.draft('RGB', (size, size))
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        image.save(temp_path, 'PNG')
+    os.replace(temp_path, cache_path)
+    return os.path.getsize(cache_path)
+
+
+class ThumbnailDiskCache:
+    """
+    Rendered thumbnails on disk, evicted least recently used first.
+    
+    Thumbnails are keyed by the identity of the file contents (device,
+    inode, size and modification time) rather than by path, so renamed
+    or moved files keep their thumbnail and modified files get a new one.
+    Reading a thumbnail bumps its modification time, which is the LRU
+    order used for eviction once the cache grows past its size limit.
+    
+    Every method touches the disk and none of them locks, so the cache is
+    meant to be used from a single background thread.
+    """
+    
+    DIR_NAME = "thumbnails"
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize thumbnail cache.
+        
+        Args:
+            cache_dir (str): Cache directory (defaults to ~/.dms_client/thumbnails)
+            max_bytes (int): Size at which the least recently used thumbnails are removed
+        """
+        if cache_dir is None:
+            cache_dir = Path.home() / Config.CONFIG_DIR_NAME / self.DIR_NAME
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._entries = None  # Key -> bytes, least recently used first; loaded lazily
+        self._total_bytes = 0
+    
+    @staticmethod
+    def key_for(path, size):
+        """
+        Get the cache key of a file's thumbnail.
+        
+        Args:
+            path (str): File path
+            size (int): Thumbnail size in pixels
+        
+        Returns:
+            str: Cache key, or None if the file cannot be read
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        identity = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{size}"
+        return hashlib.sha1(identity.encode()).hexdigest()
+    
+    def path_for(self, key):
+        """
+        Get the file a thumbnail is stored in.
+        
+        Args:
+            key (str): Cache key
+        
+        Returns:
+            str: Thumbnail path (two-character fan-out keeps directories small)
+        """
+        return str(self.cache_dir / key[:2] / f"{key}.png")
+    
+    def _load_entries(self):
+        """List the cached thumbnails, oldest access first."""
+        found = []
+        try:
+            subdirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            subdirs = []
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            try:
+                for entry in os.scandir(subdir.path):
+                    if entry.name.endswith('.png'):
+                        st = entry.stat()
+                        found.append((st.st_mtime, entry.name[:-4], st.st_size))
+            except OSError:
+                continue
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total_bytes = sum(self._entries.values())
+    
+    def lookup(self, key):
+        """
+        Get a cached thumbnail and mark it as recently used.
+        
+        Args:
+            key (str): Cache key
+        
+        Returns:
+            str: Thumbnail path, or None if it isn't cached
+        """
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        if self._entries is not None and key in self._entries:
+            self._entries.move_to_end(key)
+        return path
+    
+    def added(self, key, size):
+        """
+        Account for a newly rendered thumbnail and evict old ones if needed.
+        
+        Args:
+            key (str): Cache key
+            size (int): Thumbnail size in bytes
+        """
+        if self._entries is None:
+            self._load_entries()
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        if self._total_bytes > self.max_bytes:
+            self._evict(self.max_bytes * 9 // 10)
+    
+    def _evict(self, target_bytes):
+        """Remove least recently used thumbnails until the cache fits target_bytes."""
+        while self._entries and self._total_bytes > target_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
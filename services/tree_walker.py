@@ -0,0 +1,60 @@
+"""Shared directory tree walking helpers built on os.scandir."""
+import os
+
+
+def walk_files(root_path, ignore_matcher=None):
+    """
+    Walk a directory tree and yield every file in it.
+    
+    Uses os.scandir so each directory is listed once and the type
+    information comes from the directory entry instead of an extra stat.
+    Symlinked directories are not followed; unreadable directories are skipped.
+    Ignored directories are pruned without being listed.
+    
+    Args:
+        root_path (str): Directory to walk
+        ignore_matcher (IgnoreMatcher): Optional ignore rules to apply
+    
+    Yields:
+        os.DirEntry: Entry for each file found
+    """
+    stack = [str(root_path)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not (ignore_matcher and
+                                    ignore_matcher.is_ignored_entry(directory, entry.name, True)):
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            if not (ignore_matcher and
+                                    ignore_matcher.is_ignored_entry(directory, entry.name, False)):
+                                yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def count_files(folder_paths, ignore_matcher=None):
+    """
+    Count files under the given folders.
+    
+    Args:
+        folder_paths (list): Folder paths to count (missing folders are skipped)
+        ignore_matcher (IgnoreMatcher): Optional ignore rules to apply
+    
+    Returns:
+        int: Total file count
+    """
+    count = 0
+    for folder_path in folder_paths:
+        if not os.path.isdir(folder_path):
+            continue
+        if ignore_matcher and ignore_matcher.is_ignored(folder_path, is_dir=True):
+            continue
+        count += sum(1 for _ in walk_files(folder_path, ignore_matcher))
+    return count
@@ -0,0 +1,172 @@
+"""Dialog showing the performance metrics collected by services.metrics."""
+from datetime import datetime
+from pathlib import Path
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTreeWidget, QTreeWidgetItem, QHeaderView, QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from services import metrics
+from ui.styles import COLORS
+
+
+def format_value(value):
+    """
+    Format a metric value for display.
+    
+    Args:
+        value (float): Value, or None
+    
+    Returns:
+        str: Rounded value, or an empty string
+    """
+    if value is None:
+        return ""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return f"{value:.2f}"
+
+
+class DiagnosticsDialog(QDialog):
+    """Dialog listing counters and timings, with collection on/off and JSON export."""
+    
+    REFRESH_INTERVAL_MS = 1000
+    COLUMNS = ["Metric", "Count", "Mean", "p50", "p95", "Max"]
+    
+    def __init__(self, config=None, parent=None):
+        """
+        Initialize diagnostics dialog.
+        
+        Args:
+            config (Config): Configuration the collection setting is saved in
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.config = config
+        self.init_ui()
+        self.reload()
+        
+        # Keep the numbers current while the dialog is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.reload)
+        self.refresh_timer.start(self.REFRESH_INTERVAL_MS)
+    
+    def init_ui(self):
+        """Initialize the UI components."""
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumWidth(720)
+        self.setMinimumHeight(480)
+        
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+        layout.setContentsMargins(24, 24, 24, 24)
+        
+        # Title
+        title_label = QLabel("📊 Diagnostics")
+        title_font = QFont()
+        title_font.setPointSize(18)
+        title_font.setWeight(QFont.Bold)
+        title_label.setFont(title_font)
+        title_label.setStyleSheet(f"color: {COLORS['text_primary']}; padding-bottom: 4px;")
+        layout.addWidget(title_label)
+        
+        self.enabled_checkbox = QCheckBox("Collect performance metrics")
+        self.enabled_checkbox.setChecked(metrics.is_enabled())
+        self.enabled_checkbox.toggled.connect(self.on_enabled_toggled)
+        layout.addWidget(self.enabled_checkbox)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
+        layout.addWidget(self.summary_label)
+        
+        # Timings are in milliseconds, sizes in items
+        self.metrics_tree = QTreeWidget()
+        self.metrics_tree.setRootIsDecorated(False)
+        self.metrics_tree.setHeaderLabels(self.COLUMNS)
+        self.metrics_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, len(self.COLUMNS)):
+            self.metrics_tree.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        layout.addWidget(self.metrics_tree)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.setProperty("styleClass", "secondary")
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+        button_layout.addStretch()
+        save_button = QPushButton("💾 Save as JSON...")
+        save_button.setProperty("styleClass", "secondary")
+        save_button.clicked.connect(self.save_json)
+        button_layout.addWidget(save_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def reload(self):
+        """Refill the list from a metrics snapshot."""
+        data = metrics.snapshot()
+        scroll_position = self.metrics_tree.verticalScrollBar().value()
+        self.metrics_tree.clear()
+        
+        for name, counter in data['counters'].items():
+            item = QTreeWidgetItem([name, format_value(counter['value']), "", "", "", ""])
+            self.metrics_tree.addTopLevelItem(item)
+        for name, histogram in data['histograms'].items():
+            item = QTreeWidgetItem([
+                name,
+                format_value(histogram['count']),
+                format_value(histogram['mean']),
+                format_value(histogram['p50']),
+                format_value(histogram['p95']),
+                format_value(histogram['max']),
+            ])
+            self.metrics_tree.addTopLevelItem(item)
+        for row in range(self.metrics_tree.topLevelItemCount()):
+            item = self.metrics_tree.topLevelItem(row)
+            for column in range(1, len(self.COLUMNS)):
+                item.setTextAlignment(column, Qt.AlignRight | Qt.AlignVCenter)
+        self.metrics_tree.verticalScrollBar().setValue(scroll_position)
+        
+        if not data['enabled']:
+            self.summary_label.setText(
+                "Collection is off. Turn it on, repeat what was slow, then save the metrics."
+            )
+        elif data['counters'] or data['histograms']:
+            self.summary_label.setText("Times are in milliseconds; batch sizes are in files.")
+        else:
+            self.summary_label.setText("Nothing measured yet.")
+    
+    def on_enabled_toggled(self, enabled):
+        """Turn collection on or off and remember the choice."""
+        metrics.set_enabled(enabled)
+        if self.config:
+            self.config.set_metrics_enabled(enabled)
+        self.reload()
+    
+    def reset(self):
+        """Drop the values collected so far."""
+        metrics.reset()
+        self.reload()
+    
+    def save_json(self):
+        """Write the metrics to a JSON file picked by the user."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Metrics",
+            str(Path.home() / f"dms_metrics_{timestamp}.json"),
+            "JSON Files (*.json);;All Files (*)"
+        )
+        if not file_path:
+            return
+        try:
+            metrics.dump(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Save Error", f"Error saving metrics:\n{str(e)}")
+            return
+        QMessageBox.information(self, "Metrics Saved", f"Metrics saved to:\n{file_path}")
@@ -0,0 +1,161 @@
+"""Dialog listing duplicate files and the space they waste."""
+from pathlib import Path
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTabWidget,
+    QTreeWidget, QTreeWidgetItem, QHeaderView
+)
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtGui import QFont, QDesktopServices
+from ui.styles import COLORS
+
+
+def format_size(size):
+    """
+    Format a byte count for display.
+    
+    Args:
+        size (int): Size in bytes
+    
+    Returns:
+        str: Human readable size, e.g. "2.4 MB"
+    """
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class DuplicatesDialog(QDialog):
+    """Dialog showing groups of identical files and wasted space per folder."""
+    
+    def __init__(self, hash_index, base_path=None, parent=None):
+        """
+        Initialize duplicates dialog.
+        
+        Args:
+            hash_index: HashIndex to query
+            base_path (str): Tracked location; paths are shown relative to it
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.hash_index = hash_index
+        self.base_path = Path(base_path) if base_path else None
+        self.init_ui()
+        self.reload()
+    
+    def init_ui(self):
+        """Initialize the UI components."""
+        self.setWindowTitle("Duplicate Files")
+        self.setMinimumWidth(720)
+        self.setMinimumHeight(480)
+        
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+        layout.setContentsMargins(24, 24, 24, 24)
+        
+        # Title
+        title_label = QLabel("🗂 Duplicate Files")
+        title_font = QFont()
+        title_font.setPointSize(18)
+        title_font.setWeight(QFont.Bold)
+        title_label.setFont(title_font)
+        title_label.setStyleSheet(f"color: {COLORS['text_primary']}; padding-bottom: 4px;")
+        layout.addWidget(title_label)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
+        layout.addWidget(self.summary_label)
+        
+        self.tabs = QTabWidget()
+        
+        # Groups of identical files; the first copy is the oldest
+        self.groups_tree = QTreeWidget()
+        self.groups_tree.setHeaderLabels(["File", "Size"])
+        self.groups_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.groups_tree.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.groups_tree.itemActivated.connect(self.on_item_activated)
+        self.tabs.addTab(self.groups_tree, "Duplicate Files")
+        
+        # Space taken by redundant copies, per folder
+        self.folders_tree = QTreeWidget()
+        self.folders_tree.setRootIsDecorated(False)
+        self.folders_tree.setHeaderLabels(["Folder", "Wasted", "Extra Copies"])
+        self.folders_tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.folders_tree.header().setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        self.folders_tree.header().setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        self.tabs.addTab(self.folders_tree, "Wasted Space by Folder")
+        
+        layout.addWidget(self.tabs)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        refresh_button = QPushButton("Refresh")
+        refresh_button.setProperty("styleClass", "secondary")
+        refresh_button.clicked.connect(self.reload)
+        button_layout.addWidget(refresh_button)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def _display_path(self, path):
+        """Show a path relative to the tracked location when possible."""
+        if self.base_path:
+            try:
+                return str(Path(path).relative_to(self.base_path)) or "."
+            except ValueError:
+                pass
+        return str(path)
+    
+    def reload(self):
+        """Query the hash index and refill both lists."""
+        try:
+            groups = self.hash_index.duplicates()
+            folders = self.hash_index.wasted_bytes_by_folder()
+        except Exception as e:
+            print(f"Error querying duplicates: {e}")
+            groups, folders = [], []
+        
+        self.groups_tree.clear()
+        for group in groups:
+            copies = len(group['paths'])
+            group_item = QTreeWidgetItem([
+                f"{Path(group['paths'][0]).name}  ({copies} copies, "
+                f"{format_size(group['wasted_bytes'])} wasted)",
+                format_size(group['size']),
+            ])
+            group_item.setFlags(Qt.ItemIsEnabled)
+            for path in group['paths']:
+                child = QTreeWidgetItem([self._display_path(path), ""])
+                child.setData(0, Qt.UserRole, path)
+                child.setToolTip(0, path)
+                group_item.addChild(child)
+            self.groups_tree.addTopLevelItem(group_item)
+        self.groups_tree.expandAll()
+        
+        self.folders_tree.clear()
+        for folder, wasted_bytes, extra_copies in folders:
+            item = QTreeWidgetItem([
+                self._display_path(folder), format_size(wasted_bytes), str(extra_copies)
+            ])
+            item.setToolTip(0, folder)
+            item.setTextAlignment(2, Qt.AlignRight | Qt.AlignVCenter)
+            self.folders_tree.addTopLevelItem(item)
+        
+        total_wasted = sum(group['wasted_bytes'] for group in groups)
+        if groups:
+            self.summary_label.setText(
+                f"{len(groups)} sets of identical files, {format_size(total_wasted)} "
+                f"could be freed. Double-click a file to open it."
+            )
+        else:
+            self.summary_label.setText("No duplicate files found.")
+    
+    def on_item_activated(self, item, column):
+        """Open the activated file with the system default application."""
+        path = item.data(0, Qt.UserRole)
+        if path:
+            QDesktopServices.openUrl(QUrl.fromLocalFile(path))
@@ -5,9 +5,17 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListView, QTreeView,
     QFileSystemModel, QLineEdit, QLabel, QPushButton, QStackedWidget, QFrame
 )
-from PyQt5.QtCore import Qt, QDir, QModelIndex, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, QDir, QModelIndex, pyqtSignal, QSize, QTimer
 from PyQt5.QtGui import QFont
 from services.folder_manager import FolderManager
+from services.file_counter import FileCounter
+from services.directory_lister import DirectoryLister
+from services.index.content_search import ContentSearcher
+from services.index.name_search import NameSearcher
+from services import events, metrics
+from ui.index_model import IndexItemModel
+from ui.search_results import SearchResultsView
+from ui.thumbnail_provider import ThumbnailProvider, ThumbnailDelegate
 from ui.styles import COLORS
 
 
@@ -21,11 +29,23 @@ class FileBrowser(QWidget):
     VIEW_TREE = 1
     VIEW_GRID = 2
     
-    def __init__(self, parent=None):
+    # Delay after the last keystroke before the content index is queried
+    CONTENT_SEARCH_DELAY_MS = 200
+    CONTENT_SEARCH_LIMIT = 50
+    # Delay after the last keystroke before the name index is queried
+    NAME_SEARCH_DELAY_MS = 50
+    NAME_SEARCH_LIMIT = 200
+    
+    # Larger index updates reload the model instead of inserting rows one by one
+    MAX_INCREMENTAL_CHANGES = 2000
+    
+    def __init__(self, thumbnail_provider=None, parent=None):
         """
         Initialize file browser.
         
         Args:
+            thumbnail_provider (ThumbnailProvider): Provider shared with other
+                browsers (a new one if omitted)
             parent: Parent widget
         """
         super().__init__(parent)
@@ -36,6 +56,26 @@ class FileBrowser(QWidget):
         self.list_view = None
         self.tree_view = None
         self.grid_view = None
+        self.file_counter = FileCounter(self)
+        self.file_counter.count_changed.connect(self._update_status_label)
+        self.content_index = None
+        self.name_index = None
+        self.metadata_index = None
+        self.thumbnail_provider = thumbnail_provider or ThumbnailProvider(parent=self)
+        self.directory_lister = DirectoryLister(parent=self)
+        self.content_search_timer = QTimer(self)
+        self.content_search_timer.setSingleShot(True)
+        self.content_search_timer.timeout.connect(self._run_content_search)
+        self.content_searcher = ContentSearcher(self)
+        self.content_searcher.results_ready.connect(self._on_content_results)
+        self._content_search_request = None  # Id of the query whose results are wanted
+        self.name_search_timer = QTimer(self)
+        self.name_search_timer.setSingleShot(True)
+        self.name_search_timer.timeout.connect(self._run_name_search)
+        self.name_searcher = NameSearcher(self)
+        self.name_searcher.results_ready.connect(self._on_name_results)
+        self._name_search_request = None  # Id of the query whose results are wanted
+        self._name_results = []  # Paths shown in the file names section
         self.init_ui()
     
     def init_ui(self):
@@ -95,7 +135,7 @@ class FileBrowser(QWidget):
         search_label = QLabel("🔍")
         search_label.setStyleSheet(f"color: {COLORS['text_secondary']};")
         self.search_edit = QLineEdit()
-        self.search_edit.setPlaceholderText("Search files and folders...")
+        self.search_edit.setPlaceholderText("Search files, folders and contents...")
         self.search_edit.textChanged.connect(self.filter_files)
         self.search_edit.setClearButtonEnabled(True)
         self.search_edit.setMaximumWidth(300)
@@ -106,6 +146,12 @@ class FileBrowser(QWidget):
         
         layout.addWidget(header_frame)
         
+        # Search results (hidden until a search matches something)
+        self.search_results = SearchResultsView()
+        self.search_results.setMaximumHeight(220)
+        self.search_results.result_activated.connect(self.on_search_result_activated)
+        layout.addWidget(self.search_results)
+        
         # Stacked widget for different views
         self.stacked_widget = QStackedWidget()
         self.stacked_widget.setStyleSheet(f"""
@@ -129,6 +175,8 @@ class FileBrowser(QWidget):
         self.tree_view.setRootIsDecorated(True)
         self.tree_view.setAnimated(True)
         self.tree_view.setAlternatingRowColors(True)
+        self.tree_view.header().setSortIndicator(0, Qt.AscendingOrder)
+        self.tree_view.setSortingEnabled(True)
         self.tree_view.doubleClicked.connect(self.on_item_double_clicked)
         self.stacked_widget.addWidget(self.tree_view)
         
@@ -137,9 +185,13 @@ class FileBrowser(QWidget):
         self.grid_view.setViewMode(QListView.IconMode)
         self.grid_view.setResizeMode(QListView.Adjust)
         self.grid_view.setGridSize(QSize(120, 120))
+        self.grid_view.setIconSize(QSize(80, 80))
         self.grid_view.setSpacing(12)
         self.grid_view.doubleClicked.connect(self.on_item_double_clicked)
         self.grid_view.setUniformItemSizes(True)
+        # Thumbnails are requested as cells are painted, so visible cells come first
+        self.grid_view.setItemDelegate(ThumbnailDelegate(self.thumbnail_provider, self.grid_view))
+        self.thumbnail_provider.thumbnail_ready.connect(self._on_thumbnail_ready)
         self.stacked_widget.addWidget(self.grid_view)
         
         layout.addWidget(self.stacked_widget, 1)  # Stretch factor 1
@@ -172,63 +224,172 @@ class FileBrowser(QWidget):
             self.up_button.setEnabled(False)
             self.back_button.setEnabled(False)
     
-    def set_tracked_location(self, path):
+    def set_tracked_location(self, path, ignore_matcher=None):
         """
         Set the tracked location and update the browser.
         
         Args:
             path (str): Path to track
+            ignore_matcher (IgnoreMatcher): Ignore rules for the file count
         """
         self.tracked_location = path
+        self.directory_lister.set_ignore_matcher(ignore_matcher)
         if not path or not Path(path).exists():
+            self.file_counter.set_folders([])
             self.status_label.setText("Invalid location")
             return
         
-        # Create file system model
-        self.model = QFileSystemModel()
-        self.model.setRootPath(path)
-        self.model.setFilter(QDir.AllDirs | QDir.Files | QDir.NoDotAndDotDot)
+        # Set root index to tracked location
+        self.current_path = path
+        self._install_model()
         
         # Get default folder paths
         default_folders = FolderManager.get_default_folder_paths(path)
         
-        # Set model for all views
-        self.list_view.setModel(self.model)
-        self.tree_view.setModel(self.model)
-        self.grid_view.setModel(self.model)
+        self.search_results.set_base_path(path)
         
-        # Set root index to tracked location
-        self.current_path = path
-        root_index = self.model.index(path)
-        self.list_view.setRootIndex(root_index)
-        self.tree_view.setRootIndex(root_index)
-        self.grid_view.setRootIndex(root_index)
+        # Seed the running file count (walks once in the background)
+        self.file_counter.set_folders(default_folders, ignore_matcher)
+        self._update_status_label()
+    
+    def _uses_index_model(self):
+        """Check whether the views show the metadata index of the tracked location."""
+        return (
+            self.metadata_index is not None
+            and self.tracked_location is not None
+            and self.metadata_index.root_path == os.path.normpath(self.tracked_location)
+        )
+    
+    def _install_model(self):
+        """
+        Create the model shared by all views.
+        
+        Listings come from the metadata index; directories it has not
+        listed yet are read in the background by the directory lister.
+        Without an index a QFileSystemModel reads the disk directly.
+        """
+        if self._uses_index_model():
+            model = IndexItemModel(self.metadata_index, self.tracked_location,
+                                   self.directory_lister)
+        else:
+            model = QFileSystemModel()
+            model.setRootPath(self.tracked_location)
+            model.setFilter(QDir.AllDirs | QDir.Files | QDir.NoDotAndDotDot)
+        
+        # Set model for all views
+        self.list_view.setModel(model)
+        self.tree_view.setModel(model)
+        self.grid_view.setModel(model)
+        self.model = model
+        if isinstance(model, IndexItemModel):
+            # Sorting drops the loaded listings; put the views back where they
+            # were (connected after the views, whose reset clears the root)
+            model.modelReset.connect(self._restore_root_index)
+        self._restore_root_index()
+    
+    def _restore_root_index(self):
+        """Point all views at the current directory again."""
+        current_path = self.current_path or self.tracked_location
+        
+        # Get the index for the current path (invalid once it no longer exists)
+        current_index = self.model.index(current_path)
+        if not current_index.isValid():
+            # Fallback to tracked location if current path is invalid
+            current_path = self.tracked_location
+            current_index = self.model.index(current_path)
+        self.current_path = current_path
+        for view in (self.list_view, self.tree_view, self.grid_view):
+            # Setting the same root again would lose scroll position and selection
+            if view.rootIndex() != current_index:
+                view.setRootIndex(current_index)
         self._update_navigation_buttons()
+    
+    def set_metadata_index(self, metadata_index):
+        """
+        Set the metadata index the views list directories from.
         
-        # Update status
-        file_count = self._count_files(path, default_folders)
-        folder_count = len([f for f in default_folders if Path(f).exists()])
-        self.status_label.setText(
-            f"📂 {Path(path).name}  •  {file_count} files  •  {folder_count} folders"
-        )
+        Args:
+            metadata_index: MetadataIndex instance, or None to read the disk directly
+        """
+        was_index_model = isinstance(self.model, IndexItemModel)
+        self.metadata_index = metadata_index
+        if self.tracked_location and self.model and (was_index_model or self._uses_index_model()):
+            self._install_model()
     
-    def _count_files(self, base_path, folder_paths):
+    def on_index_caught_up(self, changes):
         """
-        Count files in the default folders.
+        Switch to the index-backed model, or update it, once the index is current.
         
         Args:
-            base_path (str): Base tracked path
-            folder_paths (list): List of folder paths to count
-            
+            changes (list): File changes catch-up found
+        """
+        if not self.tracked_location or not self.model:
+            return
+        if isinstance(self.model, IndexItemModel):
+            self.apply_index_changes(changes)
+        elif self._uses_index_model():
+            self._install_model()
+    
+    def apply_index_changes(self, changes):
+        """
+        Show changes that were written to the metadata index.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        if not isinstance(self.model, IndexItemModel) or not changes:
+            return
+        current_moved = self._follow_directory_changes(changes)
+        if len(changes) > self.MAX_INCREMENTAL_CHANGES:
+            # Cheaper to start over than to place every row
+            self.model.reload()
+        else:
+            self.model.apply_changes(changes)
+        if current_moved:
+            self._restore_root_index()
+    
+    def _follow_directory_changes(self, changes):
+        """
+        Keep the current directory path right when it or a parent is renamed.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        
         Returns:
-            int: Total file count
+            bool: True if the current directory was renamed or removed
         """
-        count = 0
-        for folder_path in folder_paths:
-            folder = Path(folder_path)
-            if folder.exists():
-                count += sum(1 for _ in folder.rglob('*') if _.is_file())
-        return count
+        if not self.current_path:
+            return False
+        current = os.path.normpath(self.current_path)
+        touched = False
+        for event_type, src_path, dest_path in changes:
+            if event_type not in (events.DIR_MOVED, events.DIR_DELETED):
+                continue
+            src_path = os.path.normpath(src_path)
+            if current != src_path and not current.startswith(src_path + os.sep):
+                continue
+            touched = True
+            if event_type == events.DIR_MOVED:
+                current = os.path.normpath(dest_path) + current[len(src_path):]
+        if touched:
+            # A removed directory is no longer found; the views fall back to the location
+            self.current_path = current
+        return touched
+    
+    def _update_status_label(self, *args):
+        """Update the status label from the running file count."""
+        if not self.tracked_location or not self.model:
+            return
+        
+        default_folders = FolderManager.get_default_folder_paths(self.tracked_location)
+        folder_count = len([f for f in default_folders if Path(f).exists()])
+        if self.file_counter.is_ready:
+            files_text = f"{self.file_counter.count} files"
+        else:
+            files_text = "counting files..."
+        self.status_label.setText(
+            f"📂 {Path(self.tracked_location).name}  •  {files_text}  •  {folder_count} folders"
+        )
     
     def set_current_view(self, view_mode):
         """
@@ -239,6 +400,9 @@ class FileBrowser(QWidget):
         """
         self.current_view = view_mode
         self.stacked_widget.setCurrentIndex(view_mode)
+        if view_mode != self.VIEW_GRID:
+            # Thumbnails for a hidden grid are not worth rendering
+            self.thumbnail_provider.clear_pending()
     
     def on_item_double_clicked(self, index):
         """
@@ -249,16 +413,18 @@ class FileBrowser(QWidget):
         """
         if self.model:
             file_path = self.model.filePath(index)
-            file_path_obj = Path(file_path)
+            if not file_path:
+                return  # Loading row
             
-            if file_path_obj.is_file():
+            # The model already knows the type; no disk access on the GUI thread
+            if self.model.isDir(index):
+                # Navigate into directory
+                self._navigate_to_directory(file_path)
+            else:
                 # Emit signal for file selection
                 self.file_selected.emit(file_path)
                 # Open file with system default application
                 self._open_file(file_path)
-            elif file_path_obj.is_dir():
-                # Navigate into directory
-                self._navigate_to_directory(file_path)
     
     def _open_file(self, file_path):
         """
@@ -295,8 +461,17 @@ class FileBrowser(QWidget):
                 self.list_view.setRootIndex(dir_index)
                 self.tree_view.setRootIndex(dir_index)
                 self.grid_view.setRootIndex(dir_index)
+                self.thumbnail_provider.clear_pending()
+                if isinstance(self.model, IndexItemModel):
+                    # Listings of folders left behind are no longer needed
+                    self.model.cancel_loading(directory_path)
                 self._update_navigation_buttons()
     
+    def _on_thumbnail_ready(self, file_path):
+        """Repaint the grid when a thumbnail for one of its files arrives."""
+        if self.current_view == self.VIEW_GRID and self.isVisible():
+            self.grid_view.viewport().update()
+    
     def navigate_back(self):
         """Navigate to the previous directory."""
         # For now, just navigate up (can be enhanced with history)
@@ -305,32 +480,30 @@ class FileBrowser(QWidget):
     def navigate_up(self):
         """Navigate up one level."""
         if self.current_path and self.tracked_location:
-            current = Path(self.current_path).resolve()
-            tracked = Path(self.tracked_location).resolve()
-            parent = current.parent
-            
             # Don't go above the tracked location root
-            try:
-                parent.relative_to(tracked)
-                self._navigate_to_directory(str(parent))
-            except ValueError:
-                # Parent is not relative to tracked location, don't navigate
-                pass
+            if self._is_below_tracked_location(self.current_path):
+                self._navigate_to_directory(os.path.dirname(os.path.normpath(self.current_path)))
+    
+    def _is_below_tracked_location(self, path):
+        """
+        Check whether a path is inside the tracked location (but not the location itself).
+        
+        Compares paths as strings; resolving them would touch the disk.
+        
+        Args:
+            path (str): Path to check
+        
+        Returns:
+            bool: True if path is below the tracked location
+        """
+        tracked = os.path.normpath(self.tracked_location)
+        return os.path.normpath(path).startswith(tracked.rstrip(os.sep) + os.sep)
     
     def _update_navigation_buttons(self):
         """Update navigation button states."""
         if self.current_path and self.tracked_location:
-            current = Path(self.current_path).resolve()
-            tracked = Path(self.tracked_location).resolve()
-            
             # Enable up button only if we're not at root
-            can_go_up = False
-            if str(current) != str(tracked):
-                try:
-                    current.relative_to(tracked)
-                    can_go_up = True
-                except ValueError:
-                    can_go_up = False
+            can_go_up = self._is_below_tracked_location(self.current_path)
             
             self.up_button.setEnabled(can_go_up)
             self.back_button.setEnabled(can_go_up)
@@ -345,49 +518,172 @@ class FileBrowser(QWidget):
         if not self.model:
             return
         
-        # QFileSystemModel doesn't have built-in filtering,
-        # so we'll use name filters
-        if text:
-            name_filters = [f"*{text}*"]
+        if self.name_index is not None:
+            # Whole-tree name search in the background; the model itself is never re-filtered
+            if text.strip():
+                self.name_search_timer.start(self.NAME_SEARCH_DELAY_MS)
+            else:
+                self.name_search_timer.stop()
+                self.name_searcher.cancel()
+                self._name_search_request = None
+                self._show_name_results([])
+        elif isinstance(self.model, QFileSystemModel):
+            # No name index yet - fall back to filtering the current directory
+            name_filters = [f"*{text}*"] if text else ["*"]
+            self.model.setNameFilters(name_filters)
+            self.model.setNameFilterDisables(False)
+        
+        # Content results for the old text are stale now
+        self._content_search_request = None
+        self.search_results.set_results(SearchResultsView.SECTION_CONTENTS, [])
+        
+        # Look inside documents too, once the user pauses typing
+        self.content_search_timer.start(self.CONTENT_SEARCH_DELAY_MS)
+    
+    def set_name_index(self, name_index):
+        """
+        Set the index used for whole-tree filename search.
+        
+        Args:
+            name_index: TrigramIndex instance, or None to filter the model instead
+        """
+        self.name_search_timer.stop()
+        self.name_searcher.cancel()
+        self._name_search_request = None
+        self._name_results = []
+        self.name_index = name_index
+        if isinstance(self.model, QFileSystemModel):
+            # Drop any name filter applied while there was no index
+            self.model.setNameFilters(["*"])
+        self.search_results.clear_results()
+    
+    def _run_name_search(self):
+        """Query the name index for the current search text in the background."""
+        text = self.search_edit.text()
+        if self.name_index is not None and text.strip():
+            self._name_search_request = self.name_searcher.search(
+                self.name_index, text, self.NAME_SEARCH_LIMIT
+            )
+    
+    def _on_name_results(self, request_id, paths, complete):
+        """
+        Show name search results, unless the search text changed since.
+        
+        Args:
+            request_id (int): Id of the query
+            paths (list): Matching paths found so far, best first
+            complete (bool): Whether the query is done
+        """
+        if request_id != self._name_search_request:
+            return
+        if complete:
+            self._name_search_request = None
+        self._show_name_results(paths)
+    
+    def _show_name_results(self, paths):
+        """Replace the file names section unless it already shows paths."""
+        if paths != self._name_results:
+            self._name_results = paths
+            self.search_results.set_results(SearchResultsView.SECTION_NAMES, paths)
+    
+    def set_content_index(self, content_index):
+        """
+        Set the content index used to search inside documents.
+        
+        Args:
+            content_index: ContentIndex instance, or None to disable
+        """
+        # The old index may be closed next; let a running query finish first
+        self.content_searcher.cancel(wait=True)
+        self._content_search_request = None
+        self.content_index = content_index
+        self.search_results.set_results(SearchResultsView.SECTION_CONTENTS, [])
+    
+    def _run_content_search(self):
+        """Query the content index for the current search text in the background."""
+        text = self.search_edit.text().strip()
+        if self.content_index and len(text) >= 2:
+            self._content_search_request = self.content_searcher.search(
+                self.content_index, text, self.CONTENT_SEARCH_LIMIT
+            )
         else:
-            name_filters = ["*"]
+            self._content_search_request = None
+            self.search_results.set_results(SearchResultsView.SECTION_CONTENTS, [])
+    
+    def _on_content_results(self, request_id, results):
+        """
+        Show content search results, unless the search text changed since.
+        
+        Args:
+            request_id (int): Id of the query
+            results (list): (path, score) tuples
+        """
+        if request_id != self._content_search_request:
+            return
+        self._content_search_request = None
+        self.search_results.set_results(
+            SearchResultsView.SECTION_CONTENTS, [path for path, score in results]
+        )
+    
+    def on_search_result_activated(self, file_path):
+        """
+        Open a file picked from the search results.
         
-        self.model.setNameFilters(name_filters)
-        self.model.setNameFilterDisables(False)
+        Args:
+            file_path (str): Path of the activated result
+        """
+        if file_path and Path(file_path).is_file():
+            self.file_selected.emit(file_path)
+            self._open_file(file_path)
     
+    @metrics.timed('browser.refresh')
     def refresh(self):
         """Refresh the file browser view while preserving current directory."""
         if self.tracked_location and self.model:
-            # Update the model's root path (this refreshes the model)
-            self.model.setRootPath(self.tracked_location)
+            if isinstance(self.model, QFileSystemModel):
+                # Update the model's root path (this refreshes the model)
+                self.model.setRootPath(self.tracked_location)
             
             # Preserve the current path if we're in a subdirectory
             # If current_path is not set or invalid, default to tracked_location
-            current_path = self.current_path if self.current_path and Path(self.current_path).exists() else self.tracked_location
-            
-            # Get the index for the current path
-            current_index = self.model.index(current_path)
-            if current_index.isValid():
-                self.current_path = current_path
-                # Set root index to current path (preserves navigation)
-                self.list_view.setRootIndex(current_index)
-                self.tree_view.setRootIndex(current_index)
-                self.grid_view.setRootIndex(current_index)
-            else:
-                # Fallback to tracked location if current path is invalid
-                root_index = self.model.index(self.tracked_location)
-                self.current_path = self.tracked_location
-                self.list_view.setRootIndex(root_index)
-                self.tree_view.setRootIndex(root_index)
-                self.grid_view.setRootIndex(root_index)
-            
-            self._update_navigation_buttons()
+            self._restore_root_index()
             
-            # Update file count (always count from root)
-            default_folders = FolderManager.get_default_folder_paths(self.tracked_location)
-            file_count = self._count_files(self.tracked_location, default_folders)
-            folder_count = len([f for f in default_folders if Path(f).exists()])
-            self.status_label.setText(
-                f"📂 {Path(self.tracked_location).name}  •  {file_count} files  •  {folder_count} folders"
-            )
-
+            # File count is kept current by the running counter
+            self._update_status_label()
+    
+    @metrics.timed('browser.apply_changes')
+    def apply_changes(self, changes):
+        """
+        Apply a batch of file watcher changes to the browser.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        self.file_counter.apply_changes(changes)
+        changed_paths = [
+            path for _, src_path, dest_path in changes for path in (src_path, dest_path) if path
+        ]
+        self.thumbnail_provider.invalidate(changed_paths)
+        self.directory_lister.stat_cache.invalidate(changed_paths)
+        if not isinstance(self.model, IndexItemModel) and self._touches_current_directory(changes):
+            # The index model updates once the index worker has stored the changes
+            self.refresh()
+    
+    def _touches_current_directory(self, changes):
+        """
+        Check whether a batch of changes affects the directory being viewed.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        
+        Returns:
+            bool: True if any changed path is directly inside the current directory
+        """
+        if not self.current_path:
+            return False
+        current = os.path.normpath(self.current_path)
+        for _, src_path, dest_path in changes:
+            for path in (src_path, dest_path):
+                if path and os.path.dirname(os.path.normpath(path)) == current:
+                    return True
+        return False
@@ -0,0 +1,707 @@
+"""Item model that lists directories from the metadata index."""
+import os
+from PyQt5.QtWidgets import QFileIconProvider
+from PyQt5.QtCore import (
+    Qt, QAbstractItemModel, QModelIndex, QPersistentModelIndex, QDateTime, QLocale
+)
+from PyQt5.QtGui import QColor, QFont
+from services import events
+from ui.styles import COLORS
+
+
+class _Node:
+    """One entry of the model; directory nodes load their children in pages."""
+    
+    __slots__ = ('path', 'name', 'is_dir', 'size', 'mtime', 'parent', 'row',
+                 'children', 'by_name', 'cursor', 'complete', 'stale_from', 'request_id')
+    
+    def __init__(self, path, name, is_dir, size=0, mtime=0.0, parent=None, row=0):
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.parent = parent
+        self.row = row
+        self.children = []
+        self.by_name = {}
+        self.cursor = None
+        self.complete = not is_dir
+        self.stale_from = None  # First child whose row number needs renumbering
+        self.request_id = None  # Directory listing in progress
+
+
+class IndexItemModel(QAbstractItemModel):
+    """
+    Tree model over the metadata index, a replacement for QFileSystemModel.
+    
+    Nothing is read from the disk: directories are paged out of the index
+    through canFetchMore()/fetchMore(), so opening a folder costs one page
+    however many entries it has, and sorting is done by the index rather
+    than in memory. Column text is only formatted when a view asks for it,
+    and icons are the generic file and folder icons instead of per-file
+    lookups. The filePath()/index(path)/isDir() methods mirror
+    QFileSystemModel so views and callers can use either model.
+    
+    Directories the index has not listed yet (a first run, or a folder
+    created since the last catch-up) are listed by a DirectoryLister
+    instead: a "Loading..." row is shown while its entries stream in.
+    """
+    
+    COLUMN_NAME = 0
+    COLUMN_SIZE = 1
+    COLUMN_TYPE = 2
+    COLUMN_MODIFIED = 3
+    
+    HEADERS = ("Name", "Size", "Type", "Date Modified")
+    
+    FilePathRole = Qt.UserRole + 1
+    
+    # Entries loaded per fetchMore()
+    FETCH_BATCH_SIZE = 256
+    
+    LOADING_TEXT = "Loading..."
+    
+    def __init__(self, metadata_index, root_path, lister=None, parent=None):
+        """
+        Initialize index model.
+        
+        Args:
+            metadata_index: MetadataIndex to read listings from
+            root_path (str): Tracked location; the top of the model
+            lister (DirectoryLister): Lists directories missing from the index
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.metadata_index = metadata_index
+        self.root_path = os.path.normpath(str(root_path))
+        self.lister = lister
+        self._listings = {}  # Request id -> directory node being listed
+        if lister is not None:
+            lister.entries_listed.connect(self._on_entries_listed)
+            lister.listing_finished.connect(self._on_listing_finished)
+        self._sort_key = metadata_index.SORT_NAME
+        self._descending = False
+        self._sort_keys = {
+            self.COLUMN_NAME: metadata_index.SORT_NAME,
+            self.COLUMN_SIZE: metadata_index.SORT_SIZE,
+            self.COLUMN_TYPE: metadata_index.SORT_TYPE,
+            self.COLUMN_MODIFIED: metadata_index.SORT_MTIME,
+        }
+        
+        icon_provider = QFileIconProvider()
+        self._folder_icon = icon_provider.icon(QFileIconProvider.Folder)
+        self._file_icon = icon_provider.icon(QFileIconProvider.File)
+        self._locale = QLocale()
+        self._loading_font = QFont()
+        self._loading_font.setItalic(True)
+        
+        self._root = self._new_root()
+    
+    def _new_root(self):
+        """Create the invisible root node: the parent of the tracked location."""
+        root = _Node(None, "", True)
+        location = _Node(self.root_path, os.path.basename(self.root_path) or self.root_path,
+                         True, parent=root)
+        root.children = [location]
+        root.by_name = {location.name: location}
+        root.complete = True
+        return root
+    
+    def reload(self):
+        """Drop all loaded listings and start again from the index."""
+        self.beginResetModel()
+        self._cancel_listings(lambda node: True)
+        self._root = self._new_root()
+        self.endResetModel()
+    
+    # ------------------------------------------------------------------
+    # Structure
+    # ------------------------------------------------------------------
+    
+    def _node(self, index):
+        """Get the node behind an index (the invisible root for an invalid index)."""
+        return index.internalPointer() if index.isValid() else self._root
+    
+    def index(self, row, column=0, parent=QModelIndex()):
+        """
+        Get a model index by position, or by path like QFileSystemModel.index(path).
+        
+        Args:
+            row (int or str): Row in the parent, or a file path
+            column (int): Column
+            parent (QModelIndex): Parent index
+        
+        Returns:
+            QModelIndex: The index (invalid if not found)
+        """
+        if isinstance(row, str):
+            node = self._node_for_path(row)
+            return self._index_of(node, column) if node else QModelIndex()
+        parent_node = self._node(parent)
+        if 0 <= row < len(parent_node.children) and 0 <= column < len(self.HEADERS):
+            return self.createIndex(row, column, parent_node.children[row])
+        return QModelIndex()
+    
+    def parent(self, index):
+        """Get the parent of an index."""
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self._root:
+            return QModelIndex()
+        return self._index_of(parent_node)
+    
+    def _index_of(self, node, column=0):
+        """Create the index of a node, renumbering its siblings first if needed."""
+        siblings = node.parent
+        if siblings.stale_from is not None:
+            for row in range(siblings.stale_from, len(siblings.children)):
+                siblings.children[row].row = row
+            siblings.stale_from = None
+        return self.createIndex(node.row, column, node)
+    
+    def rowCount(self, parent=QModelIndex()):
+        """Number of loaded children."""
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+    
+    def columnCount(self, parent=QModelIndex()):
+        """Number of columns."""
+        return len(self.HEADERS)
+    
+    def hasChildren(self, parent=QModelIndex()):
+        """Directories may have children; they are only counted when fetched."""
+        node = self._node(parent)
+        return node.is_dir and (bool(node.children) or not node.complete)
+    
+    def canFetchMore(self, parent):
+        """Whether a directory has entries that are not loaded yet."""
+        node = self._node(parent)
+        return not node.complete and node.request_id is None
+    
+    def fetchMore(self, parent):
+        """Load the next page of a directory from the index."""
+        self._fetch(self._node(parent), parent)
+    
+    def _fetch(self, node, parent_index):
+        """
+        Append one page of entries to a directory node.
+        
+        Returns:
+            int: Number of entries added
+        """
+        if node.complete or node.request_id is not None:
+            return 0
+        if node.cursor is None and self.lister is not None and not self._is_listed(node):
+            self._start_listing(node, parent_index)
+            return 0
+        try:
+            entries, cursor = self.metadata_index.list_children(
+                node.path, self._sort_key, self._descending, node.cursor, self.FETCH_BATCH_SIZE
+            )
+        except Exception as e:
+            print(f"Error listing {node.path} from index: {e}")
+            entries, cursor = [], None
+        
+        node.cursor = cursor
+        node.complete = cursor is None
+        if not entries:
+            return 0
+        
+        first = len(node.children)
+        self.beginInsertRows(parent_index, first, first + len(entries) - 1)
+        for offset, entry in enumerate(entries):
+            child = _Node(entry['path'], entry['name'], entry['is_dir'],
+                          entry['size'], entry['mtime'], node, first + offset)
+            node.children.append(child)
+            node.by_name[child.name] = child
+        self.endInsertRows()
+        return len(entries)
+    
+    def _node_for_path(self, path, fetch=True):
+        """
+        Find the node of a path under the root, loading pages as needed.
+        
+        Directories are listed before files, so finding a directory only
+        loads pages up to the subdirectories, never the whole listing.
+        
+        Args:
+            path (str): Path to look up
+            fetch (bool): Load further pages; if False only loaded nodes are found
+        
+        Returns:
+            _Node: The node, or None if it isn't in the index (or not loaded)
+        """
+        path = os.path.normpath(str(path))
+        location = self._root.children[0]
+        if path == self.root_path:
+            return location
+        prefix = self.root_path.rstrip(os.sep) + os.sep
+        if not path.startswith(prefix):
+            return None
+        
+        node = location
+        for name in path[len(prefix):].split(os.sep):
+            child = node.by_name.get(name)
+            while fetch and child is None and not node.complete and node.request_id is None:
+                self._fetch(node, self._index_of(node))
+                child = node.by_name.get(name)
+            if child is None:
+                return None
+            node = child
+        return node
+    
+    # ------------------------------------------------------------------
+    # Directories missing from the index
+    # ------------------------------------------------------------------
+    
+    def _is_listed(self, node):
+        """Check whether the index has the entries of a directory."""
+        try:
+            return self.metadata_index.is_listed(node.path)
+        except Exception as e:
+            print(f"Error checking {node.path} in index: {e}")
+            return False
+    
+    def _start_listing(self, node, parent_index):
+        """List a directory in the background behind a loading row."""
+        self.beginInsertRows(parent_index, 0, 0)
+        placeholder = _Node(None, self.LOADING_TEXT, False, parent=node)
+        node.children.append(placeholder)
+        self.endInsertRows()
+        node.request_id = self.lister.list_directory(node.path)
+        self._listings[node.request_id] = node
+    
+    def _on_entries_listed(self, request_id, directory, entries):
+        """Insert a chunk of a background listing above the loading row."""
+        node = self._listings.get(request_id)
+        if node is None:
+            return
+        entries = [e for e in entries if e['name'] not in node.by_name]
+        if not entries:
+            return
+        first = len(node.children) - 1
+        self.beginInsertRows(self._index_of(node), first, first + len(entries) - 1)
+        for offset, entry in enumerate(entries):
+            child = _Node(entry['path'], entry['name'], entry['is_dir'],
+                          entry['size'], entry['mtime'], node, first + offset)
+            node.children.insert(first + offset, child)
+            node.by_name[child.name] = child
+        self._mark_stale(node, first + len(entries))
+        self.endInsertRows()
+    
+    def _on_listing_finished(self, request_id, directory, error):
+        """Drop the loading row and put the listed entries in sort order."""
+        node = self._listings.pop(request_id, None)
+        if node is None:
+            return
+        node.request_id = None
+        node.complete = True
+        row = len(node.children) - 1
+        self.beginRemoveRows(self._index_of(node), row, row)
+        node.children.pop()
+        self.endRemoveRows()
+        self._sort_loaded(node)
+    
+    def _sort_loaded(self, node):
+        """Sort the children of a directory in memory the way the index would."""
+        if len(node.children) < 2:
+            return
+        if self._sort_key == self.metadata_index.SORT_SIZE:
+            key = lambda child: (child.size, child.name.lower())
+        elif self._sort_key == self.metadata_index.SORT_MTIME:
+            key = lambda child: (child.mtime, child.name.lower())
+        elif self._sort_key == self.metadata_index.SORT_TYPE:
+            key = lambda child: (os.path.splitext(child.name)[1].lower(), child.name.lower())
+        else:
+            key = lambda child: child.name.lower()
+        directories = sorted((c for c in node.children if c.is_dir), key=key,
+                             reverse=self._descending)
+        files = sorted((c for c in node.children if not c.is_dir), key=key,
+                       reverse=self._descending)
+        
+        parents = [QPersistentModelIndex(self._index_of(node))]
+        self.layoutAboutToBeChanged.emit(parents)
+        self._index_of(node.children[0])  # Renumber before reading rows
+        new_rows = {id(child): row for row, child in enumerate(directories + files)}
+        old_indexes, new_indexes = [], []
+        for index in self.persistentIndexList():
+            child = index.internalPointer()
+            if index.isValid() and child is not None and child.parent is node:
+                old_indexes.append(index)
+                new_indexes.append(self.createIndex(new_rows[id(child)], index.column(), child))
+        node.children = directories + files
+        for row, child in enumerate(node.children):
+            child.row = row
+        node.stale_from = None
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit(parents)
+    
+    def cancel_loading(self, keep_path):
+        """
+        Cancel background listings outside a directory, e.g. after navigating away.
+        
+        Cancelled directories are emptied and listed again when next shown.
+        
+        Args:
+            keep_path (str): Directory whose listings (and those below it) continue
+        """
+        keep_path = os.path.normpath(keep_path)
+        keep_prefix = keep_path.rstrip(os.sep) + os.sep
+        self._cancel_listings(
+            lambda node: node.path != keep_path and not node.path.startswith(keep_prefix),
+            reset_nodes=True
+        )
+    
+    def _cancel_listings(self, should_cancel, reset_nodes=False):
+        """Cancel the listings of nodes matching a predicate."""
+        for request_id, node in list(self._listings.items()):
+            if not should_cancel(node):
+                continue
+            self.lister.cancel(request_id)
+            del self._listings[request_id]
+            node.request_id = None
+            if reset_nodes and node.children:
+                self.beginRemoveRows(self._index_of(node), 0, len(node.children) - 1)
+                node.children = []
+                node.by_name = {}
+                node.stale_from = None
+                self.endRemoveRows()
+    
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    
+    def apply_changes(self, changes):
+        """
+        Update loaded listings from changes already written to the index.
+        
+        Only directories that have been loaded - the ones views can show -
+        are touched, and only the affected rows are inserted, removed or
+        changed, so views keep their scroll position and selection. New
+        entries are placed where the index sorts them; entries sorting past
+        the loaded part of a directory are left for fetchMore(). Renamed
+        folders are moved with their loaded contents, so a view showing or
+        expanding them keeps doing so.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        removed, added, modified = [], [], []
+        for event_type, src_path, dest_path in changes:
+            if event_type in (events.DELETED, events.DIR_DELETED):
+                removed.append(src_path)
+            elif event_type == events.MOVED:
+                removed.append(src_path)
+                added.append(dest_path)
+            elif event_type in (events.CREATED, events.DIR_CREATED):
+                added.append(src_path)
+            elif event_type == events.MODIFIED:
+                modified.append(src_path)
+            elif event_type == events.DIR_MOVED:
+                # Right away, so the events of the files inside find them moved
+                if not self._move_directory(os.path.normpath(src_path),
+                                            os.path.normpath(dest_path)):
+                    added.append(dest_path)
+        
+        if self._sort_key != self.metadata_index.SORT_NAME:
+            # Size or date changes can move the entry
+            removed.extend(modified)
+            added.extend(modified)
+            modified = []
+        
+        for path in removed:
+            node = self._node_for_path(path, fetch=False)
+            if node is not None and node.parent is not self._root:
+                self._remove_node(node)
+        
+        self._insert_paths(added)
+        
+        for path in modified:
+            node = self._node_for_path(path, fetch=False)
+            if node is not None and node.parent is not self._root:
+                self._refresh_node(node)
+    
+    def _loaded_parent(self, path):
+        """
+        Find the deepest loaded directory on the way to a path.
+        
+        Returns:
+            tuple: (directory node, path of its child towards `path`), or
+                   (None, None) if the path is outside the root or already loaded
+        """
+        prefix = self.root_path.rstrip(os.sep) + os.sep
+        if not path.startswith(prefix):
+            return None, None
+        node = self._root.children[0]
+        child_path = self.root_path
+        for name in path[len(prefix):].split(os.sep):
+            child_path = os.path.join(child_path, name)
+            child = node.by_name.get(name)
+            if child is None:
+                return node, child_path
+            node = child
+        return None, None
+    
+    def _insert_paths(self, paths):
+        """Insert new entries into loaded directories, in index order."""
+        inserts = {}  # Directory node -> {row: entry}
+        seen = set()
+        for path in paths:
+            path = os.path.normpath(path)
+            parent_node, child_path = self._loaded_parent(path)
+            if parent_node is None:
+                # Already loaded, e.g. a file saved over an existing one
+                node = self._node_for_path(path, fetch=False)
+                if node is not None and node.parent is not self._root:
+                    self._refresh_node(node)
+                continue
+            # A file in a new folder shows up as that folder in the loaded directory
+            if child_path in seen:
+                continue
+            seen.add(child_path)
+            if parent_node.request_id is not None:
+                continue  # Being listed; the listing will include it
+            if not parent_node.children and not parent_node.complete:
+                continue  # Never fetched; the first fetch will include it
+            try:
+                found = self.metadata_index.child_position(
+                    child_path, self._sort_key, self._descending
+                )
+            except Exception as e:
+                print(f"Error looking up {child_path} in index: {e}")
+                continue
+            if found is None:
+                continue
+            entry, row = found
+            if row >= len(parent_node.children) and not parent_node.complete:
+                continue  # Sorts past the loaded part; fetchMore() will bring it
+            inserts.setdefault(parent_node, {})[row] = entry
+        
+        # Rows are positions in the final listing, so insert lowest first
+        for parent_node, entries in inserts.items():
+            parent_index = self._index_of(parent_node)
+            for row in sorted(entries):
+                entry = entries[row]
+                row = min(row, len(parent_node.children))
+                self.beginInsertRows(parent_index, row, row)
+                child = _Node(entry['path'], entry['name'], entry['is_dir'],
+                              entry['size'], entry['mtime'], parent_node, row)
+                parent_node.children.insert(row, child)
+                parent_node.by_name[child.name] = child
+                self._mark_stale(parent_node, row + 1)
+                self.endInsertRows()
+    
+    def _move_directory(self, src_path, dest_path):
+        """
+        Move a loaded directory node to its new path and sort position.
+        
+        Args:
+            src_path (str): Old directory path
+            dest_path (str): New directory path (already in the index)
+        
+        Returns:
+            bool: False if the new path still has to be inserted
+        """
+        node = self._node_for_path(src_path, fetch=False)
+        if node is None or node.parent is self._root:
+            return False
+        dest_parent = self._node_for_path(os.path.dirname(dest_path), fetch=False)
+        if (dest_parent is None or dest_parent.request_id is not None
+                or (not dest_parent.children and not dest_parent.complete)):
+            self._remove_node(node)
+            return False
+        try:
+            found = self.metadata_index.child_position(dest_path, self._sort_key, self._descending)
+        except Exception as e:
+            print(f"Error looking up {dest_path} in index: {e}")
+            found = None
+        old_parent = node.parent
+        same_parent = old_parent is dest_parent
+        last_row = len(dest_parent.children) - (1 if same_parent else 0)
+        if found is None or (found[1] > last_row and not dest_parent.complete):
+            # Gone again, or sorts past the loaded part; fetchMore() brings it
+            self._remove_node(node)
+            return True
+        new_row = min(found[1], last_row)
+        
+        # Listings started under the old path would add entries with old paths
+        old_prefix = src_path + os.sep
+        self._cancel_listings(
+            lambda other: other.path == src_path or other.path.startswith(old_prefix),
+            reset_nodes=True
+        )
+        
+        old_row = self._index_of(node).row()
+        # Qt counts the destination row before the node is taken out
+        dest_row = new_row + 1 if same_parent and new_row > old_row else new_row
+        moving = self.beginMoveRows(self._index_of(old_parent), old_row, old_row,
+                                    self._index_of(dest_parent), dest_row)
+        del old_parent.children[old_row]
+        old_parent.by_name.pop(node.name, None)
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.path is not None:
+                current.path = dest_path + current.path[len(src_path):]
+            stack.extend(current.children)
+        node.name = os.path.basename(dest_path)
+        node.parent = dest_parent
+        dest_parent.children.insert(new_row, node)
+        dest_parent.by_name[node.name] = node
+        if same_parent:
+            self._mark_stale(old_parent, min(old_row, new_row))
+        else:
+            self._mark_stale(old_parent, old_row)
+            self._mark_stale(dest_parent, new_row)
+        if moving:
+            self.endMoveRows()
+        self.dataChanged.emit(
+            self._index_of(node, self.COLUMN_NAME), self._index_of(node, self.COLUMN_MODIFIED)
+        )
+        return True
+    
+    def _remove_node(self, node):
+        """Remove a loaded node and its loaded children."""
+        parent_node = node.parent
+        row = self._index_of(node).row()
+        self.beginRemoveRows(self._index_of(parent_node), row, row)
+        del parent_node.children[row]
+        parent_node.by_name.pop(node.name, None)
+        self._mark_stale(parent_node, row)
+        self.endRemoveRows()
+    
+    def _refresh_node(self, node):
+        """Re-read a changed entry and update its size and date columns."""
+        try:
+            entry = self.metadata_index.get(node.path)
+        except Exception as e:
+            print(f"Error looking up {node.path} in index: {e}")
+            return
+        if entry is None:
+            return
+        node.size = entry['size']
+        node.mtime = entry['mtime']
+        self.dataChanged.emit(
+            self._index_of(node, self.COLUMN_SIZE), self._index_of(node, self.COLUMN_MODIFIED)
+        )
+    
+    @staticmethod
+    def _mark_stale(parent_node, row):
+        """Note that children from a row on have moved; they are renumbered lazily."""
+        if row < len(parent_node.children):
+            if parent_node.stale_from is None or row < parent_node.stale_from:
+                parent_node.stale_from = row
+    
+    # ------------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------------
+    
+    def data(self, index, role=Qt.DisplayRole):
+        """Column data, formatted when it is asked for."""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+        
+        if node.path is None:
+            # Loading row
+            if role == Qt.DisplayRole and column == self.COLUMN_NAME:
+                return node.name
+            if role == Qt.FontRole:
+                return self._loading_font
+            if role == Qt.ForegroundRole:
+                return QColor(COLORS['text_secondary'])
+            return None
+        
+        if role == Qt.DisplayRole:
+            if column == self.COLUMN_NAME:
+                return node.name
+            if column == self.COLUMN_SIZE:
+                return "" if node.is_dir else self._format_size(node.size)
+            if column == self.COLUMN_TYPE:
+                return self._type_name(node)
+            if column == self.COLUMN_MODIFIED:
+                if node.mtime < 0:
+                    return ""
+                date = QDateTime.fromMSecsSinceEpoch(int(node.mtime * 1000))
+                return self._locale.toString(date, QLocale.ShortFormat)
+        elif role == Qt.DecorationRole and column == self.COLUMN_NAME:
+            return self._folder_icon if node.is_dir else self._file_icon
+        elif role == Qt.TextAlignmentRole and column == self.COLUMN_SIZE:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        elif role == self.FilePathRole:
+            return node.path
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """Column titles."""
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+    
+    def flags(self, index):
+        """Items are selectable and enabled."""
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer().path is None:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+    
+    def _format_size(self, size):
+        """Format a file size like QFileSystemModel does."""
+        return self._locale.formattedDataSize(size, 1, QLocale.DataSizeTraditionalFormat)
+    
+    @staticmethod
+    def _type_name(node):
+        """Describe an entry's type from its name alone."""
+        if node.is_dir:
+            return "Folder"
+        extension = os.path.splitext(node.name)[1][1:]
+        return f"{extension} File" if extension else "File"
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sort by a column; the index returns listings in the new order.
+        
+        Loaded listings are dropped and fetched again page by page.
+        """
+        sort_key = self._sort_keys.get(column, self.metadata_index.SORT_NAME)
+        descending = order == Qt.DescendingOrder
+        if (sort_key, descending) == (self._sort_key, self._descending):
+            return
+        self._sort_key = sort_key
+        self._descending = descending
+        self.reload()
+    
+    # ------------------------------------------------------------------
+    # QFileSystemModel compatible helpers
+    # ------------------------------------------------------------------
+    
+    def filePath(self, index):
+        """
+        Get the path of an index.
+        
+        Args:
+            index (QModelIndex): Model index
+        
+        Returns:
+            str: File path ('' for an invalid index)
+        """
+        if not index.isValid():
+            return ""
+        return index.internalPointer().path or ""
+    
+    def isDir(self, index):
+        """
+        Check whether an index is a directory.
+        
+        Args:
+            index (QModelIndex): Model index
+        
+        Returns:
+            bool: True for directories
+        """
+        return index.isValid() and index.internalPointer().is_dir
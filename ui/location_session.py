@@ -0,0 +1,213 @@
+"""Everything that belongs to one tracked location."""
+from PyQt5.QtCore import QObject, pyqtSignal
+from services.folder_manager import FolderManager
+from services.change_journal import ChangeJournal
+from services.ignore_rules import IgnoreMatcher
+from services.index import MetadataIndex, ContentIndex, TrigramIndex, HashIndex
+from services.index.index_worker import IndexWorker
+from services.index.content_worker import ContentIndexWorker
+from services.index.hash_worker import HashWorker
+from ui.file_browser import FileBrowser
+
+
+class LocationSession(QObject):
+    """
+    Journal, indexes, index workers and file browser of one tracked location.
+    
+    Every tracked location keeps its own session for as long as it is
+    tracked, so its browser model, running file count and search indexes
+    stay warm and switching between locations only swaps the visible
+    browser. The indexes of all locations share one database per index.
+    """
+    
+    status_message = pyqtSignal(str, str)  # Location path, message
+    
+    def __init__(self, path, thumbnail_provider=None, parent=None):
+        """
+        Initialize location session.
+        
+        Args:
+            path (str): Root directory of the location
+            thumbnail_provider (ThumbnailProvider): Provider shared by all browsers
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.path = path
+        self.ignore_matcher = None
+        self.journal = None
+        self.metadata_index = None
+        self.index_worker = None
+        self.content_index = None
+        self.content_worker = None
+        self.hash_index = None
+        self.hash_worker = None
+        self._content_sync_pending = False
+        self.file_browser = FileBrowser(thumbnail_provider)
+    
+    def open(self):
+        """Open the journal and indexes and show the location in the browser."""
+        # Default rules plus any .dmsignore files, shared by all walkers
+        self.ignore_matcher = IgnoreMatcher(self.path)
+        try:
+            self.journal = ChangeJournal(self.path)
+        except Exception as e:
+            print(f"Error opening change journal: {e}")
+            self.journal = None
+        
+        # Bring the metadata index up to date in the background; the
+        # browser lists directories from it when it is already built
+        self.start_index()
+        self.file_browser.set_tracked_location(self.path, self.ignore_matcher)
+    
+    def close(self, forget=False):
+        """
+        Stop the workers and close the indexes and the journal.
+        
+        Args:
+            forget (bool): Also drop the location from the metadata index
+        """
+        self.stop_index(forget)
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        self.file_browser.file_counter.stop()
+        self.file_browser.directory_lister.shutdown()
+        self.file_browser.content_searcher.shutdown()
+        self.file_browser.name_searcher.shutdown()
+    
+    def start_index(self):
+        """Open the indexes of the location and start catching them up."""
+        self.stop_index()
+        try:
+            self.metadata_index = MetadataIndex(self.path, ignore_matcher=self.ignore_matcher)
+        except Exception as e:
+            print(f"Error opening metadata index: {e}")
+            self.metadata_index = None
+            return
+        
+        # Filenames are searched in memory; the worker fills it after catch-up
+        name_index = TrigramIndex()
+        self.file_browser.set_name_index(name_index)
+        
+        self.file_browser.set_metadata_index(self.metadata_index)
+        
+        self.index_worker = IndexWorker(self.metadata_index, name_index, self.journal)
+        self.index_worker.catch_up_finished.connect(self.on_index_caught_up)
+        self.index_worker.changes_applied.connect(self.file_browser.apply_index_changes)
+        self.index_worker.start()
+        self.index_worker.request_catch_up()
+        
+        # Duplicates are found among files of equal size, so hashing waits for catch-up
+        try:
+            self.hash_index = HashIndex(self.path)
+        except Exception as e:
+            print(f"Error opening hash index: {e}")
+            self.hash_index = None
+        if self.hash_index:
+            self.hash_worker = HashWorker(self.hash_index, self.metadata_index)
+            self.hash_worker.start()
+        
+        # Document text is indexed separately; extraction is much slower
+        try:
+            self.content_index = ContentIndex(self.path, ignore_matcher=self.ignore_matcher)
+        except Exception as e:
+            print(f"Error opening content index: {e}")
+            self.content_index = None
+            return
+        
+        self.content_worker = ContentIndexWorker(self.content_index, self.journal)
+        self.content_worker.sync_progress.connect(self.on_content_index_progress)
+        self.content_worker.start()
+        # Synced once catch-up has journaled what changed while we were closed
+        self._content_sync_pending = True
+        self.file_browser.set_content_index(self.content_index)
+    
+    def stop_index(self, forget=False):
+        """
+        Stop the index workers and close the indexes.
+        
+        Args:
+            forget (bool): Also drop the location from the metadata index
+        """
+        if self.hash_worker:
+            self.hash_worker.stop()
+            self.hash_worker = None
+        if self.hash_index:
+            self.hash_index.close()
+            self.hash_index = None
+        if self.content_worker:
+            self.content_worker.stop()
+            self.content_worker = None
+        if self.content_index:
+            self.file_browser.set_content_index(None)
+            self.content_index.close()
+            self.content_index = None
+        if self.index_worker:
+            self.index_worker.stop()
+            self.index_worker = None
+        if self.metadata_index:
+            self.file_browser.set_name_index(None)
+            self.file_browser.set_metadata_index(None)
+            if forget:
+                self.metadata_index.forget()
+            self.metadata_index.close()
+            self.metadata_index = None
+    
+    def request_catch_up(self):
+        """Reconcile the index with the disk, e.g. after watching was restarted."""
+        if self.index_worker:
+            self.index_worker.request_catch_up()
+    
+    def apply_changes(self, changes, journal_position=None):
+        """
+        Handle a batch of coalesced file changes in this location.
+        
+        Args:
+            changes (list): (event_type, src_path, dest_path) tuples
+            journal_position (str): Journal position after the batch
+        """
+        # One update per batch instead of one refresh per event
+        self.file_browser.apply_changes(changes)
+        if self.index_worker:
+            self.index_worker.enqueue_changes(changes, journal_position)
+        if self.content_worker:
+            self.content_worker.enqueue_changes(changes, journal_position)
+        if self.hash_worker:
+            self.hash_worker.enqueue_changes(changes)
+    
+    def on_index_caught_up(self, result):
+        """
+        Handle completion of the startup index catch-up.
+        
+        Args:
+            result (dict): Catch-up statistics and changes
+        """
+        print(
+            f"Index of {self.path} caught up: {result['dirs_scanned']} of "
+            f"{result['dirs_checked']} directories rescanned, {len(result['changes'])} file changes"
+        )
+        self.file_browser.on_index_caught_up(result['changes'])
+        if self.hash_worker:
+            self.hash_worker.request_scan()
+        if self.content_worker and self._content_sync_pending:
+            self._content_sync_pending = False
+            self.content_worker.request_sync()
+        if self.metadata_index:
+            # Indexed count is available long before a full walk finishes
+            default_folders = FolderManager.get_default_folder_paths(self.path)
+            self.file_browser.file_counter.seed(
+                self.metadata_index.count_files(default_folders)
+            )
+    
+    def on_content_index_progress(self, done, total):
+        """
+        Report progress of the initial document content indexing.
+        
+        Args:
+            done (int): Documents indexed so far
+            total (int): Documents to index
+        """
+        if done < total:
+            self.status_message.emit(self.path, f"Indexing document contents: {done} of {total}")
+        else:
+            self.status_message.emit(self.path, f"Tracking: {self.path}")
@@ -1,15 +1,23 @@
 """Main application window."""
+import os
+from pathlib import Path
 from PyQt5.QtWidgets import (
-    QMainWindow, QMenuBar, QMenu, QAction, QStatusBar, QMessageBox, QToolBar
+    QMainWindow, QMenuBar, QMenu, QAction, QActionGroup, QStatusBar, QMessageBox, QToolBar,
+    QStackedWidget, QComboBox, QLabel
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon
 from ui.file_browser import FileBrowser
 from ui.location_dialog import LocationDialog
-from ui.scanner_dialog import ScannerDialog
+from ui.location_session import LocationSession
+from ui.duplicates_dialog import DuplicatesDialog
+from ui.diagnostics_dialog import DiagnosticsDialog
+from ui.thumbnail_provider import ThumbnailProvider
 from ui.styles import get_modern_stylesheet
 from services.file_watcher import FileWatcher
+from services import metrics
 from utils.config import Config
+from utils import startup_profile
 
 
 class MainWindow(QMainWindow):
@@ -24,10 +32,21 @@ class MainWindow(QMainWindow):
         """
         super().__init__(parent)
         self.config = Config()
+        metrics.set_enabled(self.config.get_metrics_enabled())
         self.file_watcher = FileWatcher()
+        self.file_watcher.set_batching(True)
+        backend = self.config.get_watcher_backend()
+        if backend in FileWatcher.BACKENDS:
+            self.file_watcher.set_backend(backend)
         self.file_browser = None
+        self.sessions = {}  # Location path -> LocationSession
+        self.current_session = None
+        self.current_view = FileBrowser.VIEW_LIST
+        # One thumbnail cache and worker pool for the browsers of all locations
+        self.thumbnail_provider = ThumbnailProvider(parent=self)
+        # Locations are opened after the first paint (see paintEvent)
+        self.locations_loaded = False
         self.init_ui()
-        self.load_tracked_location()
         self.connect_file_watcher_signals()
     
     def init_ui(self):
@@ -44,9 +63,12 @@ class MainWindow(QMainWindow):
         # Create toolbar
         self.create_toolbar()
         
-        # Create file browser
-        self.file_browser = FileBrowser()
-        self.setCentralWidget(self.file_browser)
+        # One browser per tracked location; this one is shown when there is none
+        self.browser_stack = QStackedWidget()
+        self.file_browser = FileBrowser(self.thumbnail_provider)
+        self.empty_browser = self.file_browser
+        self.browser_stack.addWidget(self.empty_browser)
+        self.setCentralWidget(self.browser_stack)
         
         # Create status bar
         self.create_status_bar()
@@ -58,18 +80,38 @@ class MainWindow(QMainWindow):
         # File menu
         file_menu = menubar.addMenu("&File")
         
-        select_location_action = QAction("&Select Location...", self)
+        select_location_action = QAction("&Add Location...", self)
         select_location_action.setShortcut("Ctrl+O")
-        select_location_action.setStatusTip("Choose a directory to track")
+        select_location_action.setStatusTip("Choose another directory to track")
         select_location_action.triggered.connect(self.select_location)
         file_menu.addAction(select_location_action)
         
+        self.remove_location_action = QAction("&Remove Location", self)
+        self.remove_location_action.setStatusTip("Stop tracking the location shown")
+        self.remove_location_action.triggered.connect(self.remove_current_location)
+        file_menu.addAction(self.remove_location_action)
+        
         scan_document_action = QAction("&Scan Document...", self)
         scan_document_action.setShortcut("Ctrl+Shift+S")
         scan_document_action.setStatusTip("Scan a document using connected scanner")
         scan_document_action.triggered.connect(self.scan_document)
         file_menu.addAction(scan_document_action)
         
+        # How changes are detected; polling is needed on network shares
+        monitoring_menu = file_menu.addMenu("File &Monitoring")
+        monitoring_group = QActionGroup(self)
+        for backend, label in (
+            (FileWatcher.BACKEND_AUTO, "&Automatic"),
+            (FileWatcher.BACKEND_NATIVE, "&Native Notifications"),
+            (FileWatcher.BACKEND_POLLING, "&Polling (Network Shares)"),
+        ):
+            action = QAction(label, self)
+            action.setCheckable(True)
+            action.setChecked(backend == self.file_watcher.backend)
+            action.triggered.connect(lambda checked, b=backend: self.set_watcher_backend(b))
+            monitoring_group.addAction(action)
+            monitoring_menu.addAction(action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction("E&xit", self)
@@ -100,9 +142,22 @@ class MainWindow(QMainWindow):
         self.grid_view_action.triggered.connect(lambda: self.set_view_mode(FileBrowser.VIEW_GRID))
         view_menu.addAction(self.grid_view_action)
         
+        # Tools menu
+        tools_menu = menubar.addMenu("&Tools")
+        
+        duplicates_action = QAction("Find &Duplicates...", self)
+        duplicates_action.setStatusTip("Show identical files and the space they waste")
+        duplicates_action.triggered.connect(self.show_duplicates)
+        tools_menu.addAction(duplicates_action)
+        
         # Help menu
         help_menu = menubar.addMenu("&Help")
         
+        diagnostics_action = QAction("&Diagnostics...", self)
+        diagnostics_action.setStatusTip("Show performance metrics")
+        diagnostics_action.triggered.connect(self.show_diagnostics)
+        help_menu.addAction(diagnostics_action)
+        
         about_action = QAction("&About", self)
         about_action.setStatusTip("About Document Management Client")
         about_action.triggered.connect(self.show_about)
@@ -114,10 +169,18 @@ class MainWindow(QMainWindow):
         toolbar.setMovable(False)
         self.addToolBar(toolbar)
         
-        # Select location action
-        select_location_action = QAction("📁 Select Location", self)
-        select_location_action.setToolTip("Select Location (Ctrl+O)")
-        select_location_action.setStatusTip("Choose a directory to track")
+        # Switch between tracked locations
+        toolbar.addWidget(QLabel(" 📍 "))
+        self.location_combo = QComboBox()
+        self.location_combo.setMinimumWidth(200)
+        self.location_combo.setToolTip("Tracked location shown")
+        self.location_combo.currentIndexChanged.connect(self.on_location_combo_changed)
+        toolbar.addWidget(self.location_combo)
+        
+        # Add location action
+        select_location_action = QAction("📁 Add Location", self)
+        select_location_action.setToolTip("Add Location (Ctrl+O)")
+        select_location_action.setStatusTip("Choose another directory to track")
         select_location_action.triggered.connect(self.select_location)
         toolbar.addAction(select_location_action)
         
@@ -181,6 +244,7 @@ class MainWindow(QMainWindow):
             mode (int): View mode constant
         """
         if self.file_browser:
+            self.current_view = mode
             self.file_browser.set_current_view(mode)
             # Update check states
             self.list_view_action.setChecked(mode == FileBrowser.VIEW_LIST)
@@ -190,82 +254,273 @@ class MainWindow(QMainWindow):
                 self.toolbar_list_action.setChecked(mode == FileBrowser.VIEW_LIST)
                 self.toolbar_tree_action.setChecked(mode == FileBrowser.VIEW_TREE)
                 self.toolbar_grid_action.setChecked(mode == FileBrowser.VIEW_GRID)
+            if self.current_session:
+                self.config.update_location_state(self.current_session.path, view_mode=mode)
+    
+    def set_watcher_backend(self, backend):
+        """
+        Switch the file watcher backend and restart watching.
+        
+        Args:
+            backend (str): FileWatcher backend constant
+        """
+        if backend == self.file_watcher.backend:
+            return
+        self.config.set_watcher_backend(backend)
+        self.file_watcher.set_backend(backend)
+        if self.sessions:
+            # Changes made while switching are picked up by the index catch-up
+            self.file_watcher.restart_watching()
+            for session in self.sessions.values():
+                session.request_catch_up()
+            self.show_tracking_status()
     
     def select_location(self):
-        """Show location selection dialog."""
-        current_location = self.config.get_tracked_location()
+        """Show location selection dialog and add the chosen location."""
+        current_location = self.current_session.path if self.current_session else None
         dialog = LocationDialog(current_location, self)
         
         if dialog.exec_() == LocationDialog.Accepted:
             new_location = dialog.get_selected_location()
             if new_location:
-                self.config.set_tracked_location(new_location)
-                self.load_tracked_location()
-                QMessageBox.information(
-                    self,
-                    "Location Set",
-                    f"Now tracking location:\n{new_location}"
-                )
+                self.add_location(new_location)
     
-    def load_tracked_location(self):
-        """Load the tracked location from config and start monitoring."""
-        tracked_location = self.config.get_tracked_location()
+    def add_location(self, path):
+        """
+        Start tracking another location and show it.
         
-        if tracked_location:
-            from pathlib import Path
-            if Path(tracked_location).exists():
-                # Set location in file browser
-                self.file_browser.set_tracked_location(tracked_location)
-                
-                # Start file watcher
-                if self.file_watcher.start_watching(tracked_location):
-                    self.update_status_bar(f"Tracking: {tracked_location}")
-                else:
-                    self.update_status_bar(f"Error starting file watcher for: {tracked_location}")
-            else:
+        Args:
+            path (str): Path of the location
+        """
+        path = os.path.normpath(str(path))
+        if path in self.sessions:
+            self.switch_location(path)
+            return
+        
+        # A folder can only belong to one location
+        for tracked in self.sessions:
+            if self._is_same_or_inside(path, tracked) or self._is_same_or_inside(tracked, path):
                 QMessageBox.warning(
                     self,
-                    "Location Not Found",
-                    f"The tracked location no longer exists:\n{tracked_location}\n\nPlease select a new location."
+                    "Location Overlaps",
+                    f"The selected folder overlaps a tracked location:\n{tracked}\n\n"
+                    "Please select a folder outside of it."
                 )
-                self.config.set_tracked_location(None)
-                self.update_status_bar("No location tracked")
+                return
+        
+        self.config.add_tracked_location(path)
+        self.open_location(path)
+        self.switch_location(path)
+        if self.file_watcher.active_backend(path):
+            QMessageBox.information(
+                self,
+                "Location Added",
+                f"Now tracking location:\n{path}"
+            )
+    
+    @staticmethod
+    def _is_same_or_inside(path, other):
+        """Check whether path is other or a folder inside it."""
+        return path == other or path.startswith(other.rstrip(os.sep) + os.sep)
+    
+    def paintEvent(self, event):
+        """Paint the window; the first paint schedules opening the tracked locations."""
+        super().paintEvent(event)
+        if not self.locations_loaded:
+            self.locations_loaded = True
+            startup_profile.mark("first paint")
+            self.update_status_bar("Opening tracked locations...")
+            # From the event loop, so this frame reaches the screen first
+            QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """Open the tracked locations once the window is on screen."""
+        self.load_tracked_locations()
+        startup_profile.mark("open tracked locations")
+        if startup_profile.is_enabled():
+            startup_profile.report()
+    
+    def load_tracked_locations(self):
+        """Load the tracked locations from config and start monitoring them."""
+        self.locations_loaded = True
+        missing = []
+        for tracked_location in self.config.get_tracked_locations():
+            if Path(tracked_location).exists():
+                self.open_location(os.path.normpath(tracked_location))
+            else:
+                missing.append(tracked_location)
+        
+        for tracked_location in missing:
+            QMessageBox.warning(
+                self,
+                "Location Not Found",
+                f"The tracked location no longer exists:\n{tracked_location}\n\n"
+                "It has been removed from the tracked locations."
+            )
+            self.config.remove_tracked_location(tracked_location)
+        
+        # Show the location that was shown last time
+        last_location = self.config.get_tracked_location()
+        if last_location and os.path.normpath(last_location) in self.sessions:
+            self.switch_location(os.path.normpath(last_location))
+        elif self.sessions:
+            self.switch_location(next(iter(self.sessions)))
         else:
             # No location configured, ask user to select one
-            self.update_status_bar("No location tracked. Please select a location from File menu.")
-            if self.file_browser:
-                self.file_browser.set_tracked_location(None)
+            self.switch_location(None)
     
-    def connect_file_watcher_signals(self):
-        """Connect file watcher signals to update UI."""
-        if self.file_watcher:
-            self.file_watcher.file_created.connect(self.on_file_changed)
-            self.file_watcher.file_deleted.connect(self.on_file_changed)
-            self.file_watcher.file_modified.connect(self.on_file_changed)
-            self.file_watcher.file_moved.connect(self.on_file_moved)
+    def open_location(self, path):
+        """
+        Open the session of a location and start watching it.
+        
+        Args:
+            path (str): Path of the location
+        
+        Returns:
+            bool: True if the location is being watched
+        """
+        session = LocationSession(path, self.thumbnail_provider, self)
+        session.status_message.connect(self.on_session_status)
+        session.open()
+        session.file_browser.set_current_view(self.current_view)
+        self.sessions[path] = session
+        self.browser_stack.addWidget(session.file_browser)
+        
+        self.location_combo.blockSignals(True)
+        self.location_combo.addItem(f"📂 {Path(path).name or path}", path)
+        self.location_combo.setItemData(self.location_combo.count() - 1, path, Qt.ToolTipRole)
+        self.location_combo.blockSignals(False)
+        
+        # All locations share the watcher's observers, one watch each
+        if not self.file_watcher.watch_location(path, session.ignore_matcher, session.journal):
+            self.update_status_bar(f"Error starting file watcher for: {path}")
+            return False
+        return True
     
-    def on_file_changed(self, file_path):
+    def switch_location(self, path):
         """
-        Handle file change events.
+        Show the browser of a tracked location.
         
         Args:
-            file_path (str): Path to the changed file
+            path (str): Path of the location, or None to show no location
         """
-        # Refresh file browser to show changes
-        if self.file_browser:
-            self.file_browser.refresh()
+        session = self.sessions.get(path) if path else None
+        self.current_session = session
+        self.file_browser = session.file_browser if session else self.empty_browser
+        view_mode = self.current_view
+        if session:
+            # Each location is shown the way it was left
+            stored_mode = self.config.get_location_state(path).get('view_mode')
+            if stored_mode in (FileBrowser.VIEW_LIST, FileBrowser.VIEW_TREE, FileBrowser.VIEW_GRID):
+                view_mode = stored_mode
+        self.set_view_mode(view_mode)
+        self.browser_stack.setCurrentWidget(self.file_browser)
+        self.remove_location_action.setEnabled(session is not None)
+        
+        combo_index = self.location_combo.findData(path) if path else -1
+        if self.location_combo.currentIndex() != combo_index:
+            self.location_combo.blockSignals(True)
+            self.location_combo.setCurrentIndex(combo_index)
+            self.location_combo.blockSignals(False)
+        
+        if session:
+            self.config.set_tracked_location(path)
+            self.show_tracking_status()
+        else:
+            self.update_status_bar("No location tracked. Please add a location from File menu.")
+            self.file_browser.set_tracked_location(None)
     
-    def on_file_moved(self, src_path, dest_path):
+    def on_location_combo_changed(self, combo_index):
         """
-        Handle file moved events.
+        Show the location picked in the toolbar.
         
         Args:
-            src_path (str): Source path
-            dest_path (str): Destination path
+            combo_index (int): Index of the picked item
         """
-                # Refresh file browser to show changes
-        if self.file_browser:
-            self.file_browser.refresh()
+        path = self.location_combo.itemData(combo_index)
+        if path and (not self.current_session or path != self.current_session.path):
+            self.switch_location(path)
+    
+    def remove_current_location(self):
+        """Stop tracking the location shown, after confirmation."""
+        if not self.current_session:
+            return
+        path = self.current_session.path
+        answer = QMessageBox.question(
+            self,
+            "Remove Location",
+            f"Stop tracking this location?\n{path}\n\nNo files are deleted."
+        )
+        if answer == QMessageBox.Yes:
+            self.remove_location(path)
+    
+    def remove_location(self, path):
+        """
+        Stop tracking a location and drop its index entries.
+        
+        Args:
+            path (str): Path of the location
+        """
+        session = self.sessions.pop(path, None)
+        if session is None:
+            return
+        # Journal the location's last changes before its journal is closed
+        self.file_watcher.unwatch_location(path)
+        session.close(forget=True)
+        self.browser_stack.removeWidget(session.file_browser)
+        session.file_browser.deleteLater()
+        session.deleteLater()
+        
+        self.location_combo.blockSignals(True)
+        self.location_combo.removeItem(self.location_combo.findData(path))
+        self.location_combo.blockSignals(False)
+        self.config.remove_tracked_location(path)
+        
+        if self.current_session is session:
+            self.switch_location(next(iter(self.sessions), None))
+    
+    def show_tracking_status(self):
+        """Show the location on screen and how it is monitored in the status bar."""
+        if not self.current_session:
+            return
+        path = self.current_session.path
+        backend = self.file_watcher.active_backend(path)
+        if backend is None:
+            self.update_status_bar(f"Error starting file watcher for: {path}")
+        elif len(self.sessions) > 1:
+            self.update_status_bar(
+                f"Tracking: {path} ({backend} monitoring, {len(self.sessions)} locations)"
+            )
+        else:
+            self.update_status_bar(f"Tracking: {path} ({backend} monitoring)")
+    
+    def on_session_status(self, path, message):
+        """
+        Show a status message of a location if it is the one on screen.
+        
+        Args:
+            path (str): Location the message is about
+            message (str): Message to display
+        """
+        if self.current_session and self.current_session.path == path:
+            self.update_status_bar(message)
+    
+    def connect_file_watcher_signals(self):
+        """Connect file watcher signals to update UI."""
+        if self.file_watcher:
+            self.file_watcher.changes_batched.connect(self.on_files_changed)
+    
+    def on_files_changed(self, path, changes):
+        """
+        Handle a batch of coalesced file change events.
+        
+        Args:
+            path (str): Location the changes belong to
+            changes (list): (event_type, src_path, dest_path) tuples
+        """
+        session = self.sessions.get(path)
+        if session:
+            session.apply_changes(changes, self.file_watcher.journal_position(path))
     
     def scan_document(self):
         """Show scanner dialog to scan a document."""
@@ -273,9 +528,11 @@ class MainWindow(QMainWindow):
         save_directory = None
         if self.file_browser and self.file_browser.current_path:
             save_directory = self.file_browser.current_path
-        elif self.config.get_tracked_location():
-            save_directory = self.config.get_tracked_location()
+        elif self.current_session:
+            save_directory = self.current_session.path
         
+        # Scanner support (and Pillow) is only loaded once it is used
+        from ui.scanner_dialog import ScannerDialog
         dialog = ScannerDialog(save_directory, self)
         
         if dialog.exec_() == ScannerDialog.Accepted:
@@ -284,6 +541,30 @@ class MainWindow(QMainWindow):
                 self.file_browser.refresh()
             self.update_status_bar("Document scanned successfully")
     
+    def show_duplicates(self):
+        """Show duplicate files found by the hash index of the location shown."""
+        session = self.current_session
+        if not session or not session.hash_index:
+            QMessageBox.information(
+                self,
+                "Duplicate Files",
+                "Select a location to track first."
+            )
+            return
+        
+        dialog = DuplicatesDialog(session.hash_index, session.path, self)
+        if session.hash_worker:
+            # Keep the lists current while hashing finishes in the background
+            session.hash_worker.duplicates_changed.connect(dialog.reload)
+        dialog.exec_()
+        if session.hash_worker:
+            session.hash_worker.duplicates_changed.disconnect(dialog.reload)
+    
+    def show_diagnostics(self):
+        """Show the performance metrics dialog."""
+        dialog = DiagnosticsDialog(self.config, self)
+        dialog.exec_()
+    
     def show_about(self):
         """Show about dialog."""
         QMessageBox.about(
@@ -295,10 +576,16 @@ class MainWindow(QMainWindow):
             "Version 1.0"
         )
     
+    
     def closeEvent(self, event):
         """Handle window close event."""
-        # Stop file watcher
+        # Stop file watcher; pending changes go to the journals
         if self.file_watcher:
             self.file_watcher.stop_watching()
+        for session in self.sessions.values():
+            session.close()
+        self.empty_browser.file_counter.stop()
+        self.empty_browser.directory_lister.shutdown()
+        self.thumbnail_provider.shutdown()
+        self.config.flush()
         event.accept()
-
@@ -0,0 +1,96 @@
+"""Preview images of scans, made off the GUI thread."""
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+from services import metrics
+
+# Pillow mode -> (QImage format, bytes per pixel) of images QImage can use as-is
+QIMAGE_FORMATS = {
+    'L': (QImage.Format_Grayscale8, 1),
+    'RGB': (QImage.Format_RGB888, 3),
+    'RGBA': (QImage.Format_RGBA8888, 4),
+}
+
+
+def preview_image(image, width, height):
+    """
+    Scale a scanned image down to fit a preview and wrap it as a QImage.
+    
+    The image is first shrunk by a whole factor with reduce(), which
+    averages pixel blocks and is much cheaper than resampling the full
+    scan, and only the small result is resampled to the exact size. Its
+    pixels are handed to QImage directly instead of going through an
+    encoded file.
+    
+    Args:
+        image (PIL.Image): Scanned image (not modified)
+        width (int): Largest preview width
+        height (int): Largest preview height
+    
+    Returns:
+        QImage: Preview; its pixel buffer is kept alive by the QImage
+    """
+    from PIL import Image
+    
+    width, height = max(1, width), max(1, height)
+    factor = min(image.width // width, image.height // height)
+    if image.mode == '1':
+        # reduce() has no 1-bit support: sample at a few times the target
+        # size, then average the samples into gray levels
+        oversample = min(4, max(1, factor))
+        image = image.resize(
+            (max(1, image.width * oversample // max(1, factor)),
+             max(1, image.height * oversample // max(1, factor))),
+            Image.NEAREST
+        ).convert('L')
+        factor = oversample
+    elif image.mode not in ('L', 'RGB', 'RGBA', 'I', 'F', 'CMYK'):
+        image = image.convert('RGB')
+    if factor > 1:
+        image = image.reduce(factor)
+    
+    scale = min(width / image.width, height / image.height)
+    if scale < 1:
+        image = image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+            Image.BILINEAR
+        )
+    if image.mode not in QIMAGE_FORMATS:
+        image = image.convert('RGB')
+    
+    qimage_format, bytes_per_pixel = QIMAGE_FORMATS[image.mode]
+    data = image.tobytes()
+    return QImage(data, image.width, image.height, image.width * bytes_per_pixel, qimage_format)
+
+
+class PreviewThread(QThread):
+    """Thread making a preview with preview_image()."""
+    
+    preview_ready = pyqtSignal(object)  # QImage
+    preview_error = pyqtSignal(str)  # Error message
+    
+    def __init__(self, image, width, height, parent=None):
+        """
+        Initialize preview thread.
+        
+        Args:
+            image (PIL.Image): Scanned image
+            width (int): Largest preview width
+            height (int): Largest preview height
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.image = image
+        self.width = width
+        self.height = height
+    
+    def run(self):
+        """Make the preview in the thread."""
+        try:
+            with metrics.timer('scanner.preview'):
+                qimage = preview_image(self.image, self.width, self.height)
+        except Exception as e:
+            self.preview_error.emit(str(e))
+        else:
+            self.preview_ready.emit(qimage)
+        finally:
+            self.image = None
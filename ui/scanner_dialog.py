@@ -1,20 +1,25 @@
 """Scanner dialog for scanning documents."""
 import os
 from pathlib import Path
-from datetime import datetime
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
-    QSpinBox, QGroupBox, QProgressBar, QMessageBox, QFileDialog, QGridLayout
+    QSpinBox, QGroupBox, QProgressBar, QMessageBox, QFileDialog, QGridLayout, QCheckBox
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QPixmap, QImage, QFont
+from PyQt5.QtGui import QPixmap, QFont
 from services.scanner_service import ScannerService, ScanThread, DetectScannersThread
+from services.document_writer import DocumentWriter, document_extension, new_document_path
+from ui.scan_preview import PreviewThread
 from ui.styles import COLORS
 
 
 class ScannerDialog(QDialog):
     """Dialog for scanning documents."""
     
+    # Seconds after a detection in which Refresh shows its result instead
+    # of starting another one
+    REFRESH_WINDOW = 10
+    
     def __init__(self, save_directory=None, parent=None):
         """
         Initialize scanner dialog.
@@ -26,13 +31,25 @@ class ScannerDialog(QDialog):
         super().__init__(parent)
         self.save_directory = save_directory
         self.scanned_image = None
+        self.scan_resolution = None  # Settings of the scanned image
+        self.scan_format = None
+        self.pages_saved = 0  # Pages of the running batch scan saved so far
+        self.pages_per_minute = 0.0
         self.scanner_service = ScannerService()
         # Connect error signal to show errors in dialog
         self.scanner_service.scan_error.connect(self.on_scanner_service_error)
+        # Scanned documents are written here, in the background
+        self.document_writer = DocumentWriter(self)
+        self.document_writer.document_saved.connect(self.on_document_saved)
+        self.save_request = None  # Id of the save in progress
+        self.auto_saving = False
         self.scan_thread = None
         self.detect_thread = None
+        self.preview_thread = None
         self.init_ui()
-        # Start asynchronous scanner detection after UI is initialized
+        # Show the scanners found last time at once, then check them in
+        # the background; the list is updated in place if they changed
+        self.show_cached_scanners()
         self.start_scanner_detection()
     
     def on_scanner_service_error(self, error_message):
@@ -66,6 +83,9 @@ class ScannerDialog(QDialog):
                 self.scan_thread.scan_complete.disconnect()
                 self.scan_thread.scan_error.disconnect()
                 self.scan_thread.scan_progress.disconnect()
+                self.scan_thread.scan_bytes.disconnect()
+                self.scan_thread.page_saved.disconnect()
+                self.scan_thread.batch_complete.disconnect()
             except:
                 pass
             
@@ -169,6 +189,11 @@ class ScannerDialog(QDialog):
         settings_layout.addWidget(format_label, 2, 0)
         settings_layout.addWidget(self.format_combo, 2, 1)
         
+        # Document feeder: every page into one PDF
+        self.batch_checkbox = QCheckBox("Scan all pages in the document feeder into one PDF")
+        self.batch_checkbox.toggled.connect(self.on_batch_toggled)
+        settings_layout.addWidget(self.batch_checkbox, 3, 0, 1, 2)
+        
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
         
@@ -230,39 +255,105 @@ class ScannerDialog(QDialog):
         layout.addLayout(button_layout)
         self.setLayout(layout)
     
-    def start_scanner_detection(self):
-        """Start asynchronous scanner detection."""
-        # Stop any existing detection thread properly
-        if self.detect_thread:
-            try:
-                # Disconnect signals first
-                self.detect_thread.scanners_detected.disconnect()
-                self.detect_thread.detection_error.disconnect()
-                self.detect_thread.detection_progress.disconnect()
-            except:
-                pass
-            
-            if self.detect_thread.isRunning():
-                self.detect_thread.requestInterruption()
-                self.detect_thread.quit()
-                if not self.detect_thread.wait(1000):
-                    self.detect_thread.terminate()
-                    self.detect_thread.wait(500)
-            self.detect_thread = None
+    def show_cached_scanners(self):
+        """Fill the scanner list from the last detection, if it is recent enough."""
+        scanners = self.scanner_service.cached_scanners()
+        if scanners is None:
+            return
+        self.show_scanners(scanners)
+        if scanners:
+            self.status_label.setText(f"Found {len(scanners)} scanner(s). Ready to scan.")
+            self.scan_button.setEnabled(True)
+    
+    def show_scanners(self, scanners):
+        """
+        Update the scanner list in place.
         
-        # Clear combo and show loading indicator
+        The selected scanner stays selected if it is still there, and the
+        list is left alone if the same scanners were found.
+        
+        Args:
+            scanners (list): Scanner info dicts
+        
+        Returns:
+            bool: Whether the list changed
+        """
+        items = []
+        for scanner in scanners:
+            vendor = scanner.get('vendor', 'Unknown')
+            model = scanner.get('model', 'Unknown')
+            name = scanner.get('name', 'Unknown')
+            
+            # Create display name
+            if vendor != 'Unknown' or model != 'Unknown':
+                display_name = f"{vendor} {model}"
+            else:
+                display_name = name
+            items.append((display_name, scanner))
+        if not items:
+            items.append(("No scanners found", None))
+        
+        def device_name(data):
+            return data.get('name') if data else None
+        
+        current = [
+            (self.scanner_combo.itemText(i), device_name(self.scanner_combo.itemData(i)))
+            for i in range(self.scanner_combo.count())
+        ]
+        if current == [(text, device_name(data)) for text, data in items]:
+            for i, (_, data) in enumerate(items):
+                self.scanner_combo.setItemData(i, data)
+            return False
+        
+        selected = device_name(self.scanner_combo.currentData())
         self.scanner_combo.clear()
-        self.scanner_combo.setEnabled(False)
-        self.refresh_button.setEnabled(False)
-        self.scan_button.setEnabled(False)
+        for display_name, data in items:
+            self.scanner_combo.addItem(display_name, data)
+        for i, (_, data) in enumerate(items):
+            if selected and device_name(data) == selected:
+                self.scanner_combo.setCurrentIndex(i)
+        return True
+    
+    def has_scanners(self):
+        """Check whether the scanner list holds scanners (not a message)."""
+        return self.scanner_combo.count() > 0 and self.scanner_combo.itemData(0) is not None
+    
+    def is_scanning(self):
+        """Check whether a scan is running."""
+        return self.scan_thread is not None and self.scan_thread.isRunning()
+    
+    def start_scanner_detection(self):
+        """
+        Check for scanners in the background.
+        
+        A list shown from the cache stays usable meanwhile. Refresh clicks
+        while a detection runs, or within REFRESH_WINDOW seconds after the
+        last one finished, are answered by that detection.
+        """
+        if self.detect_thread and self.detect_thread.isRunning():
+            self.status_label.setText("Still checking for scanners...")
+            return
+        age = self.scanner_service.scanner_cache.age()
+        if self.scanner_combo.count() > 0 and age is not None and age < self.REFRESH_WINDOW:
+            if not self.is_scanning():
+                self.status_label.setText("Scanner list is up to date.")
+            return
+        
+        if self.scanner_combo.count() == 0:
+            # Nothing to show yet: wait for the detection
+            self.scanner_combo.setEnabled(False)
+            self.scan_button.setEnabled(False)
+            self.scanner_loading_label.setText("⏳ Detecting scanners...")
+        else:
+            self.scanner_loading_label.setText("⏳ Checking for scanner changes...")
         self.scanner_loading_label.setVisible(True)
-        self.status_label.setText("Detecting scanners...")
         
         # Create and start detection thread
         self.detect_thread = DetectScannersThread(self.scanner_service)
         self.detect_thread.scanners_detected.connect(self.on_scanners_detected)
         self.detect_thread.detection_error.connect(self.on_detection_error)
-        self.detect_thread.detection_progress.connect(self.status_label.setText)
+        if self.scanner_combo.count() == 0:
+            self.detect_thread.detection_progress.connect(self.status_label.setText)
         self.detect_thread.finished.connect(self.on_detection_thread_finished)
         self.detect_thread.start()
     
@@ -284,34 +375,20 @@ class ScannerDialog(QDialog):
         try:
             self.scanner_loading_label.setVisible(False)
             self.scanner_combo.setEnabled(True)
-            self.refresh_button.setEnabled(True)
+            changed = self.show_scanners(scanners)
             
-            if scanners and len(scanners) > 0:
-                for scanner in scanners:
-                    vendor = scanner.get('vendor', 'Unknown')
-                    model = scanner.get('model', 'Unknown')
-                    name = scanner.get('name', 'Unknown')
-                    
-                    # Create display name
-                    if vendor != 'Unknown' or model != 'Unknown':
-                        display_name = f"{vendor} {model}"
-                    else:
-                        display_name = name
-                    
-                    self.scanner_combo.addItem(display_name, scanner)
-                
-                self.status_label.setText(f"Found {len(scanners)} scanner(s). Ready to scan.")
+            if self.is_scanning():
+                # The scan keeps the scanner it was started with
+                return
+            if scanners:
+                if changed:
+                    self.status_label.setText(f"Found {len(scanners)} scanner(s). Ready to scan.")
                 self.scan_button.setEnabled(True)
             else:
-                self.scanner_combo.addItem("No scanners found")
                 self.status_label.setText(
                     "No scanners detected. Make sure your scanner is connected and click Refresh."
                 )
                 self.scan_button.setEnabled(False)
-            
-            # Clean up thread
-            if self.detect_thread:
-                self.detect_thread = None
         except Exception as e:
             # Handle any errors in the callback gracefully
             print(f"Error in on_scanners_detected: {e}")
@@ -320,7 +397,7 @@ class ScannerDialog(QDialog):
             # Still clean up UI state
             self.scanner_loading_label.setVisible(False)
             self.scanner_combo.setEnabled(True)
-            self.refresh_button.setEnabled(True)
+            self.scanner_combo.clear()
             self.scanner_combo.addItem("Detection error")
             self.status_label.setText("An error occurred during scanner detection. Click Refresh to try again.")
             self.scan_button.setEnabled(False)
@@ -330,7 +407,12 @@ class ScannerDialog(QDialog):
         try:
             self.scanner_loading_label.setVisible(False)
             self.scanner_combo.setEnabled(True)
-            self.refresh_button.setEnabled(True)
+            if self.has_scanners():
+                # Keep offering the scanners found last time
+                if not self.is_scanning():
+                    self.status_label.setText(f"Could not check for scanners: {error_message}")
+                return
+            self.scanner_combo.clear()
             self.scanner_combo.addItem("Detection failed")
             self.status_label.setText(f"Error: {error_message}. Click Refresh to try again.")
             self.scan_button.setEnabled(False)
@@ -353,26 +435,63 @@ class ScannerDialog(QDialog):
                     f"Ready to scan | Resolution: {resolution} DPI | Mode: {mode} | Format: {format_type}"
                 )
     
+    def on_batch_toggled(self, batch):
+        """Feeder scans are always saved as one PDF."""
+        if batch:
+            self.format_combo.setCurrentText("PDF")
+        self.format_combo.setEnabled(not batch)
+    
+    def batch_save_path(self):
+        """
+        Get the PDF a feeder scan is written to.
+        
+        Returns:
+            str: New file in the save directory, or a file picked by the
+                 user; None if the user cancelled
+        """
+        if self.save_directory and os.path.exists(self.save_directory):
+            return new_document_path(self.save_directory, 'PDF')
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Scanned Pages",
+            new_document_path(str(Path.home()), 'PDF'),
+            "PDF Files (*.pdf);;All Files (*)"
+        )
+        return file_path or None
+    
     def start_scan(self):
         """Start scanning document."""
-        if self.scanner_combo.count() == 0 or self.scanner_combo.currentText() == "No scanners found":
+        if not self.has_scanners():
             QMessageBox.warning(self, "No Scanner", "No scanner selected. Please refresh and select a scanner.")
             return
         
         scanner_index = self.scanner_combo.currentIndex()
+        # A background detection may reorder the service's scanner list, so
+        # the scanner is passed by device name
+        device_name = self.scanner_combo.currentData()['name']
         resolution = self.resolution_spin.value()
         mode = self.mode_combo.currentText()
         format_type = self.format_combo.currentText()
-        
-        # Generate save path - we'll save manually after scan, so don't auto-save here
-        # This allows us to preview first and handle save location properly
-        save_path = None  # Don't auto-save, let user preview first
+        batch = self.batch_checkbox.isChecked()
+        self.scan_resolution = resolution
+        self.scan_format = format_type
+        
+        if batch:
+            # Pages are written as they arrive, so the file is needed up front
+            save_path = self.batch_save_path()
+            if not save_path:
+                return
+        else:
+            # Generate save path - we'll save manually after scan, so don't auto-save here
+            # This allows us to preview first and handle save location properly
+            save_path = None  # Don't auto-save, let user preview first
         
         # Disable scan button during scan
         self.scan_button.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         self.status_label.setText("Scanning... Please wait")
+        self.pages_saved = 0
         
         # Create and start scan thread
         self.scan_thread = ScanThread(
@@ -381,11 +500,16 @@ class ScannerDialog(QDialog):
             resolution,
             mode,
             format_type,
-            save_path
+            save_path,
+            batch=batch,
+            device_name=device_name
         )
         self.scan_thread.scan_complete.connect(self.on_scan_complete)
         self.scan_thread.scan_error.connect(self.on_scan_error)
         self.scan_thread.scan_progress.connect(self.on_scan_progress)
+        self.scan_thread.scan_bytes.connect(self.on_scan_bytes)
+        self.scan_thread.page_saved.connect(self.on_page_saved)
+        self.scan_thread.batch_complete.connect(self.on_batch_complete)
         self.scan_thread.finished.connect(self.on_scan_finished)
         self.scan_thread.start()
     
@@ -393,43 +517,76 @@ class ScannerDialog(QDialog):
         """Handle scan progress update."""
         self.status_label.setText(message)
     
+    def on_scan_bytes(self, received, total):
+        """Show how much of the scanned image has arrived."""
+        if total <= 0:
+            return
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(int(received * 100 / total))
+        page = f"page {self.pages_saved + 1}" if self.batch_checkbox.isChecked() else "scan"
+        status = f"Receiving {page}... {received / 1048576:.1f} of {total / 1048576:.1f} MB"
+        if self.pages_saved:
+            status += f" | {self.pages_per_minute:.1f} pages/min"
+        self.status_label.setText(status)
+    
+    def on_page_saved(self, pages, pages_per_minute):
+        """Count the pages of a feeder scan written so far."""
+        self.pages_saved = pages
+        self.pages_per_minute = pages_per_minute
+        self.progress_bar.setRange(0, 0)  # Waiting for the next page
+        self.status_label.setText(
+            f"Page {pages} saved ({pages_per_minute:.1f} pages/min), scanning next page..."
+        )
+    
+    def on_batch_complete(self, file_path, pages):
+        """Handle the end of a feeder scan."""
+        self.status_label.setText(f"Saved {pages} page(s) to: {Path(file_path).name}")
+        self.accept()
+    
     def on_scan_complete(self, image):
         """Handle scan completion."""
-        from io import BytesIO
-        
         self.scanned_image = image
         
-        # Convert PIL image to QPixmap for preview
-        try:
-            # Convert PIL image to QPixmap via bytes (more compatible across Pillow versions)
-            img_bytes = BytesIO()
-            image.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            pixmap = QPixmap()
-            pixmap.loadFromData(img_bytes.read(), 'PNG')
-            
-            # Scale preview to fit label
-            label_size = self.preview_label.size()
-            scaled_pixmap = pixmap.scaled(
-                label_size.width() - 20,
-                label_size.height() - 20,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            self.preview_label.setPixmap(scaled_pixmap)
-            
-            # If we have a save directory, auto-save
-            if self.save_directory and os.path.exists(self.save_directory):
-                self.auto_save_scanned_document()
-            else:
-                self.status_label.setText("Scan complete! Preview displayed above. Click Save to save the document.")
-        except Exception as e:
-            self.status_label.setText(f"Scan complete, but preview error: {str(e)}")
+        # If we have a save directory, auto-save; the dialog closes once the
+        # document is written, so the preview is only needed if that fails
+        if self.save_directory and os.path.exists(self.save_directory):
+            self.save_document(new_document_path(self.save_directory, self.scan_format),
+                               self.scan_format, auto=True)
+            return
         
-            self.save_button.setEnabled(True)
-            
-            # Update status with current settings for next scan
-            self.on_settings_changed()
+        self.status_label.setText("Scan complete! Preview displayed above. Click Save to save the document.")
+        self.start_preview(image)
+        self.save_button.setEnabled(True)
+    
+    def start_preview(self, image):
+        """Make the preview of a scan on a background thread."""
+        self.wait_for_preview()
+        label_size = self.preview_label.size()
+        self.preview_thread = PreviewThread(
+            image, label_size.width() - 20, label_size.height() - 20, self
+        )
+        self.preview_thread.preview_ready.connect(self.on_preview_ready)
+        self.preview_thread.preview_error.connect(self.on_preview_error)
+        self.preview_thread.start()
+    
+    def on_preview_ready(self, qimage):
+        """Show a finished preview."""
+        self.preview_label.setPixmap(QPixmap.fromImage(qimage))
+    
+    def on_preview_error(self, error_message):
+        """Handle a preview that could not be made."""
+        self.status_label.setText(f"Scan complete, but preview error: {error_message}")
+    
+    def wait_for_preview(self):
+        """Let a running preview thread finish; it takes a fraction of a second."""
+        if self.preview_thread and self.preview_thread.isRunning():
+            self.preview_thread.wait()
+    
+    def done(self, result):
+        """Close the dialog once no preview is being made and documents are written."""
+        self.wait_for_preview()
+        self.document_writer.shutdown(wait=True)
+        super().done(result)
     
     def on_scan_error(self, error_message):
         """Handle scan error."""
@@ -445,39 +602,42 @@ class ScannerDialog(QDialog):
         # Update status with current settings
         self.on_settings_changed()
     
-    def auto_save_scanned_document(self):
-        """Automatically save the scanned document to the save directory."""
-        if not self.scanned_image or not self.save_directory:
+    def save_document(self, file_path, format_type, auto=False):
+        """
+        Hand the scanned image to the document writer.
+        
+        Args:
+            file_path (str): File to write
+            format_type (str): 'PNG', 'JPEG' or 'PDF'
+            auto (bool): Whether this is the automatic save after a scan
+        """
+        self.save_button.setEnabled(False)
+        self.auto_saving = auto
+        self.status_label.setText(f"Saving {Path(file_path).name}...")
+        self.save_request = self.document_writer.save(
+            self.scanned_image, file_path, format_type, self.scan_resolution
+        )
+    
+    def on_document_saved(self, request_id, file_path, error_message):
+        """Handle a document written by the document writer."""
+        if request_id != self.save_request:
             return
+        self.save_request = None
         
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            format_type = self.format_combo.currentText()
-            extension = format_type.lower()
-            if extension == 'jpeg':
-                extension = 'jpg'
-            
-            file_path = os.path.join(self.save_directory, f"scan_{timestamp}.{extension}")
-            
-            # Handle image mode conversion for different formats
-            image = self.scanned_image.copy()
-            if format_type.upper() == 'PDF':
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                image.save(file_path, 'PDF')
-            elif format_type.upper() == 'JPEG':
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                image.save(file_path, 'JPEG', quality=95)
+        if error_message:
+            if self.auto_saving:
+                self.status_label.setText(f"Auto-save error: {error_message}")
+                QMessageBox.warning(self, "Save Warning", f"Auto-save failed:\n{error_message}\n\nPlease use Save button to save manually.")
+                self.start_preview(self.scanned_image)
             else:
-                image.save(file_path, 'PNG')
-            
-            self.status_label.setText(f"Saved to: {Path(file_path).name}")
-            # Close dialog after successful auto-save
-            self.accept()
-        except Exception as e:
-            self.status_label.setText(f"Auto-save error: {str(e)}")
-            QMessageBox.warning(self, "Save Warning", f"Auto-save failed:\n{str(e)}\n\nPlease use Save button to save manually.")
+                QMessageBox.critical(self, "Save Error", f"Error saving file:\n{error_message}")
+            self.save_button.setEnabled(True)
+            return
+        
+        if not self.auto_saving:
+            QMessageBox.information(self, "Success", f"Document saved to:\n{file_path}")
+        self.status_label.setText(f"Saved to: {Path(file_path).name}")
+        self.accept()
     
     def save_scanned_document(self):
         """Save the scanned document to a user-selected location."""
@@ -487,40 +647,17 @@ class ScannerDialog(QDialog):
         
         # Get save path
         default_dir = self.save_directory or str(Path.home())
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         format_type = self.format_combo.currentText()
-        extension = format_type.lower()
-        if extension == 'jpeg':
-            extension = 'jpg'
-        
-        default_filename = f"scan_{timestamp}.{extension}"
+        extension = document_extension(format_type)
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Save Scanned Document",
-            os.path.join(default_dir, default_filename),
+            new_document_path(default_dir, format_type),
             f"{format_type} Files (*.{extension});;All Files (*)"
         )
         
         if file_path:
-            try:
-                # Handle image mode conversion
-                image = self.scanned_image.copy()
-                if format_type.upper() == 'PDF':
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                    image.save(file_path, 'PDF')
-                elif format_type.upper() == 'JPEG':
-                    if image.mode != 'RGB':
-                        image = image.convert('RGB')
-                    image.save(file_path, 'JPEG', quality=95)
-                else:
-                    image.save(file_path, 'PNG')
-                
-                QMessageBox.information(self, "Success", f"Document saved to:\n{file_path}")
-                self.status_label.setText(f"Saved to: {Path(file_path).name}")
-                self.accept()
-            except Exception as e:
-                QMessageBox.critical(self, "Save Error", f"Error saving file:\n{str(e)}")
+            self.save_document(file_path, format_type)
     
     def get_scanned_image(self):
         """
@@ -0,0 +1,126 @@
+"""Search results list for filename and content matches."""
+from pathlib import Path
+from PyQt5.QtWidgets import QListWidget, QListWidgetItem
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtGui import QFont, QColor
+from ui.styles import COLORS
+
+
+class SearchResultsView(QListWidget):
+    """
+    List of search results grouped into sections (file names, contents).
+    
+    Results are added to the list in small chunks from the event loop,
+    so a large result set never blocks typing in the search box.
+    """
+    
+    # Emitted when the user activates a result
+    result_activated = pyqtSignal(str)  # File path
+    
+    SECTION_NAMES = 'names'
+    SECTION_CONTENTS = 'contents'
+    
+    SECTION_TITLES = {
+        SECTION_NAMES: "File names",
+        SECTION_CONTENTS: "Document contents",
+    }
+    
+    # Items added per event loop iteration while streaming
+    CHUNK_SIZE = 50
+    
+    def __init__(self, parent=None):
+        """
+        Initialize search results view.
+        
+        Args:
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        self.base_path = None
+        self._sections = {self.SECTION_NAMES: [], self.SECTION_CONTENTS: []}
+        self._pending = []  # (text, path) rows still to be added; path None for headers
+        self._stream_timer = QTimer(self)
+        self._stream_timer.timeout.connect(self._add_next_chunk)
+        self.setUniformItemSizes(True)
+        self.itemActivated.connect(self._on_item_activated)
+        self.setVisible(False)
+    
+    def set_base_path(self, base_path):
+        """
+        Set the path results are shown relative to.
+        
+        Args:
+            base_path (str): Tracked location
+        """
+        self.base_path = Path(base_path) if base_path else None
+    
+    def set_results(self, section, paths):
+        """
+        Replace the results of one section and restart streaming.
+        
+        Args:
+            section (str): SECTION_NAMES or SECTION_CONTENTS
+            paths (list): Result file paths, best first
+        """
+        self._sections[section] = list(paths)
+        self.clear()
+        self._pending = []
+        for key in (self.SECTION_NAMES, self.SECTION_CONTENTS):
+            section_paths = self._sections[key]
+            if not section_paths:
+                continue
+            self._pending.append((f"{self.SECTION_TITLES[key]} ({len(section_paths)})", None))
+            self._pending.extend((self._format_path(p), p) for p in section_paths)
+        
+        self.setVisible(bool(self._pending))
+        if self._pending:
+            self._add_next_chunk()
+            if self._pending:
+                self._stream_timer.start(0)
+        else:
+            self._stream_timer.stop()
+    
+    def clear_results(self):
+        """Remove all results and hide the view."""
+        for key in self._sections:
+            self._sections[key] = []
+        self._pending = []
+        self._stream_timer.stop()
+        self.clear()
+        self.setVisible(False)
+    
+    def _format_path(self, path):
+        """Format a result as 'name — folder relative to the base path'."""
+        file_path = Path(path)
+        folder = file_path.parent
+        if self.base_path:
+            try:
+                folder = folder.relative_to(self.base_path)
+            except ValueError:
+                pass
+        return f"📄 {file_path.name}  —  {folder}"
+    
+    def _add_next_chunk(self):
+        """Add the next chunk of pending rows to the list."""
+        chunk = self._pending[:self.CHUNK_SIZE]
+        self._pending = self._pending[self.CHUNK_SIZE:]
+        for text, path in chunk:
+            item = QListWidgetItem(text)
+            if path is None:
+                font = QFont()
+                font.setWeight(QFont.Bold)
+                item.setFont(font)
+                item.setForeground(QColor(COLORS['text_secondary']))
+                item.setFlags(Qt.NoItemFlags)
+            else:
+                item.setData(Qt.UserRole, path)
+                item.setToolTip(path)
+            self.addItem(item)
+        if not self._pending:
+            self._stream_timer.stop()
+    
+    def _on_item_activated(self, item):
+        """Forward activation of a result row."""
+        path = item.data(Qt.UserRole)
+        if path:
+            self.result_activated.emit(path)
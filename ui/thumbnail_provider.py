@@ -0,0 +1,275 @@
+"""Asynchronous thumbnails for the grid view."""
+import importlib.util
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QIcon
+from services.thumbnail_cache import ThumbnailDiskCache, can_thumbnail, render_thumbnail
+
+
+class ThumbnailProvider(QObject):
+    """
+    Supplies thumbnails without ever rendering on the GUI thread.
+    
+    Rendered thumbnails are kept in a small in-memory QPixmap LRU in front
+    of the on-disk cache. Misses are queued and rendered with Pillow in a
+    pool of worker processes. The queue is served newest request first:
+    views ask for thumbnails while painting, so the cells on screen right
+    now are rendered before cells that have been scrolled away, and the
+    oldest requests are dropped once the queue is full.
+    
+    The disk cache is only used from one I/O thread: stat()ing files for
+    their cache key, touching and reading cached thumbnails and scanning
+    the cache directory for eviction can all stall on a slow disk or a
+    network share. That thread hands back QImages, and the GUI thread only
+    turns them into pixmaps.
+    """
+    
+    thumbnail_ready = pyqtSignal(str)  # File path whose thumbnail is now available
+    
+    # Internal, sent from the I/O thread: (file path, cache key or '' if the
+    # file cannot be read, thumbnail - null if it is not cached yet)
+    _loaded = pyqtSignal(str, str, QImage)
+    # Internal, sent from the I/O thread: (file path, thumbnail - null if rendering failed)
+    _rendered = pyqtSignal(str, QImage)
+    
+    THUMBNAIL_SIZE = 96
+    MEMORY_CACHE_SIZE = 512
+    MAX_PENDING = 256
+    MAX_WORKERS = 2
+    
+    # Disk cache lookups in flight; they take a millisecond each on a local disk
+    MAX_LOADS = 16
+    
+    def __init__(self, disk_cache=None, parent=None):
+        """
+        Initialize thumbnail provider.
+        
+        Args:
+            disk_cache (ThumbnailDiskCache): On-disk cache (defaults to ~/.dms_client/thumbnails)
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.disk_cache = disk_cache or ThumbnailDiskCache()
+        self.max_workers = min(self.MAX_WORKERS, os.cpu_count() or 1)
+        self._pixmaps = OrderedDict()  # Path -> QPixmap, least recently used first
+        self._pending = OrderedDict()  # Requested paths, newest last
+        self._loading = set()  # Paths being looked up in the disk cache
+        self._to_render = OrderedDict()  # Path -> cache key of misses, newest last
+        self._rendering = set()
+        self._failed = set()
+        self._pool = None
+        self._io_pool = None
+        self._available = None  # Whether Pillow can be used; checked on first request
+        self._loaded.connect(self._on_loaded)
+        self._rendered.connect(self._on_rendered)
+        
+        # Requests arrive while views paint; they are served from the event loop
+        self._dispatch_timer = QTimer(self)
+        self._dispatch_timer.setSingleShot(True)
+        self._dispatch_timer.setInterval(0)
+        self._dispatch_timer.timeout.connect(self._dispatch)
+    
+    def thumbnail(self, path):
+        """
+        Get the thumbnail of a file, requesting it if it isn't ready yet.
+        
+        Args:
+            path (str): File path
+        
+        Returns:
+            QPixmap: Thumbnail, or None if there is none (yet); thumbnail_ready
+                     is emitted once a requested thumbnail is available
+        """
+        pixmap = self._pixmaps.get(path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(path)
+            return pixmap
+        if path in self._failed or not can_thumbnail(path):
+            return None
+        
+        if path in self._to_render:
+            # Not cached; still shown, so render it sooner
+            self._to_render.move_to_end(path)
+            self._dispatch_timer.start()
+        elif path not in self._loading and path not in self._rendering:
+            self._pending[path] = None
+            self._pending.move_to_end(path)
+            while len(self._pending) > self.MAX_PENDING:
+                self._pending.popitem(last=False)
+            self._dispatch_timer.start()
+        return None
+    
+    def invalidate(self, paths):
+        """
+        Forget thumbnails of files that changed.
+        
+        Args:
+            paths (iterable): Changed file paths
+        """
+        for path in paths:
+            self._pixmaps.pop(path, None)
+            self._to_render.pop(path, None)  # Its cache key is out of date
+            self._failed.discard(path)
+    
+    def clear_pending(self):
+        """Drop queued requests, e.g. after the view changed directory."""
+        self._pending.clear()
+        self._to_render.clear()
+    
+    def shutdown(self):
+        """Stop the worker processes and the I/O thread; queued requests are dropped."""
+        self.clear_pending()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+    
+    def _check_available(self):
+        """Check once whether Pillow is installed."""
+        if self._available is None:
+            self._available = importlib.util.find_spec('PIL') is not None
+            if not self._available:
+                print("Pillow not installed. Grid view will show file-type icons only.")
+        return self._available
+    
+    def _get_pool(self):
+        """Start the worker processes on first use."""
+        if self._pool is None:
+            # Spawned workers don't inherit the Qt state of this process
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+    
+    def _get_io_pool(self):
+        """Start the disk cache thread on first use."""
+        if self._io_pool is None:
+            # One thread, so the disk cache needs no locking
+            self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnail-io')
+        return self._io_pool
+    
+    def _dispatch(self):
+        """Look queued requests up in the disk cache and render the misses."""
+        if not self._check_available():
+            self._pending.clear()
+            return
+        
+        try:
+            while self._pending and len(self._loading) < self.MAX_LOADS:
+                path, _ = self._pending.popitem(last=True)
+                self._get_io_pool().submit(self._load, path)
+                self._loading.add(path)
+            
+            # A few renders in flight per worker; everything else waits in the queue
+            while self._to_render and len(self._rendering) < self.max_workers * 2:
+                path, key = self._to_render.popitem(last=True)
+                future = self._get_pool().submit(
+                    render_thumbnail, path, self.disk_cache.path_for(key), self.THUMBNAIL_SIZE
+                )
+                self._rendering.add(path)
+                future.add_done_callback(
+                    lambda f, path=path, key=key: self._submit_finish(f, path, key)
+                )
+        except RuntimeError as e:
+            # Pool shut down or broken
+            print(f"Thumbnail workers unavailable: {e}")
+            self.clear_pending()
+    
+    def _load(self, path):
+        """Find a file's thumbnail in the disk cache (runs on the I/O thread)."""
+        key = self.disk_cache.key_for(path, self.THUMBNAIL_SIZE)
+        if key is None:
+            self._loaded.emit(path, '', QImage())
+            return
+        cached_path = self.disk_cache.lookup(key)
+        # A damaged cached file reads as null and is rendered again
+        image = QImage(cached_path) if cached_path is not None else QImage()
+        self._loaded.emit(path, key, image)
+    
+    def _on_loaded(self, path, key, image):
+        """Show a cached thumbnail, or queue the file for rendering."""
+        self._loading.discard(path)
+        if not key:
+            self._failed.add(path)
+        elif image.isNull():
+            self._to_render[path] = key
+            while len(self._to_render) > self.MAX_PENDING:
+                self._to_render.popitem(last=False)
+        else:
+            self._store(path, image)
+        if self._pending or self._to_render:
+            self._dispatch_timer.start()
+    
+    def _submit_finish(self, future, path, key):
+        """Hand a finished render to the I/O thread (runs on a pool thread)."""
+        size = future.result() if not future.cancelled() and future.exception() is None else -1
+        io_pool = self._io_pool
+        if io_pool is None:
+            return
+        try:
+            io_pool.submit(self._finish_render, path, key, size)
+        except RuntimeError:
+            # Shut down meanwhile; nobody is waiting for the thumbnail
+            pass
+    
+    def _finish_render(self, path, key, size):
+        """Account for a rendered thumbnail and read it (runs on the I/O thread)."""
+        if size < 0:
+            self._rendered.emit(path, QImage())
+            return
+        self.disk_cache.added(key, size)
+        self._rendered.emit(path, QImage(self.disk_cache.path_for(key)))
+    
+    def _on_rendered(self, path, image):
+        """Pick up a thumbnail rendered by a worker process."""
+        self._rendering.discard(path)
+        if image.isNull():
+            self._failed.add(path)
+        else:
+            self._store(path, image)
+        if self._pending or self._to_render:
+            self._dispatch_timer.start()
+    
+    def _store(self, path, image):
+        """Put a thumbnail into the memory LRU and announce it."""
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.isNull():
+            self._failed.add(path)
+            return
+        self._pixmaps[path] = pixmap
+        while len(self._pixmaps) > self.MEMORY_CACHE_SIZE:
+            self._pixmaps.popitem(last=False)
+        self.thumbnail_ready.emit(path)
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Item delegate that draws thumbnails in place of file-type icons."""
+    
+    def __init__(self, provider, parent=None):
+        """
+        Initialize thumbnail delegate.
+        
+        Args:
+            provider (ThumbnailProvider): Source of thumbnails
+            parent: Parent widget (the view)
+        """
+        super().__init__(parent)
+        self.provider = provider
+    
+    def initStyleOption(self, option, index):
+        """Replace the decoration with the item's thumbnail once it exists."""
+        super().initStyleOption(option, index)
+        model = index.model()
+        if not hasattr(model, 'filePath') or model.isDir(index):
+            return
+        pixmap = self.provider.thumbnail(model.filePath(index))
+        if pixmap is not None:
+            option.icon = QIcon(pixmap)
+            option.features |= QStyleOptionViewItem.HasDecoration
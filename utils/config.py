@@ -1,25 +1,178 @@
 """Configuration management for DMS Client."""
+import atexit
 import json
 import os
+import tempfile
+import threading
 from pathlib import Path
 
 
 class Config:
-    """Manages application configuration."""
+    """
+    Manages application configuration.
+    
+    The configuration is held in memory and only parsed again when
+    config.json changes on disk (different mtime or size), so reads are
+    cheap. Changes are collected for WRITE_DELAY seconds and written
+    together, atomically: a temporary file is written next to config.json
+    and renamed over it, so a crash never leaves a half-written file.
+    Call flush() to write pending changes immediately; it also runs at exit.
+    """
     
     CONFIG_DIR_NAME = ".dms_client"
     CONFIG_FILE_NAME = "config.json"
     
+    # Seconds changes are collected before they are written
+    WRITE_DELAY = 0.5
+    
+    # Known keys with their type and default; values of the wrong type are ignored
+    SCHEMA = {
+        'tracked_location': (str, None),  # Location shown last
+        'tracked_locations': (list, []),
+        'watcher_backend': (str, 'auto'),
+        'metrics_enabled': (bool, False),
+        'locations': (dict, {}),  # Location path -> dict of per-location state
+    }
+    
     def __init__(self):
         """Initialize configuration manager."""
         self.config_dir = Path.home() / self.CONFIG_DIR_NAME
         self.config_file = self.config_dir / self.CONFIG_FILE_NAME
         self._ensure_config_dir()
+        self._lock = threading.RLock()
+        self._config = {}
+        self._signature = False  # (mtime_ns, size) of the file last read or written
+        self._dirty = {}  # Changed keys not written yet
+        self._write_timer = None
+        atexit.register(self.flush)
     
     def _ensure_config_dir(self):
         """Create config directory if it doesn't exist."""
         self.config_dir.mkdir(exist_ok=True)
     
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    
+    def _file_signature(self):
+        """Get (mtime_ns, size) of config.json, or None if it doesn't exist."""
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    @classmethod
+    def _validated(cls, config):
+        """
+        Drop values of the wrong type from a parsed config.
+        
+        Args:
+            config (dict): Parsed config.json
+        
+        Returns:
+            dict: Config with only well-typed known keys (unknown keys are kept)
+        """
+        if not isinstance(config, dict):
+            return {}
+        valid = {}
+        for key, value in config.items():
+            expected = cls.SCHEMA.get(key)
+            if expected and not isinstance(value, expected[0]):
+                continue
+            valid[key] = value
+        if valid.get('tracked_location') == 'None':
+            # Written by older versions when no location was shown
+            del valid['tracked_location']
+        if 'tracked_locations' in valid:
+            valid['tracked_locations'] = [
+                path for path in valid['tracked_locations'] if isinstance(path, str)
+            ]
+        if 'locations' in valid:
+            valid['locations'] = {
+                path: state for path, state in valid['locations'].items()
+                if isinstance(state, dict)
+            }
+        return valid
+    
+    def _current(self):
+        """
+        Get the in-memory config, reading config.json again if it changed.
+        
+        Returns:
+            dict: Current config (caller holds the lock and must not keep it)
+        """
+        signature = self._file_signature()
+        if signature != self._signature:
+            config = {}
+            if signature is not None:
+                try:
+                    with open(self.config_file, 'r') as f:
+                        config = self._validated(json.load(f))
+                except (json.JSONDecodeError, UnicodeDecodeError, IOError) as e:
+                    print(f"Error reading config file: {e}")
+            # Changes not written yet win over the file
+            config.update(self._dirty)
+            self._config = config
+            self._signature = signature
+        return self._config
+    
+    def _get(self, key):
+        """Get a value, or its default."""
+        with self._lock:
+            value = self._current().get(key, self.SCHEMA[key][1])
+        if isinstance(value, (list, dict)):
+            # Callers get their own copy; the cached one must not change under us
+            return json.loads(json.dumps(value))
+        return value
+    
+    def _set(self, key, value):
+        """Change a value; it is written with the next batch."""
+        with self._lock:
+            config = self._current()
+            if key in config and config[key] == value:
+                return
+            config[key] = value
+            self._dirty[key] = value
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.WRITE_DELAY, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+    
+    def flush(self):
+        """Write pending changes to config.json now."""
+        with self._lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._dirty:
+                return
+            config = self._current()
+            try:
+                self._ensure_config_dir()
+                fd, tmp_path = tempfile.mkstemp(
+                    prefix=self.CONFIG_FILE_NAME + ".", suffix=".tmp", dir=self.config_dir
+                )
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(config, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.config_file)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except OSError as e:
+                # Keep the changes; they are retried with the next write
+                print(f"Error writing config file: {e}")
+                return
+            self._dirty = {}
+            self._signature = self._file_signature()
+    
+    # ------------------------------------------------------------------
+    # Tracked locations
+    # ------------------------------------------------------------------
+    
     def get_tracked_location(self):
         """
         Get the currently tracked location.
@@ -27,35 +180,71 @@ class Config:
         Returns:
             str: Path to tracked location, or None if not set
         """
-        if not self.config_file.exists():
-            return None
-        
-        try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-                return config.get('tracked_location')
-        except (json.JSONDecodeError, IOError):
-            return None
+        return self._get('tracked_location')
     
     def set_tracked_location(self, path):
         """
         Set the tracked location.
         
         Args:
-            path (str): Path to the location to track
+            path (str): Path to the location to track, or None
         """
-        config = {}
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                config = {}
+        self._set('tracked_location', str(path) if path is not None else None)
+    
+    def get_tracked_locations(self):
+        """
+        Get all tracked locations.
         
-        config['tracked_location'] = str(path)
+        Configs written before multiple locations were supported only have
+        'tracked_location'; it is returned as the only location.
         
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        Returns:
+            list: Paths of the tracked locations, in the order they were added
+        """
+        with self._lock:
+            config = self._current()
+            locations = config.get('tracked_locations')
+            if locations is None:
+                current = config.get('tracked_location')
+                locations = [current] if current else []
+            return list(locations)
+    
+    def set_tracked_locations(self, paths):
+        """
+        Set all tracked locations.
+        
+        Args:
+            paths (list): Paths of the locations to track
+        """
+        self._set('tracked_locations', [str(path) for path in paths])
+    
+    def add_tracked_location(self, path):
+        """
+        Add a location to the tracked locations, if it isn't tracked yet.
+        
+        Args:
+            path (str): Path to the location to track
+        """
+        with self._lock:
+            locations = self.get_tracked_locations()
+            if str(path) not in locations:
+                self.set_tracked_locations(locations + [str(path)])
+    
+    def remove_tracked_location(self, path):
+        """
+        Stop tracking a location and forget its state.
+        
+        Args:
+            path (str): Path of the location to remove
+        """
+        with self._lock:
+            locations = self.get_tracked_locations()
+            if str(path) in locations:
+                locations.remove(str(path))
+                self.set_tracked_locations(locations)
+            states = self._get('locations')
+            if states.pop(str(path), None) is not None:
+                self._set('locations', states)
     
     def has_tracked_location(self):
         """
@@ -65,4 +254,81 @@ class Config:
             bool: True if location is configured, False otherwise
         """
         return self.get_tracked_location() is not None
-
+    
+    # ------------------------------------------------------------------
+    # Per-location state
+    # ------------------------------------------------------------------
+    
+    def get_location_state(self, path):
+        """
+        Get the state remembered for a location, e.g. its view mode.
+        
+        Args:
+            path (str): Location path
+        
+        Returns:
+            dict: State values by name (empty if nothing was stored)
+        """
+        with self._lock:
+            state = self._current().get('locations', {}).get(str(path), {})
+            return json.loads(json.dumps(state))
+    
+    def update_location_state(self, path, **values):
+        """
+        Remember state values for a location.
+        
+        Args:
+            path (str): Location path
+            **values: JSON-serializable values to store; None removes a value
+        """
+        with self._lock:
+            states = self._get('locations')
+            state = states.setdefault(str(path), {})
+            for name, value in values.items():
+                if value is None:
+                    state.pop(name, None)
+                else:
+                    state[name] = value
+            if not state:
+                del states[str(path)]
+            self._set('locations', states)
+    
+    # ------------------------------------------------------------------
+    # Settings
+    # ------------------------------------------------------------------
+    
+    def get_watcher_backend(self):
+        """
+        Get the configured file watcher backend.
+        
+        Returns:
+            str: 'auto', 'native' or 'polling' (defaults to 'auto')
+        """
+        return self._get('watcher_backend')
+    
+    def set_watcher_backend(self, backend):
+        """
+        Set the file watcher backend.
+        
+        Args:
+            backend (str): 'auto', 'native' or 'polling'
+        """
+        self._set('watcher_backend', backend)
+    
+    def get_metrics_enabled(self):
+        """
+        Check whether performance metrics should be collected.
+        
+        Returns:
+            bool: True if enabled (defaults to False)
+        """
+        return self._get('metrics_enabled')
+    
+    def set_metrics_enabled(self, enabled):
+        """
+        Set whether performance metrics should be collected.
+        
+        Args:
+            enabled (bool): Whether to collect metrics
+        """
+        self._set('metrics_enabled', bool(enabled))
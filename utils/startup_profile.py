@@ -0,0 +1,51 @@
+"""Start-up timeline, printed when the application runs with --profile-startup."""
+import sys
+import time
+
+_origin = time.perf_counter()
+_enabled = False
+_marks = []  # (label, seconds since the origin)
+
+
+def enable():
+    """Start recording marks; times are relative to when this module was imported."""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    """
+    Check whether start-up is being profiled.
+    
+    Returns:
+        bool: True with --profile-startup
+    """
+    return _enabled
+
+
+def mark(label):
+    """
+    Record that a start-up step has finished.
+    
+    Args:
+        label (str): What was done, e.g. "import ui.main_window"
+    """
+    if _enabled:
+        _marks.append((label, time.perf_counter() - _origin))
+
+
+def report(file=None):
+    """
+    Print every step with its duration and the time since start.
+    
+    Args:
+        file: Stream to write to (defaults to stderr)
+    """
+    file = file or sys.stderr
+    print("Start-up profile (ms):", file=file)
+    print(f"  {'step':<40} {'took':>9} {'at':>9}", file=file)
+    previous = 0.0
+    for label, at in _marks:
+        print(f"  {label:<40} {(at - previous) * 1000:9.1f} {at * 1000:9.1f}", file=file)
+        previous = at
+    print("  (per-module import times: python -X importtime main.py)", file=file)